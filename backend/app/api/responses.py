@@ -0,0 +1,238 @@
+"""
+Response shapes and encodings shared by the data routes.
+
+Candle, indicator and backtest routes return rows as JSON by default,
+built as plain dicts from trusted internal data and serialized by
+FastJSONResponse (orjson) without response_model re-validation.
+format=columnar switches to one array per field, and an Accept header of
+ARROW_STREAM or MSGPACK serves that same columnar data as typed binary
+columns:
+
+- Arrow IPC stream: one record batch holding the model's columns
+  (date32/float64/int64/string, nulls in validity bitmaps). Fields that
+  aren't columns of that table (symbol, metrics, a backtest's trades)
+  are JSON values in the schema metadata.
+- MessagePack: the columnar model as a map. Each column is
+  {"type": ..., "data": <bin>} holding little-endian values (date32 is
+  int32 days since 1970-01-01), plus "valid" (a little-endian bitmap)
+  when the column has nulls. String columns keep "data" as an array.
+
+Both decode with np.frombuffer / pyarrow without parsing each value.
+pyarrow and msgpack are imported on first use; if one is missing the
+request gets 406.
+"""
+
+import importlib
+import json
+from datetime import date
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union, get_args, get_origin
+
+import numpy as np
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+_MEDIA_TYPES = {
+    JSON: JSON,
+    ARROW_STREAM: ARROW_STREAM,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/*": JSON,
+    "*/*": JSON,
+}
+
+# OpenAPI `responses` for routes that negotiate binary encodings
+BINARY_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {"content": {ARROW_STREAM: {}, MSGPACK: {}}},
+    406: {"description": "Requested binary encoding is not available on this server"},
+}
+
+# Python element type of a column -> (type name, NumPy dtype)
+_COLUMN_TYPES = {
+    date: ("date32", "<i4"),
+    float: ("float64", "<f8"),
+    int: ("int64", "<i8"),
+    str: ("string", None),
+}
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON via orjson: dates, NumPy arrays and scalars are serialized
+    natively, NaN becomes null.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class ResponseFormat(str, Enum):
+    rows = "rows"
+    columnar = "columnar"
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Media type to respond with for an Accept header: the supported type
+    with the highest q (earliest on ties). Anything else falls back to JSON.
+    """
+    best: Tuple[float, str] = (0.0, JSON)
+    for part in (accept or "").split(","):
+        media, *params = (p.strip() for p in part.split(";"))
+        media_type = _MEDIA_TYPES.get(media.lower())
+        if media_type is None:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best[0]:
+            best = (q, media_type)
+    return best[1]
+
+
+def fast_json_response(content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serialize plain dicts/lists built from trusted internal data.
+    Returning a Response directly skips FastAPI's response_model
+    validation and jsonable_encoder pass.
+    """
+    return FastJSONResponse(content=content, headers={"Vary": "Accept", **(headers or {})})
+
+
+def columnar_response(
+    model: BaseModel, media_type: str = JSON, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serialize a columnar model built from trusted internal arrays.
+
+    Returning a Response directly skips FastAPI's response_model
+    validation, which would only re-check every value. Fields left as None
+    (indicators that weren't requested) are omitted.
+    """
+    headers = {"Vary": "Accept", **(headers or {})}
+    if media_type == ARROW_STREAM:
+        return Response(content=_arrow_stream(model), media_type=ARROW_STREAM, headers=headers)
+    if media_type == MSGPACK:
+        return Response(content=_msgpack(model), media_type=MSGPACK, headers=headers)
+    return FastJSONResponse(content=model.model_dump(exclude_none=True), headers=headers)
+
+
+def _require(module: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise HTTPException(status_code=406, detail=f"{module} is not installed on the server; request JSON instead")
+
+
+def _strip_optional(annotation: Any) -> Any:
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _column_type(annotation: Any) -> Optional[type]:
+    """
+    Element type of a List[...] field (Optional wrappers removed), or None
+    if the field isn't a column.
+    """
+    annotation = _strip_optional(annotation)
+    if get_origin(annotation) in (list, List):
+        element = _strip_optional(get_args(annotation)[0])
+        if element in _COLUMN_TYPES:
+            return element
+    return None
+
+
+def _fields(model: BaseModel):
+    """
+    (name, value, column element type or None) for every set field.
+    """
+    for name, field in type(model).model_fields.items():
+        value = getattr(model, name)
+        if value is not None:
+            yield name, value, _column_type(field.annotation)
+
+
+def _is_table(model: BaseModel) -> bool:
+    return all(element is not None for _, _, element in _fields(model))
+
+
+def _arrow_stream(model: BaseModel) -> bytes:
+    pa = _require("pyarrow")
+
+    table = model
+    if not any(element for _, _, element in _fields(model)):
+        # No top-level columns (a backtest): stream the first nested table
+        table = next(v for _, v, _ in _fields(model) if isinstance(v, BaseModel) and _is_table(v))
+
+    arrow_types = {date: pa.date32(), float: pa.float64(), int: pa.int64(), str: pa.string()}
+    names, arrays = [], []
+    for name, values, element in _fields(table):
+        if element is not None:
+            names.append(name)
+            arrays.append(pa.array(values, type=arrow_types[element]))
+
+    metadata: Dict[str, str] = {}
+    for name, value, element in _fields(model):
+        if value is table or (table is model and element is not None):
+            continue
+        if isinstance(value, BaseModel):
+            value = value.model_dump(mode="json")
+        metadata[name] = json.dumps(value)
+
+    batch = pa.RecordBatch.from_arrays(arrays, names=names)
+    schema = batch.schema.with_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(batch.replace_schema_metadata(metadata))
+    return sink.getvalue().to_pybytes()
+
+
+def _typed_column(values: List[Any], element: type) -> Dict[str, Any]:
+    type_name, dtype = _COLUMN_TYPES[element]
+    if dtype is None:
+        return {"type": type_name, "data": list(values)}
+
+    valid = np.fromiter((v is not None for v in values), dtype=bool, count=len(values))
+    if element is date:
+        data = np.array(values, dtype="datetime64[D]").astype(dtype)
+    elif valid.all():
+        data = np.asarray(values, dtype=dtype)
+    else:
+        data = np.zeros(len(values), dtype=dtype)
+        data[valid] = [v for v in values if v is not None]
+
+    column = {"type": type_name, "data": data.tobytes()}
+    if not valid.all():
+        column["valid"] = np.packbits(valid, bitorder="little").tobytes()
+    return column
+
+
+def _packable(model: BaseModel) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for name, value, element in _fields(model):
+        if isinstance(value, BaseModel):
+            out[name] = _packable(value)
+        elif element is not None:
+            out[name] = _typed_column(value, element)
+        else:
+            out[name] = value
+    return out
+
+
+def _msgpack(model: BaseModel) -> bytes:
+    msgpack = _require("msgpack")
+    return msgpack.packb(_packable(model), use_bin_type=True)
@@ -1,33 +1,189 @@
 from __future__ import annotations
 
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db  # removed get_current_user
-from app.schemas.backtest import BacktestResult
-from app.services.backtesting.backtest_service import BacktestService
+from app.api.responses import (
+    BINARY_RESPONSES,
+    JSON,
+    ResponseFormat,
+    columnar_response,
+    fast_json_response,
+    negotiate,
+)
+from app.schemas.backtest import (
+    BacktestColumnar,
+    BacktestResult,
+    BacktestSweepRequest,
+    BacktestSweepResponse,
+    MonteCarloMethod,
+    PortfolioBacktestRequest,
+    PortfolioBacktestResponse,
+    WalkForwardRequest,
+    WalkForwardResponse,
+)
+from app.services.backtesting.backtest_service import BacktestService, to_columnar
 
 router = APIRouter(prefix="/backtest", tags=["backtest"])
 
+# Upper bound on parameter combinations per sweep request
+MAX_SWEEP_COMBINATIONS = 5000
 
-@router.get("/{symbol}", response_model=BacktestResult)
+# Upper bound on candidate sma periods per walk-forward request
+MAX_WALK_FORWARD_PERIODS = 500
+
+# Upper bound on Monte Carlo paths per backtest request
+MAX_MONTE_CARLO_RESAMPLES = 50_000
+
+# Upper bound on symbols per portfolio backtest
+MAX_PORTFOLIO_SYMBOLS = 500
+
+# 503 detail when a sweep worker process died mid-request
+POOL_FAILED = "Backtest worker pool failed; retry the request"
+
+
+@router.post("/portfolio", response_model=PortfolioBacktestResponse)
+def backtest_portfolio(
+    payload: PortfolioBacktestRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    The SMA threshold strategy across a basket of symbols, traded as one
+    portfolio with equal or signal-weighted allocation, rebalanced on
+    position changes and payload.rebalance.
+    """
+    if len(set(s.strip().upper() for s in payload.symbols)) > MAX_PORTFOLIO_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PORTFOLIO_SYMBOLS} symbols per portfolio")
+
+    try:
+        result = BacktestService(db).run_sma_threshold_portfolio(
+            symbols=payload.symbols,
+            start=payload.start,
+            end=payload.end,
+            sma_period=payload.sma_period,
+            initial_cash=payload.initial_cash,
+            allocation=payload.allocation,
+            rebalance=payload.rebalance,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return fast_json_response(result.model_dump())
+
+
+@router.get("/{symbol}", response_model=Union[BacktestResult, BacktestColumnar], responses=BINARY_RESPONSES)
 def backtest_symbol(
     symbol: str,
     start: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end: date = Query(..., description="End date (YYYY-MM-DD)"),
     sma_period: int = Query(20, ge=1, description="SMA period"),
     initial_cash: float = Query(10_000.0, gt=0.0, description="Starting cash"),
+    monte_carlo: Optional[MonteCarloMethod] = Query(
+        None, description="Add metric distributions from resampled trades or block-bootstrapped daily returns"
+    ),
+    mc_resamples: int = Query(1000, ge=100, le=MAX_MONTE_CARLO_RESAMPLES, description="Monte Carlo paths"),
+    mc_block_size: int = Query(20, ge=1, le=252, description="Days per bootstrap block (returns method)"),
+    mc_seed: Optional[int] = Query(None, ge=0, description="Seed for reproducible resampling"),
+    format: ResponseFormat = Query(ResponseFormat.rows, description="rows, or columnar for one array per field"),
+    accept: Optional[str] = Header(None),
     db: Session = Depends(get_db),  # removed _user dependency
-) -> BacktestResult:
+):
     try:
-        return BacktestService(db).run_sma_threshold_backtest(
+        result = BacktestService(db).run_sma_threshold_backtest(
             symbol=symbol,
             start=start,
             end=end,
             sma_period=sma_period,
             initial_cash=initial_cash,
+            monte_carlo=monte_carlo,
+            mc_resamples=mc_resamples,
+            mc_block_size=mc_block_size,
+            mc_seed=mc_seed,
         )
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+    media_type = negotiate(accept)
+    if format == ResponseFormat.columnar or media_type != JSON:
+        return columnar_response(to_columnar(result), media_type)
+    return fast_json_response(result.model_dump())
+
+
+@router.post("/{symbol}/sweep", response_model=BacktestSweepResponse)
+def sweep_symbol(
+    symbol: str,
+    payload: BacktestSweepRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    The SMA threshold backtest for every combination of sma_period (a
+    range) and initial_cash, ranked by payload.rank_by. Candles are loaded
+    once and the combinations are spread over the sweep worker pool.
+    """
+    count = payload.sma_period.count()
+    if not count:
+        raise HTTPException(status_code=400, detail="sma_period.start must be <= sma_period.stop")
+    if any(cash <= 0 for cash in payload.initial_cash):
+        raise HTTPException(status_code=400, detail="initial_cash values must be > 0")
+    if count * len(set(payload.initial_cash)) > MAX_SWEEP_COMBINATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SWEEP_COMBINATIONS} parameter combinations per sweep")
+    periods = payload.sma_period.values()
+
+    try:
+        result = BacktestService(db).run_sma_threshold_sweep(
+            symbol=symbol,
+            start=payload.start,
+            end=payload.end,
+            sma_periods=periods,
+            initial_cashes=payload.initial_cash,
+            rank_by=payload.rank_by,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail=POOL_FAILED)
+
+    return fast_json_response(result.model_dump())
+
+
+@router.post("/{symbol}/walk-forward", response_model=WalkForwardResponse)
+def walk_forward_symbol(
+    symbol: str,
+    payload: WalkForwardRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Walk-forward analysis: on each train window pick the best sma_period by
+    payload.rank_by, run it on the following test window, and stitch the
+    out-of-sample results. Train windows run on the sweep worker pool.
+    """
+    count = payload.sma_period.count()
+    if not count:
+        raise HTTPException(status_code=400, detail="sma_period.start must be <= sma_period.stop")
+    if count > MAX_WALK_FORWARD_PERIODS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_WALK_FORWARD_PERIODS} sma periods")
+    periods = payload.sma_period.values()
+
+    try:
+        result = BacktestService(db).run_sma_threshold_walk_forward(
+            symbol=symbol,
+            start=payload.start,
+            end=payload.end,
+            sma_periods=periods,
+            train_size=payload.train_size,
+            test_size=payload.test_size,
+            anchored=payload.anchored,
+            rank_by=payload.rank_by,
+            initial_cash=payload.initial_cash,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail=POOL_FAILED)
+
+    return fast_json_response(result.model_dump())
@@ -1,16 +1,59 @@
 from datetime import date
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_user
+from app.api.responses import (
+    BINARY_RESPONSES,
+    JSON,
+    ResponseFormat,
+    columnar_response,
+    fast_json_response,
+    negotiate,
+)
 from app.db.models.user import User
-from app.schemas.indicators import IndicatorsResponse
-from app.services.indicators.indicator_service import get_indicator_points
+from app.schemas.cache import CacheStats
+from app.schemas.indicators import (
+    IndicatorMatrixResponse,
+    IndicatorsColumnar,
+    IndicatorsResponse,
+    LatestIndicatorsResponse,
+)
+from app.services.indicators.indicator_cache import get_indicator_cache
+from app.services.indicators.indicator_service import (
+    get_indicator_columns,
+    get_indicator_matrix,
+    get_indicator_rows,
+)
+from app.services.indicators.indicator_state_service import get_latest_indicators
+from app.utils.downsample import MIN_POINTS
 
 router = APIRouter(prefix="/indicators", tags=["indicators"])
 
+# Upper bound on output columns per matrix request
+MAX_MATRIX_COLUMNS = 64
+
+
+def _parse_macd(text: str) -> Tuple[int, int, int]:
+    """
+    "12,26,9" -> (12, 26, 9); raises HTTP 400 on anything else.
+    """
+    parts = text.split(",")
+    if len(parts) != 3 or not all(p.strip().isdigit() for p in parts):
+        raise HTTPException(status_code=400, detail=f"Invalid macd {text!r}; expected fast,slow,signal e.g. 12,26,9")
+    fast, slow, signal = (int(p) for p in parts)
+    _check_macd(fast, slow, signal)
+    return fast, slow, signal
+
+
+def _check_macd(fast: int, slow: int, signal: int) -> None:
+    if not all(1 <= p <= 500 for p in (fast, slow, signal)):
+        raise HTTPException(status_code=400, detail="macd periods must be between 1 and 500")
+    if fast >= slow:
+        raise HTTPException(status_code=400, detail="macd fast period must be < slow period")
+
 @router.get("/ping")
 async def indicators_ping() -> dict:
     """
@@ -19,7 +62,88 @@ async def indicators_ping() -> dict:
     return {"status": "ok"}
 
 
-@router.get("/{symbol}", response_model=IndicatorsResponse)
+@router.get("/cache/stats", response_model=CacheStats)
+def indicator_cache_stats(_: User = Depends(get_current_user)):
+    """
+    Hit/miss/eviction counters and resident size of the indicator cache.
+    """
+    return CacheStats(**get_indicator_cache().stats())
+
+
+@router.get("/{symbol}/latest", response_model=LatestIndicatorsResponse)
+def latest_indicators(
+    symbol: str,
+    sma_period: Optional[int] = Query(None, ge=1, le=500),
+    ema_period: Optional[int] = Query(None, ge=1, le=500),
+    rsi_period: Optional[int] = Query(None, ge=1, le=500),
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """
+    Indicator values at the most recent candle, served from persisted
+    incremental state instead of recomputing the whole history.
+    """
+    requested = {"sma": sma_period, "ema": ema_period, "rsi": rsi_period}
+    specs = [(kind, period) for kind, period in requested.items() if period is not None]
+
+    latest = get_latest_indicators(db, symbol, specs)
+    if latest is None:
+        raise HTTPException(status_code=404, detail=f"No candles for {symbol.upper()}")
+
+    values = {kind: latest.values[(kind, period)] for kind, period in specs}
+    return LatestIndicatorsResponse(symbol=symbol.upper(), as_of=latest.as_of, close=latest.close, **values)
+
+
+@router.get("/{symbol}/matrix", response_model=IndicatorMatrixResponse)
+def indicator_matrix(
+    symbol: str,
+    start: date = Query(...),
+    end: date = Query(...),
+    sma: List[int] = Query([]),
+    ema: List[int] = Query([]),
+    rsi: List[int] = Query([]),
+    bb_period: List[int] = Query([]),
+    bb_std: List[float] = Query([2.0]),
+    macd: List[str] = Query([]),
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """
+    Several periods per indicator in one request, e.g.
+    ?sma=10&sma=20&sma=50&bb_period=20&bb_std=1&bb_std=2&macd=12,26,9.
+    Candles are loaded once and returned as aligned columns.
+    """
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be <= end")
+    for name, periods in (("sma", sma), ("ema", ema), ("rsi", rsi), ("bb_period", bb_period)):
+        if any(p < 1 or p > 500 for p in periods):
+            raise HTTPException(status_code=400, detail=f"{name} periods must be between 1 and 500")
+    if any(s < 0.1 or s > 5.0 for s in bb_std):
+        raise HTTPException(status_code=400, detail="bb_std values must be between 0.1 and 5.0")
+
+    macds = [_parse_macd(m) for m in macd]
+
+    bb_columns = len(set(bb_period)) * (1 + 2 * len(set(bb_std)))
+    macd_columns = 3 * len(set(macds))
+    if len(set(sma)) + len(set(ema)) + len(set(rsi)) + bb_columns + macd_columns > MAX_MATRIX_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MATRIX_COLUMNS} indicator columns per request")
+
+    matrix = get_indicator_matrix(
+        db=db,
+        symbol=symbol,
+        start=start,
+        end=end,
+        sma_periods=sma,
+        ema_periods=ema,
+        rsi_periods=rsi,
+        bb_periods=bb_period,
+        bb_stds=bb_std,
+        macds=macds,
+    )
+    return columnar_response(matrix)
+
+
+@router.get("/{symbol}", response_model=Union[IndicatorsResponse, IndicatorsColumnar], responses=BINARY_RESPONSES)
 def indicators(
     symbol: str,
     start: date = Query(...),
@@ -29,10 +153,22 @@ def indicators(
     rsi_period: Optional[int] = Query(None, ge=1, le=500),
     bb_period: Optional[int] = Query(None, ge=1, le=500),
     bb_std: Optional[float] = Query(2.0, ge=0.1, le=5.0),
+    macd: bool = Query(False),
+    macd_fast: int = Query(12, ge=1, le=500),
+    macd_slow: int = Query(26, ge=1, le=500),
+    macd_signal: int = Query(9, ge=1, le=500),
+    max_points: Optional[int] = Query(
+        None, ge=MIN_POINTS, description="Downsample to at most this many rows (LTTB on close) for charting"
+    ),
+    format: ResponseFormat = Query(ResponseFormat.rows, description="rows, or columnar for one array per field"),
+    accept: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
-    points = get_indicator_points(
+    if macd:
+        _check_macd(macd_fast, macd_slow, macd_signal)
+
+    params = dict(
         db=db,
         symbol=symbol,
         start=start,
@@ -42,5 +178,10 @@ def indicators(
         rsi_period=rsi_period,
         bb_period=bb_period,
         bb_std=bb_std,
+        macd=(macd_fast, macd_slow, macd_signal) if macd else None,
+        max_points=max_points,
     )
-    return IndicatorsResponse(symbol=symbol.upper(), points=points)
+    media_type = negotiate(accept)
+    if format == ResponseFormat.columnar or media_type != JSON:
+        return columnar_response(get_indicator_columns(**params), media_type)
+    return fast_json_response({"symbol": symbol.upper(), "points": get_indicator_rows(**params)})
@@ -1,16 +1,33 @@
+import base64
+import binascii
 from datetime import date
-from typing import List
+from enum import Enum
+from typing import List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.api.deps import get_db, get_current_user
-from app.db.models.stock import Symbol, Candle
+from app.api.responses import (
+    BINARY_RESPONSES,
+    JSON,
+    ResponseFormat,
+    columnar_response,
+    fast_json_response,
+    negotiate,
+)
+from app.db.models.stock import Symbol
 from app.db.models.user import User
-from app.schemas.stock import CandleDTO, SymbolSearchResult
-from app.schemas.stocks import IngestResponse
+from app.schemas.cache import CacheStats
+from app.schemas.stock import CandleDTO, CandlesColumnar, SymbolSearchResult
+from app.schemas.stocks import BatchIngestRequest, BatchIngestResponse, IngestFailure, IngestResponse
+from app.services.market_data.csv_stream import PayloadError
+from app.services.stocks.batch_ingest_service import ingest_many_symbols
+from app.services.stocks.candle_cache import get_candle_cache, get_candles
+from app.services.stocks.candle_series import CANDLE_COLUMNS, CandleSeries
 from app.services.stocks.ingest_service import ingest_symbol_candles
+from app.utils.downsample import ohlc_buckets
 
 router = APIRouter(prefix="/stocks", tags=["stocks"])
 
@@ -22,6 +39,15 @@ async def stocks_ping() -> dict:
     return {"status": "ok"}
 
 
+@router.get("/cache/stats", response_model=CacheStats)
+def candle_cache_stats(_: User = Depends(get_current_user)):
+    """
+    Hit/miss/eviction counters and resident size of the candle series
+    cache; resident_bytes / entries is the average cost of a symbol.
+    """
+    return CacheStats(**get_candle_cache().stats())
+
+
 @router.get("/search", response_model=List[SymbolSearchResult])
 def search_symbols(
     q: str = Query(..., min_length=1, description="Search query"),
@@ -63,48 +89,183 @@ def search_symbols(
     return results
 
 
+@router.post("/ingest", response_model=BatchIngestResponse)
+async def ingest_batch(
+    payload: BatchIngestRequest,
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_user),  # auth required
+):
+    """
+    Ingest many symbols in one call. Provider requests run concurrently over
+    a shared connection pool; DB writes are batched across symbols.
+    """
+    if payload.start > payload.end:
+        raise HTTPException(status_code=400, detail="start must be <= end")
+
+    outcomes = await ingest_many_symbols(
+        db=db,
+        symbols=payload.symbols,
+        start=payload.start,
+        end=payload.end,
+        incremental=payload.incremental,
+    )
+    return BatchIngestResponse(
+        results=[
+            IngestResponse(symbol=o.ticker, inserted=o.inserted, skipped=o.skipped, total_seen=o.total_seen)
+            for o in outcomes
+            if o.error is None
+        ],
+        failed=[IngestFailure(symbol=o.ticker, error=o.error) for o in outcomes if o.error is not None],
+    )
+
+
 @router.post("/{symbol}/ingest", response_model=IngestResponse)
 def ingest(
     symbol: str,
     start: date = Query(...),
     end: date = Query(...),
+    incremental: bool = Query(True, description="Only fetch date spans missing from the DB"),
     db: Session = Depends(get_db),
     _: User = Depends(get_current_user),  # auth required
 ):
-    inserted, skipped, total_seen = ingest_symbol_candles(db=db, symbol=symbol, start=start, end=end)
+    try:
+        inserted, skipped, total_seen = ingest_symbol_candles(
+            db=db, symbol=symbol, start=start, end=end, incremental=incremental
+        )
+    except PayloadError as e:
+        raise HTTPException(status_code=502, detail=str(e))
     return IngestResponse(symbol=symbol.upper(), inserted=inserted, skipped=skipped, total_seen=total_seen)
 
 
-@router.get("/{symbol}/candles", response_model=List[CandleDTO])
+# Columns of CandleDTO, in order
+_CANDLE_FIELDS = ("date", "open", "high", "low", "close", "volume")
+
+
+class SortOrder(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+
+# Response header carrying the cursor for the next page, when there is one
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_cursor(order: SortOrder, last: date) -> str:
+    return base64.urlsafe_b64encode(f"{order.value}:{last.isoformat()}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, order: SortOrder) -> date:
+    """
+    Date of the last candle on the previous page. Cursors are bound to the
+    order they were issued for.
+    """
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        issued_for, _, last = text.partition(":")
+        if issued_for != order.value:
+            raise ValueError
+        return date.fromisoformat(last)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor for this order")
+
+
+def _candle_page(
+    db: Session,
+    ticker: str,
+    limit: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    order: SortOrder = SortOrder.asc,
+    after: Optional[date] = None,
+) -> Tuple[CandleSeries, Optional[date]]:
+    """
+    One page of candles and the date to continue after (None on the last
+    page). Keyset pagination: each page is a slice of the cached series
+    (or, with the candle cache disabled, a range scan of
+    ix_candles_symbol_date) starting past `after`, so its cost does not
+    grow with how deep the client has paged.
+    """
+    # One extra row tells us whether another page follows
+    series = get_candles(
+        db, ticker, start, end, CANDLE_COLUMNS, descending=order == SortOrder.desc, after=after, limit=limit + 1
+    )
+    if len(series) > limit:
+        series = series.select(slice(limit))
+        return series, series.dates[-1].item()
+    return series, None
+
+
+def _downsample_candles(series: CandleSeries, order: SortOrder, max_points: int) -> CandleSeries:
+    """
+    Merge a page of candles into at most max_points OHLC buckets, built
+    in date order whichever order the page is in.
+    """
+    if len(series) <= max_points:
+        return series
+    if order == SortOrder.desc:
+        series = series.select(slice(None, None, -1))
+    starts, opens, highs, lows, closes, volumes = ohlc_buckets(
+        series.open, series.high, series.low, series.close, series.volume, max_points
+    )
+    merged = CandleSeries(
+        series.ticker,
+        dates=series.dates[starts],
+        open=opens,
+        high=highs,
+        low=lows,
+        close=closes,
+        volume=volumes,
+    )
+    return merged.select(slice(None, None, -1)) if order == SortOrder.desc else merged
+
+
+def _candle_columns(series: CandleSeries) -> CandlesColumnar:
+    return CandlesColumnar.model_construct(
+        symbol=series.ticker,
+        dates=series.dates.tolist(),
+        open=series.open.tolist(),
+        high=series.high.tolist(),
+        low=series.low.tolist(),
+        close=series.close.tolist(),
+        volume=series.volume.tolist(),
+    )
+
+
+@router.get("/{symbol}/candles", response_model=Union[List[CandleDTO], CandlesColumnar], responses=BINARY_RESPONSES)
 def list_candles(
     symbol: str,
     limit: int = Query(200, ge=1, le=5000),
+    start: Optional[date] = Query(None, description="Earliest candle date (inclusive)"),
+    end: Optional[date] = Query(None, description="Latest candle date (inclusive)"),
+    order: SortOrder = Query(SortOrder.asc, description="asc = oldest first, desc = newest first"),
+    cursor: Optional[str] = Query(None, description=f"Value of {NEXT_CURSOR_HEADER} from the previous page"),
+    max_points: Optional[int] = Query(
+        None, ge=1, description="Merge the page into at most this many OHLC buckets for charting"
+    ),
+    format: ResponseFormat = Query(ResponseFormat.rows, description="rows, or columnar for one array per field"),
+    accept: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     _: User = Depends(get_current_user),  # auth required
 ):
-    sym = db.execute(select(Symbol).where(Symbol.ticker == symbol.upper())).scalar_one_or_none()
-    if sym is None:
-        return []
-
-    rows = (
-        db.execute(
-            select(Candle)
-            .where(Candle.symbol_id == sym.id)
-            .order_by(Candle.date.asc())
-            .limit(limit)
-        )
-        .scalars()
-        .all()
-    )
+    """
+    Candles for a symbol, optionally within [start, end], in date order.
+    When more rows match than `limit`, the response carries an
+    X-Next-Cursor header; pass it back as `cursor` (with the same filters
+    and order) for the next page. With max_points, consecutive candles of
+    the page are merged into buckets (first open, high/low extremes, last
+    close, summed volume, dated by their first candle); the cursor still
+    continues after the page's last raw candle.
+    """
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="start must be <= end")
+    after = _decode_cursor(cursor, order) if cursor else None
 
-    return [
-        CandleDTO(
-            date=r.date,
-            open=r.open,
-            high=r.high,
-            low=r.low,
-            close=r.close,
-            volume=r.volume,
-        )
-        for r in rows
-    ]
+    series, last = _candle_page(db, symbol.upper(), limit, start, end, order, after)
+    headers = {NEXT_CURSOR_HEADER: _encode_cursor(order, last)} if last is not None else None
+    if max_points is not None:
+        series = _downsample_candles(series, order, max_points)
+
+    media_type = negotiate(accept)
+    if format == ResponseFormat.columnar or media_type != JSON:
+        return columnar_response(_candle_columns(series), media_type, headers)
+    return fast_json_response([dict(zip(_CANDLE_FIELDS, row)) for row in series.rows()], headers)
@@ -7,6 +7,18 @@ class Settings(BaseModel):
     JWT_SECRET: str = "change-me"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    MARKET_DATA_PROVIDER: str = "stooq"
+    STOOQ_BASE_URL: str = "https://stooq.com/q/d/l/"
+    SYNTHETIC_SEED: int = 0
+    INGEST_MAX_CONCURRENCY: int = 8
+    STOOQ_REQUESTS_PER_SECOND: float = 5.0
+    MARKET_DATA_CACHE_DIR: str = ".cache/market_data"
+    MARKET_DATA_CACHE_TTL_SECONDS: int = 12 * 60 * 60
+    MARKET_DATA_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    INDICATOR_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CANDLE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    TRACKED_INDICATORS: str = "sma:20,ema:20,rsi:14"
+    BACKTEST_SWEEP_WORKERS: int = 0
 
 
 def get_settings() -> Settings:
@@ -15,6 +27,18 @@ def get_settings() -> Settings:
         JWT_SECRET=os.getenv("JWT_SECRET", "change-me"),
         JWT_ALGORITHM=os.getenv("JWT_ALGORITHM", "HS256"),
         ACCESS_TOKEN_EXPIRE_MINUTES=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60")),
+        MARKET_DATA_PROVIDER=os.getenv("MARKET_DATA_PROVIDER", "stooq"),
+        STOOQ_BASE_URL=os.getenv("STOOQ_BASE_URL", "https://stooq.com/q/d/l/"),
+        SYNTHETIC_SEED=int(os.getenv("SYNTHETIC_SEED", "0")),
+        INGEST_MAX_CONCURRENCY=int(os.getenv("INGEST_MAX_CONCURRENCY", "8")),
+        STOOQ_REQUESTS_PER_SECOND=float(os.getenv("STOOQ_REQUESTS_PER_SECOND", "5.0")),
+        MARKET_DATA_CACHE_DIR=os.getenv("MARKET_DATA_CACHE_DIR", ".cache/market_data"),
+        MARKET_DATA_CACHE_TTL_SECONDS=int(os.getenv("MARKET_DATA_CACHE_TTL_SECONDS", str(12 * 60 * 60))),
+        MARKET_DATA_CACHE_MAX_BYTES=int(os.getenv("MARKET_DATA_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+        INDICATOR_CACHE_MAX_BYTES=int(os.getenv("INDICATOR_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        CANDLE_CACHE_MAX_BYTES=int(os.getenv("CANDLE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+        TRACKED_INDICATORS=os.getenv("TRACKED_INDICATORS", "sma:20,ema:20,rsi:14"),
+        BACKTEST_SWEEP_WORKERS=int(os.getenv("BACKTEST_SWEEP_WORKERS", "0")),
     )
 
 
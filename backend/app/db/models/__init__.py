@@ -1,4 +1,5 @@
 from app.db.models.user import User
 from app.db.models.stock import Symbol, Candle
+from app.db.models.indicator_state import IndicatorState
 
-__all__ = ["User", "Symbol", "Candle"]
+__all__ = ["User", "Symbol", "Candle", "IndicatorState"]
@@ -0,0 +1,31 @@
+from datetime import date
+
+from sqlalchemy import JSON, Date, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class IndicatorState(Base):
+    """
+    Running state of one recursive/rolling indicator for a symbol, advanced
+    by ingestion so the latest value is available without a full recompute.
+    `state` holds the kind-specific accumulators (see indicators.incremental).
+    """
+
+    __tablename__ = "indicator_states"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+
+    symbol_id: Mapped[int] = mapped_column(ForeignKey("symbols.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    period: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    as_of: Mapped[date | None] = mapped_column(Date, nullable=True)
+    bars: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    state: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+
+    __table_args__ = (
+        UniqueConstraint("symbol_id", "kind", "period", name="uq_indicator_states_symbol_kind_period"),
+    )
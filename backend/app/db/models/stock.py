@@ -1,3 +1,5 @@
+from datetime import date
+
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import String, Integer, Date, Float, ForeignKey, UniqueConstraint, Index
 from app.db.base import Base
@@ -10,6 +12,15 @@ class Symbol(Base):
     ticker: Mapped[str] = mapped_column(String(16), unique=True, index=True, nullable=False)
     name: Mapped[str | None] = mapped_column(String(128), nullable=True)
 
+    # Dates over which the candles already hold everything the provider has;
+    # gaps inside (halts, pre-listing days) are not requested again
+    complete_from: Mapped[date | None] = mapped_column(Date, nullable=True)
+    complete_through: Mapped[date | None] = mapped_column(Date, nullable=True)
+
+    # Bumped whenever candles are inserted; keys caches of derived data
+    # (see app.services.stocks.data_version)
+    data_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
     candles: Mapped[list["Candle"]] = relationship(back_populates="symbol", cascade="all, delete-orphan")
 
 
@@ -1,12 +1,24 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes.auth import router as auth_router
-from app.api.routes.stocks import router as stocks_router
+from app.api.routes.stocks import NEXT_CURSOR_HEADER, router as stocks_router
 from app.api.routes.indicators import router as indicators_router
 from app.api.routes.backtest import router as backtest_router
+from app.services.backtesting.sweep import shutdown_sweep_pool
+from app.services.market_data.async_stooq_provider import close_async_stooq_provider
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_async_stooq_provider()
+    shutdown_sweep_pool()
+
 
-app = FastAPI(title="MSRP Platform", version="0.1.0")
+app = FastAPI(title="MSRP Platform", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +26,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 @app.get("/health")
@@ -1,5 +1,6 @@
 from datetime import date
-from typing import List, Optional
+from enum import Enum
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -28,7 +29,193 @@ class BacktestMetrics(BaseModel):
     sharpe_ratio: Optional[float] = None
 
 
+class MonteCarloMethod(str, Enum):
+    trades = "trades"
+    returns = "returns"
+
+
+class MetricDistribution(BaseModel):
+    mean: float
+    std: float
+    p5: float
+    p25: float
+    p50: float
+    p75: float
+    p95: float
+
+
+class MonteCarloSummary(BaseModel):
+    """
+    Distributions of the metrics over resampled paths: trades drawn with
+    replacement, or daily returns drawn in blocks of block_size.
+    """
+    method: MonteCarloMethod
+    resamples: int
+    block_size: int
+    total_return_pct: MetricDistribution
+    max_drawdown_pct: MetricDistribution
+    sharpe_ratio: MetricDistribution
+
+
 class BacktestResult(BaseModel):
     equity_curve: List[EquityPoint]
     trades: List[Trade]
     metrics: BacktestMetrics
+    monte_carlo: Optional[MonteCarloSummary] = None
+
+
+class EquityColumns(BaseModel):
+    dates: List[date]
+    equity: List[float]
+
+
+class TradeColumns(BaseModel):
+    entry_date: List[date]
+    exit_date: List[date]
+    entry_price: List[float]
+    exit_price: List[float]
+    pnl: List[float]
+    return_pct: List[float]
+    reason: List[Optional[str]]
+
+
+class BacktestColumnar(BaseModel):
+    """
+    format=columnar shape of BacktestResult: the equity curve and trades as
+    one array per field.
+    """
+    equity_curve: EquityColumns
+    trades: TradeColumns
+    metrics: BacktestMetrics
+    monte_carlo: Optional[MonteCarloSummary] = None
+
+
+class SweepRankBy(str, Enum):
+    sharpe_ratio = "sharpe_ratio"
+    total_return_pct = "total_return_pct"
+    max_drawdown_pct = "max_drawdown_pct"
+    win_rate_pct = "win_rate_pct"
+
+
+# Largest period a PeriodRange may reach
+MAX_PERIOD = 5000
+
+
+class PeriodRange(BaseModel):
+    """
+    Periods start, start + step, ... up to and including stop.
+    """
+    start: int = Field(..., ge=1, le=MAX_PERIOD)
+    stop: int = Field(..., ge=1, le=MAX_PERIOD)
+    step: int = Field(1, ge=1, le=MAX_PERIOD)
+
+    def count(self) -> int:
+        """
+        Number of periods, without building them.
+        """
+        return len(range(self.start, self.stop + 1, self.step))
+
+    def values(self) -> List[int]:
+        return list(range(self.start, self.stop + 1, self.step))
+
+
+class BacktestSweepRequest(BaseModel):
+    start: date
+    end: date
+    sma_period: PeriodRange
+    initial_cash: List[float] = Field([10_000.0], min_length=1)
+    rank_by: SweepRankBy = SweepRankBy.sharpe_ratio
+
+
+class SweepResult(BaseModel):
+    sma_period: int
+    initial_cash: float
+    metrics: BacktestMetrics
+
+
+class BacktestSweepResponse(BaseModel):
+    """
+    One result per parameter combination, best first by rank_by (lowest
+    first for max_drawdown_pct).
+    """
+    symbol: str
+    rank_by: SweepRankBy
+    results: List[SweepResult]
+
+
+class WalkForwardRequest(BaseModel):
+    start: date
+    end: date
+    sma_period: PeriodRange
+    train_size: int = Field(252, ge=2, description="Candles per train window (the first one, if anchored)")
+    test_size: int = Field(63, ge=1, description="Candles per test window")
+    anchored: bool = False
+    rank_by: SweepRankBy = SweepRankBy.sharpe_ratio
+    initial_cash: float = Field(10_000.0, gt=0.0)
+
+
+class WalkForwardFold(BaseModel):
+    train_start: date
+    train_end: date
+    test_start: date
+    test_end: date
+    sma_period: int
+    train_metrics: BacktestMetrics
+    test_metrics: BacktestMetrics
+
+
+class WalkForwardResponse(BaseModel):
+    """
+    Out-of-sample result: the test windows' equity curves stitched
+    together (each starting from the previous one's final equity), their
+    trades, and metrics over the stitched curve.
+    """
+    symbol: str
+    rank_by: SweepRankBy
+    anchored: bool
+    folds: List[WalkForwardFold]
+    equity_curve: List[EquityPoint]
+    trades: List[Trade]
+    metrics: BacktestMetrics
+
+
+class AllocationMethod(str, Enum):
+    equal = "equal"
+    signal = "signal"
+
+
+class RebalanceFrequency(str, Enum):
+    on_change = "on_change"
+    daily = "daily"
+    weekly = "weekly"
+    monthly = "monthly"
+
+
+class PortfolioBacktestRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1)
+    start: date
+    end: date
+    sma_period: int = Field(20, ge=1)
+    initial_cash: float = Field(10_000.0, gt=0.0)
+    allocation: AllocationMethod = Field(
+        AllocationMethod.equal, description="Equal weights, or weights proportional to close / sma - 1"
+    )
+    rebalance: RebalanceFrequency = Field(
+        RebalanceFrequency.monthly,
+        description="When to reset weights besides whenever a position opens or closes",
+    )
+
+
+class PortfolioBacktestResponse(BaseModel):
+    """
+    One equity curve for the basket and each symbol's closed trades; pnl
+    includes the effect of rebalancing during the trade. `missing` lists
+    requested symbols without candles in range.
+    """
+    symbols: List[str]
+    missing: List[str]
+    allocation: AllocationMethod
+    rebalance: RebalanceFrequency
+    equity_curve: List[EquityPoint]
+    trades: Dict[str, List[Trade]]
+    metrics: BacktestMetrics
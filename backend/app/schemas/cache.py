@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    entries: int
+    resident_bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
@@ -1,6 +1,6 @@
 from datetime import date
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class IndicatorPoint(BaseModel):
@@ -12,9 +12,50 @@ class IndicatorPoint(BaseModel):
     bb_middle: Optional[float] = None
     bb_upper: Optional[float] = None
     bb_lower: Optional[float] = None
+    macd: Optional[float] = None
+    macd_signal: Optional[float] = None
+    macd_hist: Optional[float] = None
 
 
 class IndicatorsResponse(BaseModel):
     symbol: str
     points: List[IndicatorPoint]
 
+
+class IndicatorsColumnar(BaseModel):
+    """
+    format=columnar shape of IndicatorsResponse: one array per field,
+    aligned with `dates`. Indicators that weren't requested are omitted.
+    """
+    symbol: str
+    dates: List[date]
+    close: List[float]
+    sma: Optional[List[Optional[float]]] = None
+    ema: Optional[List[Optional[float]]] = None
+    rsi: Optional[List[Optional[float]]] = None
+    bb_middle: Optional[List[Optional[float]]] = None
+    bb_upper: Optional[List[Optional[float]]] = None
+    bb_lower: Optional[List[Optional[float]]] = None
+    macd: Optional[List[Optional[float]]] = None
+    macd_signal: Optional[List[Optional[float]]] = None
+    macd_hist: Optional[List[Optional[float]]] = None
+
+
+class IndicatorMatrixResponse(BaseModel):
+    """
+    Columnar indicator output: every list in `columns` is aligned with
+    `dates` and `close`, with None during an indicator's warm-up.
+    """
+    symbol: str
+    dates: List[date]
+    close: List[float]
+    columns: Dict[str, List[Optional[float]]]
+
+
+class LatestIndicatorsResponse(BaseModel):
+    symbol: str
+    as_of: date
+    close: float
+    sma: Optional[float] = None
+    ema: Optional[float] = None
+    rsi: Optional[float] = None
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -18,6 +18,19 @@ class CandleDTO(BaseModel):
         orm_mode = True
 
 
+class CandlesColumnar(BaseModel):
+    """
+    format=columnar shape of a candle list: one array per field.
+    """
+    symbol: str
+    dates: List[date]
+    open: List[float]
+    high: List[float]
+    low: List[float]
+    close: List[float]
+    volume: List[Optional[int]]
+
+
 class SymbolSearchResult(BaseModel):
     ticker: str
     name: Optional[str] = None
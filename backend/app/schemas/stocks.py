@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from datetime import date
+from typing import List
+
+from pydantic import BaseModel, Field
 
 
 class IngestResponse(BaseModel):
@@ -6,3 +9,20 @@ class IngestResponse(BaseModel):
     inserted: int
     skipped: int
     total_seen: int
+
+
+class BatchIngestRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=1000)
+    start: date
+    end: date
+    incremental: bool = True
+
+
+class IngestFailure(BaseModel):
+    symbol: str
+    error: str
+
+
+class BatchIngestResponse(BaseModel):
+    results: List[IngestResponse]
+    failed: List[IngestFailure]
@@ -1,23 +1,78 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import List
+from typing import Optional, Sequence
 
 from sqlalchemy.orm import Session
 
-from app.db.models.stock import Candle, Symbol
-from app.schemas.backtest import BacktestResult
-from app.schemas.stock import CandleDTO
-from app.services.backtesting.engine import CandlePoint, run_long_only_all_in_out
+from app.schemas.backtest import (
+    AllocationMethod,
+    BacktestColumnar,
+    BacktestResult,
+    BacktestSweepResponse,
+    EquityColumns,
+    MonteCarloMethod,
+    PortfolioBacktestResponse,
+    RebalanceFrequency,
+    SweepRankBy,
+    SweepResult,
+    TradeColumns,
+    WalkForwardResponse,
+)
+from app.services.backtesting.engine import run_long_only_vectorized
 from app.services.backtesting.metrics import compute_metrics
-from app.services.indicators.sma import compute_sma
-from app.services.strategies.sma_threshold import generate_sma_threshold_signals
+from app.services.backtesting.monte_carlo import run_monte_carlo
+from app.services.backtesting.portfolio import run_portfolio
+from app.services.backtesting.sweep import rank_sweep, run_sma_threshold_sweep
+from app.services.backtesting.walk_forward import run_sma_threshold_walk_forward
+from app.services.stocks.candle_cache import get_candles
+from app.services.stocks.candle_loader import symbol_exists
+from app.services.stocks.candle_series import CandleSeries
+from app.services.stocks.price_matrix import load_price_matrix
+from app.services.strategies.sma_threshold import (
+    REASONS,
+    sma_threshold_signal_arrays,
+    sma_threshold_signal_matrix,
+)
+
+
+def to_columnar(result: BacktestResult) -> BacktestColumnar:
+    """
+    Reshape a result into one array per equity/trade field.
+    """
+    curve = result.equity_curve
+    trades = result.trades
+    return BacktestColumnar.model_construct(
+        equity_curve=EquityColumns.model_construct(
+            dates=[p.date for p in curve],
+            equity=[p.equity for p in curve],
+        ),
+        trades=TradeColumns.model_construct(
+            entry_date=[t.entry_date for t in trades],
+            exit_date=[t.exit_date for t in trades],
+            entry_price=[t.entry_price for t in trades],
+            exit_price=[t.exit_price for t in trades],
+            pnl=[t.pnl for t in trades],
+            return_pct=[t.return_pct for t in trades],
+            reason=[t.reason for t in trades],
+        ),
+        metrics=result.metrics,
+        monte_carlo=result.monte_carlo,
+    )
 
 
 class BacktestService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _load_closes(self, ticker: str, start: date, end: date) -> CandleSeries:
+        series = get_candles(self.db, ticker, start, end, ("close",))
+        if not series:
+            if not symbol_exists(self.db, ticker):
+                raise ValueError(f"Symbol not found in DB: {ticker}. Ingest it first.")
+            raise ValueError(f"No candles available for {ticker} in range {start}..{end}")
+        return series
+
     def run_sma_threshold_backtest(
         self,
         *,
@@ -26,7 +81,16 @@ class BacktestService:
         end: date,
         sma_period: int = 20,
         initial_cash: float = 10_000.0,
+        monte_carlo: Optional[MonteCarloMethod] = None,
+        mc_resamples: int = 1000,
+        mc_block_size: int = 20,
+        mc_seed: Optional[int] = None,
     ) -> BacktestResult:
+        """
+        With `monte_carlo` set, the result also carries metric
+        distributions over `mc_resamples` resampled paths (see
+        run_monte_carlo).
+        """
         if sma_period <= 0:
             raise ValueError("sma_period must be > 0")
         if start > end:
@@ -36,48 +100,158 @@ class BacktestService:
 
         ticker = symbol.strip().upper()
 
-        sym = self.db.query(Symbol).filter(Symbol.ticker == ticker).one_or_none()
-        if sym is None:
-            raise ValueError(f"Symbol not found in DB: {ticker}. Ingest it first.")
-
-        rows: List[Candle] = (
-            self.db.query(Candle)
-            .filter(Candle.symbol_id == sym.id)
-            .filter(Candle.date >= start)
-            .filter(Candle.date <= end)
-            .order_by(Candle.date.asc())
-            .all()
+        series = self._load_closes(ticker, start, end)
+
+        signals, reasons = sma_threshold_signal_arrays(series, sma_period)
+
+        run = run_long_only_vectorized(
+            series,
+            signals,
+            initial_cash=initial_cash,
+            reasons=reasons,
         )
-        if not rows:
-            raise ValueError(f"No candles available for {ticker} in range {start}..{end}")
+        trades = run.trades()
+
+        metrics = compute_metrics(equity_curve=run.equity, trades=trades)
 
-        candle_dtos: List[CandleDTO] = [
-            CandleDTO(
-                date=r.date,
-                open=r.open,
-                high=r.high,
-                low=r.low,
-                close=r.close,
-                volume=r.volume,
+        summary = None
+        if monte_carlo is not None:
+            summary = run_monte_carlo(
+                monte_carlo,
+                equity=run.equity,
+                trade_returns=run.return_pct,
+                years=(series.dates[-1] - series.dates[0]).item().days / 365.25,
+                resamples=mc_resamples,
+                block_size=mc_block_size,
+                seed=mc_seed,
             )
-            for r in rows
-        ]
 
-        sma = compute_sma(candle_dtos, period=sma_period)
+        return BacktestResult(
+            equity_curve=run.equity_points(),
+            trades=trades,
+            metrics=metrics,
+            monte_carlo=summary,
+        )
+
+    def run_sma_threshold_sweep(
+        self,
+        *,
+        symbol: str,
+        start: date,
+        end: date,
+        sma_periods: Sequence[int],
+        initial_cashes: Sequence[float] = (10_000.0,),
+        rank_by: SweepRankBy = SweepRankBy.sharpe_ratio,
+    ) -> BacktestSweepResponse:
+        """
+        The SMA threshold backtest for every (sma_period, initial_cash)
+        combination, over candles loaded once.
+        """
+        if not sma_periods or min(sma_periods) <= 0:
+            raise ValueError("sma_periods must be non-empty and > 0")
+        if not initial_cashes or min(initial_cashes) <= 0:
+            raise ValueError("initial_cash values must be non-empty and > 0")
+        if start > end:
+            raise ValueError("start must be <= end")
+
+        ticker = symbol.strip().upper()
+        series = self._load_closes(ticker, start, end)
 
-        dates = [c.date for c in candle_dtos]
-        closes = [float(c.close) for c in candle_dtos]
+        rows = rank_sweep(run_sma_threshold_sweep(series, sma_periods, initial_cashes), rank_by)
+        return BacktestSweepResponse(
+            symbol=ticker,
+            rank_by=rank_by,
+            results=[SweepResult(sma_period=p, initial_cash=c, metrics=m) for p, c, m in rows],
+        )
 
-        signals = generate_sma_threshold_signals(dates=dates, closes=closes, sma=sma)
+    def run_sma_threshold_walk_forward(
+        self,
+        *,
+        symbol: str,
+        start: date,
+        end: date,
+        sma_periods: Sequence[int],
+        train_size: int,
+        test_size: int,
+        anchored: bool = False,
+        rank_by: SweepRankBy = SweepRankBy.sharpe_ratio,
+        initial_cash: float = 10_000.0,
+    ) -> WalkForwardResponse:
+        """
+        Walk-forward analysis over the candles in [start, end]; windows are
+        counted in candles.
+        """
+        if start > end:
+            raise ValueError("start must be <= end")
 
-        candle_points = [CandlePoint(date=r.date, close=float(r.close)) for r in rows]
+        ticker = symbol.strip().upper()
+        series = self._load_closes(ticker, start, end)
 
-        equity_curve, trades = run_long_only_all_in_out(
-            candles=candle_points,
-            signals=signals,
+        folds, equity_curve, trades, metrics = run_sma_threshold_walk_forward(
+            series,
+            sma_periods,
+            train_size=train_size,
+            test_size=test_size,
+            anchored=anchored,
+            rank_by=rank_by,
             initial_cash=initial_cash,
         )
+        return WalkForwardResponse(
+            symbol=ticker,
+            rank_by=rank_by,
+            anchored=anchored,
+            folds=folds,
+            equity_curve=equity_curve,
+            trades=trades,
+            metrics=metrics,
+        )
+
+    def run_sma_threshold_portfolio(
+        self,
+        *,
+        symbols: Sequence[str],
+        start: date,
+        end: date,
+        sma_period: int = 20,
+        initial_cash: float = 10_000.0,
+        allocation: AllocationMethod = AllocationMethod.equal,
+        rebalance: RebalanceFrequency = RebalanceFrequency.monthly,
+    ) -> PortfolioBacktestResponse:
+        """
+        The SMA threshold strategy on each symbol of a basket, traded as one
+        portfolio (see run_portfolio). Candles of every symbol are loaded in
+        one query; symbols without any in range are reported as missing.
+        """
+        if sma_period <= 0:
+            raise ValueError("sma_period must be > 0")
+        if start > end:
+            raise ValueError("start must be <= end")
+        if initial_cash <= 0:
+            raise ValueError("initial_cash must be > 0")
+
+        tickers = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols))
+        prices = load_price_matrix(self.db, tickers, start, end)
+        if not prices.tickers:
+            raise ValueError(f"No candles available for any of the symbols in range {start}..{end}")
 
-        metrics = compute_metrics(equity_curve=equity_curve, trades=trades)
+        signals, strength = sma_threshold_signal_matrix(prices.close, sma_period)
+        run = run_portfolio(
+            prices,
+            signals,
+            strength=strength,
+            allocation=allocation,
+            rebalance=rebalance,
+            initial_cash=initial_cash,
+            reasons=REASONS,
+        )
 
-        return BacktestResult(equity_curve=equity_curve, trades=trades, metrics=metrics)
+        found = set(prices.tickers)
+        return PortfolioBacktestResponse(
+            symbols=list(prices.tickers),
+            missing=[ticker for ticker in tickers if ticker not in found],
+            allocation=allocation,
+            rebalance=rebalance,
+            equity_curve=run.equity_points(),
+            trades=run.trades(),
+            metrics=compute_metrics(equity_curve=run.equity, trades=run.pnl),
+        )
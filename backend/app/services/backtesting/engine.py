@@ -2,10 +2,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from app.schemas.backtest import EquityPoint, Trade
 from app.schemas.strategy import SignalPoint
+from app.services.stocks.candle_series import CandleSeries
 
 
 @dataclass(frozen=True)
@@ -21,23 +24,33 @@ def _signal_map(signals: Sequence[SignalPoint]) -> Dict[date, SignalPoint]:
     return m
 
 
-def _validate_candles(candles: Sequence[CandlePoint]) -> None:
-    if not candles:
+def _candle_columns(candles: Union[CandleSeries, Sequence[CandlePoint]]) -> Tuple[List[date], List[float]]:
+    """
+    (dates, closes) as Python lists from a CandleSeries or CandlePoints.
+    """
+    if isinstance(candles, CandleSeries):
+        return candles.dates.tolist(), candles.close.tolist()
+    for c in candles:
+        if c.close is None:
+            raise ValueError("candle.close cannot be None")
+    return [c.date for c in candles], [float(c.close) for c in candles]
+
+
+def _validate_candles(dates: Sequence[date], closes: Sequence[float]) -> None:
+    if not dates:
         raise ValueError("candles must be non-empty")
 
-    for i in range(len(candles) - 1):
-        if candles[i].date > candles[i + 1].date:
+    for i in range(len(dates) - 1):
+        if dates[i] > dates[i + 1]:
             raise ValueError("candles must be sorted ascending by date")
 
-    for c in candles:
-        if c.close is None:
-            raise ValueError("candle.close cannot be None")
-        if float(c.close) <= 0.0:
+    for close in closes:
+        if close <= 0.0:
             raise ValueError("candle.close must be > 0")
 
 
 def run_long_only_all_in_out(
-    candles: Sequence[CandlePoint],
+    candles: Union[CandleSeries, Sequence[CandlePoint]],
     signals: Sequence[SignalPoint],
     *,
     initial_cash: float = 10_000.0,
@@ -50,11 +63,13 @@ def run_long_only_all_in_out(
 
     Trades execute at the signal day's close.
     Equity is marked-to-market each candle close.
+    Only dates and closes are read, from a CandleSeries or CandlePoints.
     """
     if initial_cash <= 0:
         raise ValueError("initial_cash must be > 0")
 
-    _validate_candles(candles)
+    dates, closes = _candle_columns(candles)
+    _validate_candles(dates, closes)
     sig_by_date = _signal_map(signals)
 
     cash = float(initial_cash)
@@ -69,14 +84,14 @@ def run_long_only_all_in_out(
     entry_reason: Optional[str] = None
     entry_shares: float = 0.0
 
-    for c in candles:
-        sp = sig_by_date.get(c.date)
+    for day, close in zip(dates, closes):
+        sp = sig_by_date.get(day)
         sig = int(sp.signal) if sp is not None else 0
 
         # BUY
         if sig == 1 and not in_trade:
-            entry_date = c.date
-            entry_price = float(c.close)
+            entry_date = day
+            entry_price = close
             entry_reason = sp.reason if sp is not None else None
 
             entry_shares = cash / entry_price
@@ -86,8 +101,8 @@ def run_long_only_all_in_out(
 
         # SELL
         elif sig == -1 and in_trade:
-            exit_date = c.date
-            exit_price = float(c.close)
+            exit_date = day
+            exit_price = close
 
             cash = shares * exit_price
 
@@ -118,7 +133,169 @@ def run_long_only_all_in_out(
             entry_price = None
             entry_reason = None
 
-        equity = cash + shares * float(c.close)
-        equity_curve.append(EquityPoint(date=c.date, equity=float(equity)))
+        equity = cash + shares * close
+        equity_curve.append(EquityPoint(date=day, equity=float(equity)))
 
     return equity_curve, trades
+
+
+@dataclass(frozen=True)
+class VectorizedBacktest:
+    """
+    Result of run_long_only_vectorized, as arrays. `position` and `equity`
+    have one entry per candle; the trade arrays one per closed round trip,
+    with entry/exit as candle indices.
+    """
+    dates: np.ndarray
+    position: np.ndarray
+    equity: np.ndarray
+    entry_index: np.ndarray
+    exit_index: np.ndarray
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    pnl: np.ndarray
+    return_pct: np.ndarray
+    reason: List[Optional[str]]
+
+    def equity_points(self) -> List[EquityPoint]:
+        return [
+            EquityPoint(date=day, equity=equity)
+            for day, equity in zip(self.dates.tolist(), self.equity.tolist())
+        ]
+
+    def trades(self) -> List[Trade]:
+        dates = self.dates
+        return [
+            Trade(
+                entry_date=entry_date,
+                exit_date=exit_date,
+                entry_price=entry_price,
+                exit_price=exit_price,
+                pnl=pnl,
+                return_pct=return_pct,
+                reason=reason,
+            )
+            for entry_date, exit_date, entry_price, exit_price, pnl, return_pct, reason in zip(
+                dates[self.entry_index].tolist(),
+                dates[self.exit_index].tolist(),
+                self.entry_price.tolist(),
+                self.exit_price.tolist(),
+                self.pnl.tolist(),
+                self.return_pct.tolist(),
+                self.reason,
+            )
+        ]
+
+
+def signal_array(dates: np.ndarray, signals: Sequence[SignalPoint]) -> Tuple[np.ndarray, Dict[int, Optional[str]]]:
+    """
+    Dense int8 signals aligned with `dates` (0 where no signal), and each
+    signal's reason keyed by candle index, for run_long_only_vectorized.
+    Like the loop engine, signals on dates without a candle are dropped and
+    the last signal for a date wins.
+    """
+    dense = np.zeros(len(dates), dtype=np.int8)
+    reasons: Dict[int, Optional[str]] = {}
+    if not signals or not len(dates):
+        return dense, reasons
+    days = np.array([s.date for s in signals], dtype="datetime64[D]")
+    index = np.minimum(np.searchsorted(dates, days), len(dates) - 1)
+    for i, s, found in zip(index.tolist(), signals, (dates[index] == days).tolist()):
+        if found:
+            sig = int(s.signal)
+            # Anything but BUY/SELL is a hold
+            dense[i] = sig if sig in (1, -1) else 0
+            reasons[i] = s.reason
+    return dense, reasons
+
+
+def run_long_only_vectorized(
+    candles: CandleSeries,
+    signals: np.ndarray,
+    *,
+    initial_cash: float = 10_000.0,
+    reasons: Optional[Mapping[int, Optional[str]]] = None,
+) -> VectorizedBacktest:
+    """
+    Array form of run_long_only_all_in_out, with the same rules and
+    bit-identical results. `signals` holds one int8 per candle (1 BUY, -1
+    SELL, anything else HOLD); `reasons` optionally maps candle index to
+    the reason of its signal (see signal_array).
+
+    Trades are found from where the BUY/SELL sequence switches, the
+    position is their cumulative sum and equity is filled in per stretch
+    between trades. Only the cash carried from trade to trade is compounded
+    in a Python loop (one step per trade, in the loop engine's order);
+    candles are never visited in Python.
+    """
+    if initial_cash <= 0:
+        raise ValueError("initial_cash must be > 0")
+
+    dates = candles.dates
+    closes = candles.close
+    n = len(closes)
+    if n == 0:
+        raise ValueError("candles must be non-empty")
+    if n > 1 and bool(np.any(dates[1:] < dates[:-1])):
+        raise ValueError("candles must be sorted ascending by date")
+    if bool(np.any(closes <= 0.0)):
+        raise ValueError("candle.close must be > 0")
+    signals = np.asarray(signals)
+    if len(signals) != n:
+        raise ValueError("signals must have one entry per candle")
+
+    # A BUY while long or a SELL while flat changes nothing, so trades
+    # start and end where the BUY/SELL sequence switches, starting flat
+    marked = np.flatnonzero((signals == 1) | (signals == -1))
+    buys = signals[marked] == 1
+    turns = marked[buys != np.concatenate(([False], buys[:-1]))]
+    entry_index = turns[0::2]
+    exit_index = turns[1::2]
+    closed = len(exit_index)
+
+    entry_price = closes[entry_index]
+    exit_price = closes[exit_index]
+    cash = float(initial_cash)
+    shares: List[float] = []
+    cash_after: List[float] = [cash]
+    pnl: List[float] = []
+    for price, exit_ in zip(entry_price.tolist(), exit_price.tolist() + [None]):
+        entry_shares = cash / price
+        shares.append(entry_shares)
+        if exit_ is not None:
+            cash = entry_shares * exit_
+            cash_after.append(cash)
+            pnl.append(cash - entry_shares * price)
+
+    # Between turns equity is flat at the cash after the last exit, or
+    # (cash being 0.0) the open trade's shares marked at each close
+    levels = np.empty(len(turns) + 1)
+    levels[0::2] = cash_after
+    levels[1::2] = shares
+    equity = np.repeat(levels, np.diff(turns, prepend=0, append=n))
+    step = np.zeros(n, dtype=np.int8)
+    step[entry_index] = 1
+    step[exit_index] = -1
+    position = np.cumsum(step, dtype=np.int8)
+    np.multiply(equity, closes, out=equity, where=position == 1)
+
+    if reasons:
+        reason = [
+            reasons.get(exit_) or reasons.get(entry)
+            for entry, exit_ in zip(entry_index.tolist(), exit_index.tolist())
+        ]
+    else:
+        reason = [None] * closed
+
+    return VectorizedBacktest(
+        dates=dates,
+        position=position,
+        equity=equity,
+        entry_index=entry_index[:closed],
+        exit_index=exit_index,
+        entry_price=entry_price[:closed],
+        exit_price=exit_price,
+        pnl=np.asarray(pnl, dtype=np.float64),
+        return_pct=exit_price / entry_price[:closed] - 1.0,
+        reason=reason,
+    )
@@ -1,53 +1,61 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Sequence, Union
+
+import numpy as np
 
 from app.schemas.backtest import BacktestMetrics, EquityPoint, Trade
 
+# An equity curve as EquityPoints or as an array of equity values
+EquityCurve = Union[Sequence[EquityPoint], np.ndarray]
+# Closed trades as Trades or as an array of their pnl
+Trades = Union[Sequence[Trade], np.ndarray]
+
+
+def _equity_values(equity_curve: EquityCurve) -> np.ndarray:
+    if isinstance(equity_curve, np.ndarray):
+        return equity_curve.astype(np.float64, copy=False)
+    return np.fromiter((p.equity for p in equity_curve), dtype=np.float64, count=len(equity_curve))
+
 
-def _total_return_pct(equity_curve: List[EquityPoint]) -> float:
-    if not equity_curve:
+def _total_return_pct(equity: np.ndarray) -> float:
+    if len(equity) == 0:
         return 0.0
-    start = float(equity_curve[0].equity)
-    end = float(equity_curve[-1].equity)
+    start = float(equity[0])
+    end = float(equity[-1])
     if start <= 0.0:
         return 0.0
     return ((end / start) - 1.0) * 100.0
 
 
-def _max_drawdown_pct(equity_curve: List[EquityPoint]) -> float:
-    if not equity_curve:
+def _max_drawdown_pct(equity: np.ndarray) -> float:
+    if len(equity) == 0:
         return 0.0
 
-    peak = float(equity_curve[0].equity)
-    mdd = 0.0
-
-    for p in equity_curve:
-        eq = float(p.equity)
-        if eq > peak:
-            peak = eq
-            continue
-        if peak > 0.0:
-            dd = (peak - eq) / peak
-            if dd > mdd:
-                mdd = dd
-
-    return mdd * 100.0
+    peak = np.maximum.accumulate(equity)
+    positive = peak > 0.0
+    if not positive.any():
+        return 0.0
+    drawdown = (peak[positive] - equity[positive]) / peak[positive]
+    return max(float(drawdown.max()), 0.0) * 100.0
 
 
-def _win_rate_pct(trades: List[Trade]) -> float:
-    if not trades:
+def _win_rate_pct(trades: Trades) -> float:
+    if len(trades) == 0:
         return 0.0
-    wins = sum(1 for t in trades if float(t.pnl) > 0.0)
+    if isinstance(trades, np.ndarray):
+        wins = int(np.count_nonzero(trades > 0.0))
+    else:
+        wins = sum(1 for t in trades if float(t.pnl) > 0.0)
     return (wins / len(trades)) * 100.0
 
 
-def _sharpe_ratio(equity_curve: List[EquityPoint], risk_free_rate: float = 0.0) -> float:
+def _sharpe_ratio(equity: np.ndarray, risk_free_rate: float = 0.0) -> float:
     """
     Calculate annualized Sharpe ratio from equity curve.
     
     Args:
-        equity_curve: List of equity points over time
+        equity: Equity values over time
         risk_free_rate: Annual risk-free rate (default 0.0 for Increment 1)
     
     Returns:
@@ -58,30 +66,25 @@ def _sharpe_ratio(equity_curve: List[EquityPoint], risk_free_rate: float = 0.0)
         
     Assumes daily returns and 252 trading days per year for annualization.
     """
-    if len(equity_curve) < 2:
+    if len(equity) < 2:
         return 0.0
     
-    # Calculate daily returns
-    returns: List[float] = []
-    for i in range(1, len(equity_curve)):
-        prev_equity = float(equity_curve[i - 1].equity)
-        curr_equity = float(equity_curve[i].equity)
-        
-        if prev_equity <= 0.0:
-            continue
-            
-        daily_return = (curr_equity - prev_equity) / prev_equity
-        returns.append(daily_return)
+    # Daily returns, skipping days that start from non-positive equity
+    prev = equity[:-1]
+    curr = equity[1:]
+    valid = prev > 0.0
+    returns = (curr[valid] - prev[valid]) / prev[valid]
     
-    if not returns:
+    if len(returns) == 0:
         return 0.0
     
-    # Calculate mean and standard deviation
+    # Calculate mean and standard deviation (summed in order, as the
+    # per-point loop did, so results don't shift in the last digits)
     n = len(returns)
-    mean_return = sum(returns) / n
+    mean_return = sum(returns.tolist()) / n
     
     # Calculate variance
-    variance = sum((r - mean_return) ** 2 for r in returns) / n
+    variance = sum(((returns - mean_return) ** 2).tolist()) / n
     std_dev = variance ** 0.5
     
     # Handle zero volatility
@@ -100,11 +103,12 @@ def _sharpe_ratio(equity_curve: List[EquityPoint], risk_free_rate: float = 0.0)
     return float(sharpe)
 
 
-def compute_metrics(*, equity_curve: List[EquityPoint], trades: List[Trade]) -> BacktestMetrics:
+def compute_metrics(*, equity_curve: EquityCurve, trades: Trades) -> BacktestMetrics:
+    equity = _equity_values(equity_curve)
     return BacktestMetrics(
-        total_return_pct=float(_total_return_pct(equity_curve)),
-        max_drawdown_pct=float(_max_drawdown_pct(equity_curve)),
+        total_return_pct=float(_total_return_pct(equity)),
+        max_drawdown_pct=float(_max_drawdown_pct(equity)),
         win_rate_pct=float(_win_rate_pct(trades)),
         num_trades=len(trades),
-        sharpe_ratio=float(_sharpe_ratio(equity_curve)),
+        sharpe_ratio=float(_sharpe_ratio(equity)),
     )
@@ -0,0 +1,165 @@
+"""
+Monte Carlo resampling of a finished backtest.
+
+Two ways to draw alternative histories from one backtest:
+  - trades:  closed-trade returns drawn with replacement, compounded in
+             order (equity, and so drawdown, is seen at trade exits)
+  - returns: a moving-block bootstrap of the daily equity returns, blocks
+             of block_size days keeping short-range autocorrelation
+
+Paths are never materialised day by day. Every possible block (each start
+position, plus the shorter tail block) is summarised once: its log growth,
+its highest and lowest point relative to its start, its internal drawdown,
+and its sums of r and r^2. A path is then a row of block draws in a 2-D
+(resamples x blocks) array, and cumulative operations along the rows give
+each path's total return, exact max drawdown and Sharpe ratio.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.schemas.backtest import MetricDistribution, MonteCarloMethod, MonteCarloSummary
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Paths per batch are capped so each (paths x blocks) temporary stays ~8 MB
+_BATCH_ELEMENTS = 1 << 20
+
+# Block statistics, each with one entry per start position
+BlockStats = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _block_stats(steps: np.ndarray, length: int) -> BlockStats:
+    """
+    For every block steps[s:s + length]: (log growth, highest and lowest
+    cumulative log growth, internal max drawdown in log terms, sum of
+    steps, sum of squared steps).
+    """
+    windows = sliding_window_view(steps, length)
+    growth = np.cumsum(sliding_window_view(np.log1p(steps), length), axis=1)
+    # Highs count the block's starting level (0) too
+    high = np.maximum.accumulate(np.maximum(growth, 0.0), axis=1)
+    return (
+        growth[:, -1],
+        high[:, -1],
+        growth.min(axis=1),
+        (high - growth).max(axis=1),
+        windows.sum(axis=1),
+        np.square(windows).sum(axis=1),
+    )
+
+
+def _paths(stats, starts) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # One column per block, the tail block last
+    if len(stats) == 1:
+        growth, high, low, inner, total, squares = (column[starts[0]] for column in stats[0])
+    else:
+        growth, high, low, inner, total, squares = (
+            np.concatenate([stat[k][draw] for stat, draw in zip(stats, starts)], axis=1) for k in range(6)
+        )
+
+    # Path level before each block and the running peak up to that point
+    level_after = np.cumsum(growth, axis=1)
+    level = level_after - growth
+    peak_after = np.maximum.accumulate(np.maximum(level + high, 0.0), axis=1)
+    peak = np.concatenate([np.zeros((len(growth), 1)), peak_after[:, :-1]], axis=1)
+
+    # Within a block the deepest fall is from the earlier peak to the
+    # block's low, or one that starts and ends inside the block
+    drawdown = np.maximum(peak - level - low, inner).max(axis=1)
+    return level_after[:, -1], drawdown, total.sum(axis=1), squares.sum(axis=1)
+
+
+def _resample(
+    steps: np.ndarray, block_size: int, resamples: int, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per path: (log growth, max drawdown in log terms, sum of steps, sum of
+    squared steps) over len(steps) resampled steps.
+    """
+    n = len(steps)
+    full, tail = divmod(n, block_size)
+    stats = []
+    if full:
+        stats.append(_block_stats(steps, block_size))
+    if tail:
+        stats.append(_block_stats(steps, tail))
+
+    out = np.empty((4, resamples))
+    batch = max(_BATCH_ELEMENTS // (full + 1), 1)
+    for first in range(0, resamples, batch):
+        rows = min(batch, resamples - first)
+        starts = []
+        if full:
+            starts.append(rng.integers(0, n - block_size + 1, size=(rows, full)))
+        if tail:
+            starts.append(rng.integers(0, n - tail + 1, size=(rows, 1)))
+        out[:, first:first + rows] = _paths(stats, starts)
+    return out[0], out[1], out[2], out[3]
+
+
+def _distribution(values: np.ndarray) -> MetricDistribution:
+    percentiles = np.percentile(values, PERCENTILES).tolist()
+    return MetricDistribution(
+        mean=float(values.mean()),
+        std=float(values.std()),
+        **{f"p{p}": v for p, v in zip(PERCENTILES, percentiles)},
+    )
+
+
+def run_monte_carlo(
+    method: MonteCarloMethod,
+    *,
+    equity: np.ndarray,
+    trade_returns: np.ndarray,
+    years: float,
+    resamples: int = 1000,
+    block_size: int = 20,
+    seed: Optional[int] = None,
+) -> MonteCarloSummary:
+    """
+    Resample a backtest's trades (`trade_returns`, as fractions) or daily
+    returns (from `equity`) and summarise total return, max drawdown and
+    Sharpe ratio across paths. Sharpe is annualised like compute_metrics
+    for daily returns, and by trades per year (over `years`) for trades.
+    """
+    if resamples < 1:
+        raise ValueError("resamples must be >= 1")
+    if block_size < 1:
+        raise ValueError("block_size must be >= 1")
+
+    if method == MonteCarloMethod.trades:
+        steps = np.asarray(trade_returns, dtype=np.float64)
+        block_size = 1
+        per_year = len(steps) / years if years > 0 else 0.0
+    else:
+        equity = np.asarray(equity, dtype=np.float64)
+        prev = equity[:-1]
+        valid = prev > 0.0
+        steps = equity[1:][valid] / prev[valid] - 1.0
+        block_size = min(block_size, max(len(steps), 1))
+        per_year = float(TRADING_DAYS_PER_YEAR)
+
+    n = len(steps)
+    if n == 0:
+        zeros = np.zeros(resamples)
+        growth, drawdown, mean, std = zeros, zeros, zeros, zeros
+    else:
+        rng = np.random.default_rng(seed)
+        growth, drawdown, total, squares = _resample(steps, block_size, resamples, rng)
+        mean = total / n
+        std = np.sqrt(np.maximum(squares / n - mean * mean, 0.0))
+
+    sharpe = np.divide(mean, std, out=np.zeros_like(mean), where=std > 0.0) * per_year ** 0.5
+    distributions: Dict[str, MetricDistribution] = {
+        "total_return_pct": _distribution(np.expm1(growth) * 100.0),
+        "max_drawdown_pct": _distribution(-np.expm1(-drawdown) * 100.0),
+        "sharpe_ratio": _distribution(sharpe),
+    }
+    return MonteCarloSummary(method=method, resamples=resamples, block_size=block_size, **distributions)
@@ -0,0 +1,240 @@
+"""
+Long-only portfolio backtests over a basket of symbols.
+
+The engine works on a PriceMatrix (dates x symbols, NaN on missing bars)
+and a matching matrix of int8 signals. Each symbol is long from a BUY to
+the next SELL. On every rebalance date the equity is split across the
+symbols that are long, equally or in proportion to a strength matrix
+(signal-weighted). Rebalance dates are the days any position opens or
+closes, plus the first trading day of each period of `rebalance`. Share
+counts stay fixed in between, so weights drift with prices.
+
+Missing bars:
+  - a symbol has no position before its first candle
+  - held symbols are valued at their last close on a missing bar; they
+    can't trade then, so a rebalance keeps their shares and splits the
+    rest of the equity among the others
+  - a symbol whose candles stop before the last date is sold at its last
+    close
+
+The Python loop runs once per rebalance date, with vector operations
+across symbols; equity, per-symbol trades and their pnl are then computed
+over the whole matrix at once.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.schemas.backtest import AllocationMethod, EquityPoint, RebalanceFrequency, Trade
+from app.services.stocks.price_matrix import PriceMatrix
+
+# Exit reason of a position closed because its symbol has no later candles
+DATA_END_REASON = "no later candles"
+
+
+@dataclass(frozen=True)
+class PortfolioBacktest:
+    """
+    Result of run_portfolio, as arrays. `equity` has one entry per date;
+    the trade arrays one per closed round trip, ordered by symbol (an
+    index into `tickers`) then entry, with entry/exit as date indices.
+    """
+    dates: np.ndarray
+    tickers: Tuple[str, ...]
+    equity: np.ndarray
+    symbol: np.ndarray
+    entry_index: np.ndarray
+    exit_index: np.ndarray
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    pnl: np.ndarray
+    return_pct: np.ndarray
+    reason: List[Optional[str]]
+
+    def equity_points(self) -> List[EquityPoint]:
+        return [
+            EquityPoint(date=day, equity=equity)
+            for day, equity in zip(self.dates.tolist(), self.equity.tolist())
+        ]
+
+    def trades(self) -> Dict[str, List[Trade]]:
+        """
+        Closed trades by ticker; every ticker has an entry. Built without
+        validation, from the engine's own arrays (a large basket has
+        hundreds of thousands of trades).
+        """
+        dates = self.dates
+        trades = [
+            Trade.model_construct(
+                entry_date=entry_date,
+                exit_date=exit_date,
+                entry_price=entry_price,
+                exit_price=exit_price,
+                pnl=pnl,
+                return_pct=return_pct,
+                reason=reason,
+            )
+            for entry_date, exit_date, entry_price, exit_price, pnl, return_pct, reason in zip(
+                dates[self.entry_index].tolist(),
+                dates[self.exit_index].tolist(),
+                self.entry_price.tolist(),
+                self.exit_price.tolist(),
+                self.pnl.tolist(),
+                self.return_pct.tolist(),
+                self.reason,
+            )
+        ]
+        bounds = np.searchsorted(self.symbol, np.arange(len(self.tickers) + 1)).tolist()
+        return {ticker: trades[bounds[s]:bounds[s + 1]] for s, ticker in enumerate(self.tickers)}
+
+
+def rebalance_dates(dates: np.ndarray, rebalance: RebalanceFrequency) -> np.ndarray:
+    """
+    True on the first date of each period (and on the first date); all
+    False for on_change.
+    """
+    if rebalance == RebalanceFrequency.daily:
+        return np.ones(len(dates), dtype=bool)
+    if rebalance == RebalanceFrequency.on_change:
+        return np.zeros(len(dates), dtype=bool)
+    if rebalance == RebalanceFrequency.weekly:
+        # Monday-based weeks; 1970-01-01 was a Thursday
+        period = (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    else:
+        period = dates.astype("datetime64[M]").astype(np.int64)
+    return np.diff(period, prepend=period[:1] - 1) != 0
+
+
+def _long(signals: np.ndarray) -> np.ndarray:
+    """
+    True from each BUY up to (not including) the next SELL, per column.
+    """
+    rows = np.where((signals == 1) | (signals == -1), np.arange(len(signals))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(signals, rows, axis=0) == 1
+
+
+def run_portfolio(
+    prices: PriceMatrix,
+    signals: np.ndarray,
+    *,
+    strength: Optional[np.ndarray] = None,
+    allocation: AllocationMethod = AllocationMethod.equal,
+    rebalance: RebalanceFrequency = RebalanceFrequency.monthly,
+    initial_cash: float = 10_000.0,
+    reasons: Optional[Mapping[int, Optional[str]]] = None,
+) -> PortfolioBacktest:
+    """
+    Run the basket from `initial_cash`. `signals` is int8 shaped like
+    prices.close (1 BUY, -1 SELL, anything else HOLD) and may only be set
+    on candles; `strength` (same shape, needed for signal allocation)
+    weights the long symbols by its positive part, falling back to equal
+    weights if no long symbol has any. `reasons` optionally maps a signal
+    value to its reason, as generate_sma_threshold_signals gives them; a
+    trade takes its exit's reason.
+
+    Positions still open on the last date count in the equity curve but
+    not in the trades.
+    """
+    if initial_cash <= 0:
+        raise ValueError("initial_cash must be > 0")
+    close = prices.close
+    n, width = close.shape
+    if n == 0 or width == 0:
+        raise ValueError("prices must be non-empty")
+    if n > 1 and bool(np.any(prices.dates[1:] <= prices.dates[:-1])):
+        raise ValueError("dates must be sorted ascending and unique")
+    valid = prices.valid
+    if bool(np.any(close[valid] <= 0.0)):
+        raise ValueError("candle.close must be > 0")
+    signals = np.asarray(signals)
+    if signals.shape != close.shape:
+        raise ValueError("signals must have one entry per date and symbol")
+    if bool(np.any(signals[~valid] != 0)):
+        raise ValueError("signals must not be set on missing bars")
+    if allocation == AllocationMethod.signal:
+        if strength is None or strength.shape != close.shape:
+            raise ValueError("signal allocation needs a strength matrix shaped like the prices")
+    reasons = reasons or {}
+
+    # Sell on a symbol's last candle when no later ones follow
+    last = n - 1 - np.argmax(valid[::-1], axis=0)
+    ended = np.flatnonzero(last < n - 1)
+    forced = np.zeros(width, dtype=bool)
+    forced[ended] = signals[last[ended], ended] != -1
+    signals = signals.copy()
+    signals[last[ended], ended] = -1
+
+    long = _long(signals)
+    price = np.nan_to_num(prices.filled())
+
+    changed = np.ones(n, dtype=bool)
+    changed[1:] = np.any(long[1:] != long[:-1], axis=1)
+    events = np.flatnonzero(changed | rebalance_dates(prices.dates, rebalance))
+
+    shares = np.zeros(width)
+    cash = float(initial_cash)
+    held = np.empty((len(events), width))
+    cash_held = np.empty(len(events))
+    for k, t in enumerate(events.tolist()):
+        today = price[t]
+        value = shares * today
+        # Symbols without a candle today keep their shares
+        frozen = (shares > 0.0) & ~valid[t]
+        budget = cash + value.sum() - value[frozen].sum()
+        buy = long[t] & valid[t]
+        shares = np.where(frozen, shares, 0.0)
+        if buy.any():
+            weights = np.ones(int(buy.sum()))
+            if allocation == AllocationMethod.signal:
+                positive = np.maximum(strength[t, buy], 0.0)
+                if positive.sum() > 0.0:
+                    weights = positive
+            shares[buy] = budget * (weights / weights.sum()) / today[buy]
+            cash = 0.0
+        else:
+            cash = budget
+        held[k] = shares
+        cash_held[k] = cash
+
+    # Holdings and cash stay fixed from one rebalance date to the next
+    span = np.diff(events, append=n)
+    holdings = np.repeat(held, span, axis=0)
+    equity = np.repeat(cash_held, span) + np.einsum("ij,ij->i", holdings, price)
+
+    # Mark-to-market gains summed per symbol, so a trade's pnl is the
+    # difference between its exit and entry
+    gains = np.zeros((n, width))
+    np.multiply(holdings[:-1], np.diff(price, axis=0), out=gains[1:])
+    np.cumsum(gains, axis=0, out=gains)
+
+    step = np.diff(long.astype(np.int8), axis=0, prepend=0)
+    entry_symbol, entry_index = np.nonzero(step.T == 1)
+    symbol, exit_index = np.nonzero(step.T == -1)
+    # Drop the entry of each position still open at the end
+    last_entry = np.append(entry_symbol[1:] != entry_symbol[:-1], True)
+    closed = ~(last_entry & long[-1][entry_symbol])
+    entry_index = entry_index[closed]
+
+    entry_price = close[entry_index, symbol]
+    exit_price = close[exit_index, symbol]
+    at_end = forced[symbol] & (exit_index == last[symbol])
+    reason = [DATA_END_REASON if end else reasons.get(-1) for end in at_end.tolist()]
+
+    return PortfolioBacktest(
+        dates=prices.dates,
+        tickers=prices.tickers,
+        equity=equity,
+        symbol=symbol,
+        entry_index=entry_index,
+        exit_index=exit_index,
+        entry_price=entry_price,
+        exit_price=exit_price,
+        pnl=gains[exit_index, symbol] - gains[entry_index, symbol],
+        return_pct=exit_price / entry_price - 1.0,
+        reason=reason,
+    )
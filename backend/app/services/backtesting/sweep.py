@@ -0,0 +1,149 @@
+"""
+Parameter-sweep backtests.
+
+A sweep runs the SMA threshold backtest for every combination of a grid
+of parameters over one candle series. The series' dates and closes are
+copied once into shared memory (SharedArrays); a process-wide pool of
+workers (see sweep_workers, spawned on first use) attach to it by name,
+so a task carries only its parameters. Each worker computes the
+signals once per SMA period and runs the vectorized engine for every
+initial cash. The walk-forward runner uses the same pool.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas.backtest import BacktestMetrics, SweepRankBy
+from app.services.backtesting.engine import run_long_only_vectorized
+from app.services.backtesting.metrics import compute_metrics
+from app.services.indicators.kernels import sma_array
+from app.services.stocks.candle_series import CandleSeries
+from app.services.strategies.sma_threshold import sma_threshold_signal_array
+from app.utils.shared_arrays import SharedArrays, call_with_arrays
+
+# (sma_period, initial_cash, metrics) per evaluated combination
+SweepRow = Tuple[int, float, BacktestMetrics]
+
+# Tasks per worker, so that uneven work (long SMAs trade less) balances out
+_CHUNKS_PER_WORKER = 4
+
+# Pool size when BACKTEST_SWEEP_WORKERS is 0. Each server worker process
+# has its own pool, so one process per CPU would oversubscribe the machine.
+DEFAULT_SWEEP_WORKERS = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def sweep_workers() -> int:
+    """
+    BACKTEST_SWEEP_WORKERS, or the CPU count capped at
+    DEFAULT_SWEEP_WORKERS when it is 0.
+    """
+    if settings.BACKTEST_SWEEP_WORKERS > 0:
+        return settings.BACKTEST_SWEEP_WORKERS
+    return min(os.cpu_count() or 1, DEFAULT_SWEEP_WORKERS)
+
+
+def get_sweep_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    The process-wide sweep pool, or None when sweeps run in process (a
+    single worker). Workers are spawned rather than forked, since the
+    server process has threads.
+    """
+    global _pool
+    if _pool is None and sweep_workers() > 1:
+        _pool = ProcessPoolExecutor(sweep_workers(), mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_sweep_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _evaluate(arrays: Dict[str, np.ndarray], periods: Sequence[int], initial_cashes: Sequence[float]) -> List[SweepRow]:
+    series = CandleSeries("", arrays["dates"], close=arrays["close"])
+    rows: List[SweepRow] = []
+    for period in periods:
+        signals = sma_threshold_signal_array(series.close, sma_array(series.close, period))
+        for cash in initial_cashes:
+            run = run_long_only_vectorized(series, signals, initial_cash=cash)
+            rows.append((period, cash, compute_metrics(equity_curve=run.equity, trades=run.pnl)))
+    return rows
+
+
+def map_chunks(
+    fn: Callable[..., List[Any]], arrays: Dict[str, np.ndarray], items: Sequence[Any], *args: Any
+) -> List[Any]:
+    """
+    fn(arrays, chunk, *args) over interleaved chunks of `items`,
+    concatenated in chunk order. With a pool, `arrays` are shared with the
+    workers once rather than pickled per task; otherwise (or for a single
+    item) fn runs once, in process, over all of `items`.
+
+    Raises BrokenProcessPool if a worker dies (the routes answer 503); the
+    next call starts a fresh pool.
+    """
+    pool = get_sweep_pool()
+    if pool is None or len(items) < 2:
+        return fn(arrays, items, *args)
+
+    # Interleaved, so every task gets a mix of cheap and expensive items
+    chunks = min(len(items), sweep_workers() * _CHUNKS_PER_WORKER)
+    with SharedArrays(arrays) as shared:
+        try:
+            futures = [
+                pool.submit(call_with_arrays, shared.spec, fn, items[i::chunks], *args)
+                for i in range(chunks)
+            ]
+            return [out for future in futures for out in future.result()]
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool on the next call
+            shutdown_sweep_pool()
+            raise
+
+
+def run_sma_threshold_sweep(
+    series: CandleSeries,
+    sma_periods: Sequence[int],
+    initial_cashes: Sequence[float],
+) -> List[SweepRow]:
+    """
+    Metrics of the SMA threshold backtest for every (sma_period,
+    initial_cash) combination, in no particular order; see rank_sweep.
+    Results are identical whether or not the pool is used.
+    """
+    if len(series) == 0:
+        raise ValueError("candles must be non-empty")
+    if any(cash <= 0 for cash in initial_cashes):
+        raise ValueError("initial_cash must be > 0")
+    periods = sorted(set(sma_periods))
+    cashes = list(dict.fromkeys(initial_cashes))
+    arrays = {"dates": series.dates, "close": series.close}
+    return map_chunks(_evaluate, arrays, periods, cashes)
+
+
+def rank_sweep(rows: Sequence[SweepRow], rank_by: SweepRankBy) -> List[SweepRow]:
+    """
+    Best first by `rank_by` (lowest drawdown first), ties broken by period
+    then cash. A missing Sharpe ratio ranks last.
+    """
+    lowest_first = rank_by == SweepRankBy.max_drawdown_pct
+
+    def key(row: SweepRow):
+        value = getattr(row[2], rank_by.value)
+        if value is None:
+            return (1, 0.0, row[0], row[1])
+        return (0, value if lowest_first else -value, row[0], row[1])
+
+    return sorted(rows, key=key)
@@ -0,0 +1,171 @@
+"""
+Walk-forward analysis of the SMA threshold strategy.
+
+The candles are split into consecutive test windows, each preceded by a
+train window: the `train_size` candles before it (rolling) or every
+candle from the first (anchored). On each train window every candidate
+sma_period is backtested and the best by `rank_by` is then run on the
+test window, out of sample.
+
+SMAs are computed once over the full history and sliced per window, so no
+window loses candles to warm-up. Train windows are evaluated in parallel
+on the sweep pool, which gets the closes and SMAs through shared memory;
+the cheap test runs follow in order, each starting with the previous
+one's final equity.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.schemas.backtest import BacktestMetrics, EquityPoint, SweepRankBy, Trade, WalkForwardFold
+from app.services.backtesting.engine import VectorizedBacktest, run_long_only_vectorized
+from app.services.backtesting.metrics import compute_metrics
+from app.services.backtesting.sweep import map_chunks, rank_sweep
+from app.services.indicators.kernels import sma_array
+from app.services.stocks.candle_series import CandleSeries
+from app.services.strategies.sma_threshold import sma_threshold_reasons, sma_threshold_signal_array
+
+# Exit reason of a position still open when its test window ends
+WINDOW_END_REASON = "end of test window"
+
+# Upper bound on train backtests (folds x candidate periods) per run
+MAX_WALK_FORWARD_EVALUATIONS = 20_000
+
+# Upper bound on SMA values (candidate periods x candles) per run: the
+# float64 matrix is held once in process and once in shared memory
+MAX_WALK_FORWARD_SMA_VALUES = 4_000_000
+
+
+@dataclass(frozen=True)
+class Fold:
+    """
+    Candle index ranges [train_start, train_stop) and [test_start,
+    test_stop); the test window starts where the train window stops.
+    """
+    train_start: int
+    train_stop: int
+    test_stop: int
+
+    @property
+    def test_start(self) -> int:
+        return self.train_stop
+
+
+def make_folds(n: int, train_size: int, test_size: int, anchored: bool = False) -> List[Fold]:
+    """
+    Folds over `n` candles, test windows back to back from `train_size`
+    on; the last one is cut short at the end of the data.
+    """
+    if train_size < 2 or test_size < 1:
+        raise ValueError("train_size must be >= 2 and test_size >= 1")
+    if n <= train_size:
+        raise ValueError(f"Need more than train_size={train_size} candles, got {n}")
+    return [
+        Fold(0 if anchored else test_start - train_size, test_start, min(test_start + test_size, n))
+        for test_start in range(train_size, n, test_size)
+    ]
+
+
+def _run(
+    series: CandleSeries, sma: np.ndarray, start: int, stop: int, initial_cash: float, close_at_end: bool = False
+) -> VectorizedBacktest:
+    window = series.select(slice(start, stop))
+    signals = sma_threshold_signal_array(window.close, sma[start:stop])
+    if not close_at_end:
+        return run_long_only_vectorized(window, signals, initial_cash=initial_cash)
+    reasons = sma_threshold_reasons(signals)
+    # SELL on the last candle: a no-op when flat, else liquidates so the
+    # next window starts from cash
+    signals[-1] = -1
+    reasons[len(signals) - 1] = WINDOW_END_REASON
+    return run_long_only_vectorized(window, signals, initial_cash=initial_cash, reasons=reasons)
+
+
+def _select(
+    arrays: Dict[str, np.ndarray],
+    folds: Sequence[Tuple[int, Fold]],
+    periods: Sequence[int],
+    rank_by: SweepRankBy,
+    initial_cash: float,
+) -> List[Tuple[int, int, BacktestMetrics]]:
+    """
+    (fold number, best period, its train metrics) for each of `folds`.
+    """
+    series = CandleSeries("", arrays["dates"], close=arrays["close"])
+    out = []
+    for number, fold in folds:
+        rows = []
+        for period, sma in zip(periods, arrays["sma"]):
+            run = _run(series, sma, fold.train_start, fold.train_stop, initial_cash)
+            rows.append((period, initial_cash, compute_metrics(equity_curve=run.equity, trades=run.pnl)))
+        best_period, _, metrics = rank_sweep(rows, rank_by)[0]
+        out.append((number, best_period, metrics))
+    return out
+
+
+def run_sma_threshold_walk_forward(
+    series: CandleSeries,
+    sma_periods: Sequence[int],
+    *,
+    train_size: int,
+    test_size: int,
+    anchored: bool = False,
+    rank_by: SweepRankBy = SweepRankBy.sharpe_ratio,
+    initial_cash: float = 10_000.0,
+) -> Tuple[List[WalkForwardFold], List[EquityPoint], List[Trade], BacktestMetrics]:
+    """
+    Folds, stitched out-of-sample equity curve, out-of-sample trades and
+    their metrics. Train windows are scored starting from `initial_cash`;
+    a position open at the end of a test window is closed at its last
+    close.
+    """
+    if initial_cash <= 0:
+        raise ValueError("initial_cash must be > 0")
+    periods = sorted(set(sma_periods))
+    if not periods or periods[0] <= 0:
+        raise ValueError("sma_periods must be non-empty and > 0")
+    folds = make_folds(len(series), train_size, test_size, anchored)
+    if len(folds) * len(periods) > MAX_WALK_FORWARD_EVALUATIONS:
+        raise ValueError(
+            f"{len(folds)} folds x {len(periods)} periods exceeds {MAX_WALK_FORWARD_EVALUATIONS} train backtests"
+        )
+    if len(periods) * len(series) > MAX_WALK_FORWARD_SMA_VALUES:
+        raise ValueError(
+            f"{len(periods)} periods x {len(series)} candles exceeds {MAX_WALK_FORWARD_SMA_VALUES} SMA values"
+        )
+
+    sma = np.stack([sma_array(series.close, period) for period in periods])
+    arrays = {"dates": series.dates, "close": series.close, "sma": sma}
+    selected = sorted(map_chunks(_select, arrays, list(enumerate(folds)), periods, rank_by, initial_cash))
+
+    dates = series.dates
+    cash = float(initial_cash)
+    results: List[WalkForwardFold] = []
+    equity: List[np.ndarray] = []
+    trades: List[Trade] = []
+    for (_, period, train_metrics), fold in zip(selected, folds):
+        run = _run(series, sma[periods.index(period)], fold.test_start, fold.test_stop, cash, close_at_end=True)
+        fold_trades = run.trades()
+        results.append(
+            WalkForwardFold(
+                train_start=dates[fold.train_start].item(),
+                train_end=dates[fold.train_stop - 1].item(),
+                test_start=dates[fold.test_start].item(),
+                test_end=dates[fold.test_stop - 1].item(),
+                sma_period=period,
+                train_metrics=train_metrics,
+                test_metrics=compute_metrics(equity_curve=run.equity, trades=fold_trades),
+            )
+        )
+        equity.append(run.equity)
+        trades.extend(fold_trades)
+        cash = float(run.equity[-1])
+
+    stitched = np.concatenate(equity)
+    test_dates = dates[folds[0].test_start:]
+    curve = [EquityPoint(date=d, equity=e) for d, e in zip(test_dates.tolist(), stitched.tolist())]
+    return results, curve, trades, compute_metrics(equity_curve=stitched, trades=trades)
@@ -1,9 +1,9 @@
 from typing import List, Optional, Tuple
-from app.schemas.stock import CandleDTO
+from app.services.stocks.candle_series import Candles, close_prices
 
 
 def compute_bollinger_bands(
-    candles: List[CandleDTO], 
+    candles: Candles, 
     period: int = 20, 
     num_std: float = 2.0
 ) -> Tuple[List[Optional[float]], List[Optional[float]], List[Optional[float]]]:
@@ -11,7 +11,7 @@ def compute_bollinger_bands(
     Compute Bollinger Bands (middle, upper, lower).
     
     Args:
-        candles: List of candle data
+        candles: CandleSeries or list of candle data
         period: Moving average period (default 20)
         num_std: Number of standard deviations for bands (default 2.0)
     
@@ -23,6 +23,11 @@ def compute_bollinger_bands(
         Middle Band = SMA(period)
         Upper Band = Middle Band + (num_std * std_dev)
         Lower Band = Middle Band - (num_std * std_dev)
+
+    Single pass: running sums of (close - shift) and its square are updated
+    as each bar enters and leaves the window. Every `period` bars the shift
+    is re-centered on the current window mean and the sums are rebuilt, which
+    keeps cancellation error bounded at O(1) amortized work per bar.
     """
     if period <= 0:
         raise ValueError("period must be > 0")
@@ -30,23 +35,44 @@ def compute_bollinger_bands(
         raise ValueError("num_std must be >= 0")
 
     n = len(candles)
-    closes = [float(c.close) for c in candles]
+    closes = close_prices(candles)
     
     middle: List[Optional[float]] = [None] * n
     upper: List[Optional[float]] = [None] * n
     lower: List[Optional[float]] = [None] * n
 
-    for i in range(period - 1, n):
-        # Get window of closes
-        window = closes[i - period + 1 : i + 1]
-        
-        # Calculate SMA (middle band)
-        sma = sum(window) / period
-        
-        # Calculate standard deviation
-        variance = sum((x - sma) ** 2 for x in window) / period
-        std_dev = variance ** 0.5
-        
+    shift = closes[0] if n else 0.0
+    s1 = 0.0  # sum of (x - shift) over the window
+    s2 = 0.0  # sum of (x - shift) ** 2 over the window
+
+    for i in range(n):
+        d = closes[i] - shift
+        s1 += d
+        s2 += d * d
+        if i >= period:
+            d = closes[i - period] - shift
+            s1 -= d
+            s2 -= d * d
+
+        if i < period - 1:
+            continue
+
+        if (i - period + 1) % period == 0:
+            # Re-center on the current window mean and rebuild the sums
+            first = i - period + 1
+            shift = sum(closes[first : i + 1]) / period
+            s1 = 0.0
+            s2 = 0.0
+            for k in range(first, i + 1):
+                d = closes[k] - shift
+                s1 += d
+                s2 += d * d
+
+        mean_dev = s1 / period
+        sma = shift + mean_dev
+        variance = s2 / period - mean_dev * mean_dev
+        std_dev = variance ** 0.5 if variance > 0.0 else 0.0
+
         # Set band values
         middle[i] = sma
         upper[i] = sma + (num_std * std_dev)
@@ -1,9 +1,9 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
-from app.schemas.stock import CandleDTO
+from app.services.stocks.candle_series import Candles, close_prices
 
 
-def compute_ema(candles: List[CandleDTO], period: int) -> List[Optional[float]]:
+def compute_ema(candles: Candles, period: int) -> List[Optional[float]]:
     """
     Returns EMA (Exponential Moving Average) aligned with candle list.
     First (period - 1) values will be None.
@@ -19,21 +19,27 @@ def compute_ema(candles: List[CandleDTO], period: int) -> List[Optional[float]]:
     if period <= 0:
         raise ValueError("period must be > 0")
 
-    closes = [float(c.close) for c in candles]
-    ema: List[Optional[float]] = [None] * len(closes)
+    return ema_values(close_prices(candles), period)
 
-    if len(closes) < period:
+
+def ema_values(values: Sequence[float], period: int) -> List[Optional[float]]:
+    """
+    compute_ema over a plain sequence of values (e.g. the MACD line).
+    """
+    ema: List[Optional[float]] = [None] * len(values)
+
+    if len(values) < period:
         return ema
 
     # Calculate the smoothing multiplier
     k = 2.0 / (period + 1)
 
     # First EMA value is the SMA of the first 'period' values
-    sma_sum = sum(closes[:period])
+    sma_sum = sum(values[:period])
     ema[period - 1] = sma_sum / period
 
     # Calculate subsequent EMA values
-    for i in range(period, len(closes)):
-        ema[i] = (closes[i] * k) + (ema[i - 1] * (1 - k))
+    for i in range(period, len(values)):
+        ema[i] = (values[i] * k) + (ema[i - 1] * (1 - k))
 
     return ema
@@ -0,0 +1,222 @@
+"""
+Registry-based indicator engine.
+
+Every series is a node keyed by (name, params), e.g. ("ema", (12,)) or
+("bb_upper", (20, 2.0)). Registered indicators declare the nodes they read
+from, so a request for several outputs resolves into one deduplicated DAG
+and each node is evaluated once per request: MACD(12, 26, 9) reuses an
+EMA(12) the caller also asked for, and the Bollinger middle band is the
+SMA node itself.
+
+Indicators that can compute many parameterizations in one pass over a
+shared input (SMA via one cumulative sum, RSI via one gains/losses split)
+register a `compute_many` used when several of them are needed together.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.indicators.kernels import (
+    ema_array,
+    rolling_mean_std,
+    rsi_array,
+    rsi_matrix,
+    sma_array,
+    sma_matrix,
+)
+from app.utils.sized_cache import SizedLRUCache
+
+Node = Tuple[str, Tuple[Any, ...]]
+
+# Input series supplied by the caller rather than computed
+SOURCES = ("close",)
+CLOSE: Node = ("close", ())
+
+
+@dataclass(frozen=True)
+class Indicator:
+    name: str
+    # params -> nodes this indicator reads, in the order compute receives them
+    inputs: Callable[..., Sequence[Node]]
+    # (*input arrays, *params) -> output array
+    compute: Callable[..., np.ndarray]
+    # (shared input array, [params, ...]) -> one output per params
+    compute_many: Optional[Callable[[np.ndarray, Sequence[Tuple[Any, ...]]], Sequence[np.ndarray]]] = None
+
+
+_REGISTRY: Dict[str, Indicator] = {}
+
+
+def register(
+    name: str,
+    inputs: Callable[..., Sequence[Node]],
+    compute: Callable[..., np.ndarray],
+    compute_many: Optional[Callable[[np.ndarray, Sequence[Tuple[Any, ...]]], Sequence[np.ndarray]]] = None,
+) -> None:
+    if name in _REGISTRY or name in SOURCES:
+        raise ValueError(f"Indicator {name!r} is already registered")
+    _REGISTRY[name] = Indicator(name, inputs, compute, compute_many)
+
+
+def node(name: str, *params: Any) -> Node:
+    if name not in _REGISTRY and name not in SOURCES:
+        raise ValueError(f"Unknown indicator {name!r}")
+    return (name, tuple(params))
+
+
+def _inputs(n: Node) -> Sequence[Node]:
+    name, params = n
+    if name in SOURCES:
+        return ()
+    if name not in _REGISTRY:
+        raise ValueError(f"Unknown indicator {name!r}")
+    return _REGISTRY[name].inputs(*params)
+
+
+def _plan(targets: Iterable[Node], known: Callable[[Node], Optional[np.ndarray]]) -> Tuple[List[Node], Dict[Node, np.ndarray]]:
+    """
+    Dependencies-first order of the nodes that must be computed for
+    `targets`, plus the values `known` already had. Inputs of known nodes
+    are not visited.
+    """
+    order: List[Node] = []
+    values: Dict[Node, np.ndarray] = {}
+    seen = set()
+
+    def visit(n: Node) -> None:
+        if n in seen:
+            return
+        seen.add(n)
+        value = known(n)
+        if value is not None:
+            values[n] = value
+            return
+        for dep in _inputs(n):
+            visit(dep)
+        order.append(n)
+
+    for target in targets:
+        visit(target)
+    return order, values
+
+
+def resolve(targets: Iterable[Node]) -> List[Node]:
+    """
+    Every node needed for `targets`, each once, dependencies first
+    (sources included).
+    """
+    order, _ = _plan(targets, lambda n: None)
+    return order
+
+
+def evaluate(
+    targets: Iterable[Node],
+    sources: Dict[str, np.ndarray],
+    cache: Optional[SizedLRUCache] = None,
+    scope: Tuple[Hashable, ...] = (),
+) -> Dict[Node, np.ndarray]:
+    """
+    Compute `targets` from the `sources` arrays (e.g. {"close": closes}).
+
+    With a cache, every node is looked up and stored under scope + node,
+    and a cached node short-circuits its whole subgraph.
+    """
+    targets = list(targets)
+
+    def known(n: Node) -> Optional[np.ndarray]:
+        if n[0] in SOURCES:
+            return sources[n[0]]
+        return cache.get(scope + n) if cache is not None else None
+
+    order, values = _plan(targets, known)
+
+    # Nodes one level deeper than their deepest input can run together
+    level: Dict[Node, int] = {}
+    for n in order:
+        level[n] = 1 + max((level.get(d, 0) for d in _inputs(n)), default=0)
+
+    groups: Dict[Tuple[Hashable, ...], List[Node]] = {}
+    for n in order:
+        indicator = _REGISTRY[n[0]]
+        deps = tuple(_inputs(n))
+        if indicator.compute_many is not None and len(deps) == 1:
+            key: Tuple[Hashable, ...] = (level[n], n[0], deps)
+        else:
+            key = (level[n], n)
+        groups.setdefault(key, []).append(n)
+
+    for key in sorted(groups, key=lambda k: k[0]):
+        group = groups[key]
+        indicator = _REGISTRY[group[0][0]]
+        if len(group) > 1:
+            shared = values[_inputs(group[0])[0]]
+            # Own buffers rather than views of one matrix, so each cached
+            # entry accounts for (and keeps alive) only its own row
+            results = [np.array(r) for r in indicator.compute_many(shared, [n[1] for n in group])]
+        else:
+            n = group[0]
+            results = [indicator.compute(*(values[d] for d in _inputs(n)), *n[1])]
+        for n, result in zip(group, results):
+            values[n] = result
+            if cache is not None:
+                cache.put(scope + n, result)
+
+    return {t: values[t] for t in targets}
+
+
+def _signal_line(line: np.ndarray, period: int) -> np.ndarray:
+    # EMA over the line from its first defined value onward
+    out = np.full(len(line), np.nan)
+    valid = np.flatnonzero(~np.isnan(line))
+    if len(valid):
+        out[valid[0] :] = ema_array(line[valid[0] :], period)
+    return out
+
+
+def _macd(ema_fast: np.ndarray, ema_slow: np.ndarray, fast: int, slow: int) -> np.ndarray:
+    if fast >= slow:
+        raise ValueError("fast period must be < slow period")
+    return ema_fast - ema_slow
+
+
+register(
+    "sma",
+    inputs=lambda period: [CLOSE],
+    compute=sma_array,
+    compute_many=lambda close, params: sma_matrix(close, [p for (p,) in params]),
+)
+register("ema", inputs=lambda period: [CLOSE], compute=ema_array)
+register(
+    "rsi",
+    inputs=lambda period: [CLOSE],
+    compute=rsi_array,
+    compute_many=lambda close, params: rsi_matrix(close, [p for (p,) in params]),
+)
+register("rolling_std", inputs=lambda period: [CLOSE], compute=lambda close, period: rolling_mean_std(close, period)[1])
+register(
+    "bb_upper",
+    inputs=lambda period, num_std: [("sma", (period,)), ("rolling_std", (period,))],
+    compute=lambda middle, std, period, num_std: middle + num_std * std,
+)
+register(
+    "bb_lower",
+    inputs=lambda period, num_std: [("sma", (period,)), ("rolling_std", (period,))],
+    compute=lambda middle, std, period, num_std: middle - num_std * std,
+)
+register(
+    "macd",
+    inputs=lambda fast, slow: [("ema", (fast,)), ("ema", (slow,))],
+    compute=_macd,
+)
+register(
+    "macd_signal",
+    inputs=lambda fast, slow, signal: [("macd", (fast, slow))],
+    compute=lambda line, fast, slow, signal: _signal_line(line, signal),
+)
+register(
+    "macd_hist",
+    inputs=lambda fast, slow, signal: [("macd", (fast, slow)), ("macd_signal", (fast, slow, signal))],
+    compute=lambda line, sig, fast, slow, signal: line - sig,
+)
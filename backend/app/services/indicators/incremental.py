@@ -0,0 +1,132 @@
+"""
+Constant-time-per-bar updates for SMA, EMA and Wilder RSI.
+
+A state is a plain JSON-serializable dict so it can be persisted
+(IndicatorState.state). advance() feeds new closes in date order and returns
+the latest value, or None while the indicator is still warming up. Feeding
+a whole series from an empty state reproduces compute_sma / compute_ema /
+compute_rsi at the last bar.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+from app.services.indicators.rsi import _rsi_from_avgs
+
+KINDS = ("sma", "ema", "rsi")
+
+
+def new_state(kind: str, period: int) -> Dict[str, Any]:
+    if kind not in KINDS:
+        raise ValueError(f"Unknown incremental indicator {kind!r}; expected one of {KINDS}")
+    if period <= 0:
+        raise ValueError("period must be > 0")
+
+    if kind == "sma":
+        # Window closes, their running sum and bars since the sum was rebuilt
+        return {"window": [], "sum": 0.0, "since_resum": 0}
+    if kind == "ema":
+        # Warm-up sum of the first `period` closes, then the EMA itself
+        return {"count": 0, "sum": 0.0, "ema": None}
+    return {
+        "prev_close": None,
+        "changes": 0,
+        "gain_sum": 0.0,
+        "loss_sum": 0.0,
+        "avg_gain": None,
+        "avg_loss": None,
+    }
+
+
+def _advance_sma(period: int, state: Dict[str, Any], closes: Iterable[float]) -> Optional[float]:
+    window = deque(state["window"])
+    total = state["sum"]
+    since_resum = state["since_resum"]
+
+    for close in closes:
+        window.append(close)
+        total += close
+        if len(window) > period:
+            total -= window.popleft()
+        since_resum += 1
+        # Rebuild the sum once per window length to stop rounding drift
+        if since_resum >= period:
+            total = sum(window)
+            since_resum = 0
+
+    state["window"] = list(window)
+    state["sum"] = total
+    state["since_resum"] = since_resum
+    return total / period if len(window) == period else None
+
+
+def _advance_ema(period: int, state: Dict[str, Any], closes: Iterable[float]) -> Optional[float]:
+    k = 2.0 / (period + 1)
+    ema = state["ema"]
+    count = state["count"]
+    total = state["sum"]
+
+    for close in closes:
+        if ema is None:
+            count += 1
+            total += close
+            if count == period:
+                ema = total / period
+        else:
+            ema = (close * k) + (ema * (1 - k))
+
+    state["ema"] = ema
+    state["count"] = count
+    state["sum"] = total
+    return ema
+
+
+def _advance_rsi(period: int, state: Dict[str, Any], closes: Iterable[float]) -> Optional[float]:
+    prev = state["prev_close"]
+    changes = state["changes"]
+    gain_sum = state["gain_sum"]
+    loss_sum = state["loss_sum"]
+    avg_gain = state["avg_gain"]
+    avg_loss = state["avg_loss"]
+
+    for close in closes:
+        if prev is not None:
+            delta = close - prev
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            if avg_gain is None:
+                changes += 1
+                gain_sum += gain
+                loss_sum += loss
+                if changes == period:
+                    avg_gain = gain_sum / period
+                    avg_loss = loss_sum / period
+            else:
+                avg_gain = (avg_gain * (period - 1) + gain) / period
+                avg_loss = (avg_loss * (period - 1) + loss) / period
+        prev = close
+
+    state.update(
+        prev_close=prev,
+        changes=changes,
+        gain_sum=gain_sum,
+        loss_sum=loss_sum,
+        avg_gain=avg_gain,
+        avg_loss=avg_loss,
+    )
+    if avg_gain is None:
+        return None
+    return _rsi_from_avgs(avg_gain, avg_loss)
+
+
+_ADVANCE = {"sma": _advance_sma, "ema": _advance_ema, "rsi": _advance_rsi}
+
+
+def advance(kind: str, period: int, state: Dict[str, Any], closes: Iterable[float]) -> Optional[float]:
+    """
+    Feed `closes` (oldest first) into `state` in place; returns the value
+    after the last close (None while warming up).
+    """
+    if kind not in _ADVANCE:
+        raise ValueError(f"Unknown incremental indicator {kind!r}; expected one of {KINDS}")
+    return _ADVANCE[kind](period, state, (float(c) for c in closes))
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.sized_cache import SizedLRUCache
+
+_cache: Optional[SizedLRUCache] = None
+
+
+def get_indicator_cache() -> SizedLRUCache:
+    """
+    Process-wide cache of indicator inputs and outputs, bounded by
+    INDICATOR_CACHE_MAX_BYTES (0 disables it).
+
+    Keys are (ticker, start, end, data_version, name, params), so entries for
+    a symbol stop being reachable as soon as ingestion, in any worker or
+    process, bumps its version in the database (see
+    app.services.stocks.data_version) and age out through LRU.
+    """
+    global _cache
+    if _cache is None:
+        _cache = SizedLRUCache(settings.INDICATOR_CACHE_MAX_BYTES)
+    return _cache
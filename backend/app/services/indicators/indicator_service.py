@@ -1,16 +1,121 @@
 from datetime import date
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import select
+import numpy as np
 from sqlalchemy.orm import Session
 
-from app.db.models.stock import Candle, Symbol
-from app.schemas.indicators import IndicatorPoint
-from app.schemas.stock import CandleDTO
-from app.services.indicators.rsi import compute_rsi
-from app.services.indicators.sma import compute_sma
-from app.services.indicators.ema import compute_ema
-from app.services.indicators.bollinger import compute_bollinger_bands
+from app.schemas.indicators import IndicatorMatrixResponse, IndicatorPoint, IndicatorsColumnar
+from app.services.indicators.indicator_cache import get_indicator_cache
+from app.services.indicators.graph import Node, evaluate, node
+from app.services.indicators.kernels import nan_to_none
+from app.services.stocks.candle_cache import get_candles
+from app.services.stocks.data_version import get_data_version
+from app.utils.downsample import lttb_indices
+
+
+def _cached_closes(db: Session, symbol: str, start: date, end: date) -> Tuple[tuple, np.ndarray, np.ndarray]:
+    """
+    (cache scope, dates, closes) for the range, sliced from the cached
+    candle series of the symbol (empty if it is unknown).
+    """
+    ticker = symbol.strip().upper()
+
+    # Read the version before loading so results computed from rows that
+    # predate a concurrent ingest are filed under the old version.
+    scope = (ticker, start, end, get_data_version(db, ticker))
+    series = get_candles(db, ticker, start, end)
+    return scope, series.dates, series.close
+
+
+MacdSpec = Tuple[int, int, int]
+
+# Optional per-date fields of IndicatorPoint / IndicatorsColumnar
+INDICATOR_FIELDS = ("sma", "ema", "rsi", "bb_middle", "bb_upper", "bb_lower", "macd", "macd_signal", "macd_hist")
+
+
+def _evaluate(scope: tuple, closes: np.ndarray, targets: Dict[str, Node]) -> Dict[str, List[Optional[float]]]:
+    """
+    Evaluate named graph nodes over the closes (each shared node once,
+    cached under the scope) and convert them for the schemas.
+    """
+    values = evaluate(targets.values(), {"close": closes}, get_indicator_cache(), scope)
+    return {name: nan_to_none(values[n]) for name, n in targets.items()}
+
+
+def _indicator_series(
+    db: Session,
+    symbol: str,
+    start: date,
+    end: date,
+    sma_period: Optional[int],
+    ema_period: Optional[int],
+    rsi_period: Optional[int],
+    bb_period: Optional[int],
+    bb_std: Optional[float],
+    macd: Optional[MacdSpec],
+    max_points: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, List[Optional[float]]]]:
+    """
+    (dates, closes, {field: values}) with only the requested fields present.
+
+    With max_points, indicators are still computed over every candle; the
+    rows LTTB keeps for the close line are then taken from every series,
+    so each returned value is the exact full-resolution value at its date.
+    """
+    scope, dates, closes = _cached_closes(db, symbol, start, end)
+    if len(closes) == 0:
+        return dates, closes, {}
+
+    targets: Dict[str, Node] = {}
+    if sma_period is not None:
+        targets["sma"] = node("sma", sma_period)
+    if ema_period is not None:
+        targets["ema"] = node("ema", ema_period)
+    if rsi_period is not None:
+        targets["rsi"] = node("rsi", rsi_period)
+    if bb_period is not None:
+        num_std = bb_std or 2.0
+        targets["bb_middle"] = node("sma", bb_period)
+        targets["bb_upper"] = node("bb_upper", bb_period, num_std)
+        targets["bb_lower"] = node("bb_lower", bb_period, num_std)
+    if macd is not None:
+        targets["macd"] = node("macd", *macd[:2])
+        targets["macd_signal"] = node("macd_signal", *macd)
+        targets["macd_hist"] = node("macd_hist", *macd)
+
+    series = _evaluate(scope, closes, targets)
+    if max_points is None or len(closes) <= max_points:
+        return dates, closes, series
+
+    kept = lttb_indices(dates.astype(np.int64), closes, max_points)
+    keep = kept.tolist()
+    return dates[kept], closes[kept], {name: [values[i] for i in keep] for name, values in series.items()}
+
+
+def get_indicator_rows(
+    db: Session,
+    symbol: str,
+    start: date,
+    end: date,
+    sma_period: Optional[int],
+    ema_period: Optional[int],
+    rsi_period: Optional[int],
+    bb_period: Optional[int] = None,
+    bb_std: Optional[float] = 2.0,
+    macd: Optional[MacdSpec] = None,
+    max_points: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    IndicatorPoint-shaped plain dicts (every field present, None when not
+    requested) for serializing without a model per point.
+    """
+    dates, closes, series = _indicator_series(
+        db, symbol, start, end, sma_period, ema_period, rsi_period, bb_period, bb_std, macd, max_points
+    )
+    empty: List[Optional[float]] = [None] * len(closes)
+    names = ("date", "close") + INDICATOR_FIELDS
+    columns = [dates.tolist(), closes.tolist()] + [series.get(field, empty) for field in INDICATOR_FIELDS]
+    return [dict(zip(names, values)) for values in zip(*columns)]
 
 
 def get_indicator_points(
@@ -23,59 +128,95 @@ def get_indicator_points(
     rsi_period: Optional[int],
     bb_period: Optional[int] = None,
     bb_std: Optional[float] = 2.0,
+    macd: Optional[MacdSpec] = None,
 ) -> List[IndicatorPoint]:
-    ticker = symbol.strip().upper()
+    rows = get_indicator_rows(db, symbol, start, end, sma_period, ema_period, rsi_period, bb_period, bb_std, macd)
+    return [IndicatorPoint(**row) for row in rows]
+
 
-    sym = db.execute(select(Symbol).where(Symbol.ticker == ticker)).scalar_one_or_none()
-    if sym is None:
-        return []
-
-    rows = (
-        db.execute(
-            select(Candle)
-            .where(Candle.symbol_id == sym.id, Candle.date >= start, Candle.date <= end)
-            .order_by(Candle.date.asc())
-        )
-        .scalars()
-        .all()
+def get_indicator_columns(
+    db: Session,
+    symbol: str,
+    start: date,
+    end: date,
+    sma_period: Optional[int],
+    ema_period: Optional[int],
+    rsi_period: Optional[int],
+    bb_period: Optional[int] = None,
+    bb_std: Optional[float] = 2.0,
+    macd: Optional[MacdSpec] = None,
+    max_points: Optional[int] = None,
+) -> IndicatorsColumnar:
+    """
+    Same data as get_indicator_points as one array per field, without
+    building a model per point. Fields that weren't requested are None.
+    """
+    dates, closes, series = _indicator_series(
+        db, symbol, start, end, sma_period, ema_period, rsi_period, bb_period, bb_std, macd, max_points
+    )
+    # Arrays come straight from the kernels, so skip re-validation
+    return IndicatorsColumnar.model_construct(
+        symbol=symbol.strip().upper(),
+        dates=dates.tolist(),
+        close=closes.tolist(),
+        **series,
+    )
+
+
+def _unique(values: Sequence) -> list:
+    return list(dict.fromkeys(values))
+
+
+def _std_label(num_std: float) -> str:
+    return f"{num_std:g}"
+
+
+def get_indicator_matrix(
+    db: Session,
+    symbol: str,
+    start: date,
+    end: date,
+    sma_periods: Sequence[int] = (),
+    ema_periods: Sequence[int] = (),
+    rsi_periods: Sequence[int] = (),
+    bb_periods: Sequence[int] = (),
+    bb_stds: Sequence[float] = (2.0,),
+    macds: Sequence[MacdSpec] = (),
+) -> IndicatorMatrixResponse:
+    """
+    Many periods of each indicator over one candle load, as columns aligned
+    with `dates`.
+
+    All requested columns go through one graph evaluation: all SMAs are
+    differences of one cumulative sum, all RSIs share one pass of
+    gains/losses, every Bollinger std multiple reuses the same SMA and
+    rolling std, and MACD reuses requested EMAs. Columns are named
+    "sma_20", "ema_50", "rsi_14", "bb_middle_20", "bb_upper_20_2",
+    "bb_lower_20_2", "macd_12_26_9", "macd_signal_12_26_9" and
+    "macd_hist_12_26_9".
+    """
+    scope, dates, closes = _cached_closes(db, symbol, start, end)
+
+    targets: Dict[str, Node] = {}
+    for name, periods in (("sma", sma_periods), ("ema", ema_periods), ("rsi", rsi_periods)):
+        for period in _unique(periods):
+            targets[f"{name}_{period}"] = node(name, period)
+    for period in _unique(bb_periods):
+        targets[f"bb_middle_{period}"] = node("sma", period)
+        for num_std in _unique(bb_stds):
+            label = f"{period}_{_std_label(num_std)}"
+            targets[f"bb_upper_{label}"] = node("bb_upper", period, num_std)
+            targets[f"bb_lower_{label}"] = node("bb_lower", period, num_std)
+    for spec in _unique(macds):
+        label = "_".join(str(p) for p in spec)
+        targets[f"macd_{label}"] = node("macd", *spec[:2])
+        targets[f"macd_signal_{label}"] = node("macd_signal", *spec)
+        targets[f"macd_hist_{label}"] = node("macd_hist", *spec)
+
+    columns = _evaluate(scope, closes, targets) if len(closes) else {}
+    return IndicatorMatrixResponse.model_construct(
+        symbol=symbol.strip().upper(),
+        dates=dates.tolist(),
+        close=closes.tolist(),
+        columns=columns,
     )
-    if not rows:
-        return []
-
-    candles: List[CandleDTO] = [
-        CandleDTO(
-            date=r.date,
-            open=r.open,
-            high=r.high,
-            low=r.low,
-            close=r.close,
-            volume=r.volume,
-        )
-        for r in rows
-    ]
-
-    sma_series = compute_sma(candles, sma_period) if sma_period is not None else [None] * len(candles)
-    ema_series = compute_ema(candles, ema_period) if ema_period is not None else [None] * len(candles)
-    rsi_series = compute_rsi(candles, rsi_period) if rsi_period is not None else [None] * len(candles)
-    
-    # Compute Bollinger Bands if requested
-    if bb_period is not None:
-        bb_middle, bb_upper, bb_lower = compute_bollinger_bands(candles, bb_period, bb_std or 2.0)
-    else:
-        bb_middle = [None] * len(candles)
-        bb_upper = [None] * len(candles)
-        bb_lower = [None] * len(candles)
-
-    return [
-        IndicatorPoint(
-            date=candles[i].date,
-            close=candles[i].close,
-            sma=sma_series[i],
-            ema=ema_series[i],
-            rsi=rsi_series[i],
-            bb_middle=bb_middle[i],
-            bb_upper=bb_upper[i],
-            bb_lower=bb_lower[i],
-        )
-        for i in range(len(candles))
-    ]
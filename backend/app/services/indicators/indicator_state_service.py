@@ -0,0 +1,198 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.indicator_state import IndicatorState
+from app.db.models.stock import Candle, Symbol
+from app.services.indicators.incremental import KINDS, advance, new_state
+
+Spec = Tuple[str, int]
+
+
+@dataclass
+class LatestIndicators:
+    as_of: date
+    close: float
+    values: Dict[Spec, Optional[float]]
+
+
+def parse_indicator_specs(text: str) -> List[Spec]:
+    """
+    Parse "sma:20,ema:20,rsi:14" into [("sma", 20), ("ema", 20), ("rsi", 14)].
+    """
+    specs: List[Spec] = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        kind, _, period = part.partition(":")
+        kind = kind.strip().lower()
+        if kind not in KINDS or not period.strip().isdigit() or int(period) <= 0:
+            raise ValueError(f"Invalid indicator spec {part!r}; expected e.g. 'ema:20'")
+        specs.append((kind, int(period)))
+    return specs
+
+
+def _reset(row: IndicatorState) -> None:
+    row.state = new_state(row.kind, row.period)
+    row.as_of = None
+    row.bars = 0
+    row.value = None
+
+
+def _insert_missing_states(db: Session, symbol_id: int, specs: Sequence[Spec]) -> None:
+    """
+    Inserts empty states for `specs`, leaving any that another session
+    created meanwhile untouched (INSERT ... ON CONFLICT DO NOTHING on
+    SQLite/Postgres). Other dialects commit one state at a time and skip
+    those that hit the unique constraint.
+    """
+    rows = [
+        {"symbol_id": symbol_id, "kind": kind, "period": period, "as_of": None, "bars": 0,
+         "value": None, "state": new_state(kind, period)}
+        for kind, period in specs
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(IndicatorState).on_conflict_do_nothing(index_elements=["symbol_id", "kind", "period"])
+        db.execute(stmt, rows)
+        return
+
+    for row in rows:
+        db.add(IndicatorState(**row))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+
+def _ensure_states(db: Session, symbol_id: int, specs: Iterable[Spec]) -> Dict[Spec, IndicatorState]:
+    """
+    The symbol's states by (kind, period), creating the missing `specs`.
+    Safe against concurrent ingests creating the same states.
+    """
+    query = select(IndicatorState).where(IndicatorState.symbol_id == symbol_id)
+    rows = {(r.kind, r.period): r for r in db.execute(query).scalars()}
+    missing = [s for s in dict.fromkeys(specs) if s not in rows]
+    if missing:
+        _insert_missing_states(db, symbol_id, missing)
+        rows = {(r.kind, r.period): r for r in db.execute(query).scalars()}
+    return rows
+
+
+def discard_indicator_states(db: Session, symbol_id: int) -> None:
+    """
+    Deletes a symbol's states, e.g. when advancing them failed and they may
+    no longer match the candles. They are rebuilt from the full history on
+    the next lookup or ingest.
+    """
+    db.execute(delete(IndicatorState).where(IndicatorState.symbol_id == symbol_id))
+    db.commit()
+
+
+def _catch_up(db: Session, symbol_id: int, rows: Sequence[IndicatorState]) -> None:
+    """
+    Feed every state the candles dated after its as_of. Candles are loaded
+    once, starting after the oldest as_of among the states.
+    """
+    if not rows:
+        return
+    as_ofs = [r.as_of for r in rows]
+    earliest = None if any(a is None for a in as_ofs) else min(as_ofs)
+
+    query = select(Candle.date, Candle.close).where(Candle.symbol_id == symbol_id)
+    if earliest is not None:
+        query = query.where(Candle.date > earliest)
+    candles = db.execute(query.order_by(Candle.date.asc())).all()
+    if not candles:
+        return
+
+    dates = [c.date for c in candles]
+    closes = [c.close for c in candles]
+    for row in rows:
+        first = 0 if row.as_of is None else bisect_right(dates, row.as_of)
+        if first == len(dates):
+            continue
+        state = dict(row.state)
+        row.value = advance(row.kind, row.period, state, closes[first:])
+        row.state = state  # reassign so the JSON column is flagged dirty
+        row.as_of = dates[-1]
+        row.bars += len(dates) - first
+
+
+def advance_indicator_states(
+    db: Session,
+    symbol_id: int,
+    first_new: Optional[date],
+    specs: Optional[Iterable[Spec]] = None,
+) -> None:
+    """
+    Bring a symbol's indicator states up to date after ingestion committed
+    new candles, creating the TRACKED_INDICATORS states if missing.
+
+    Bars appended after a state's as_of cost O(1) each. If rows were
+    inserted at or before as_of (a backfill), the state is rebuilt from the
+    first bar. first_new=None means "unknown" and forces a rebuild.
+
+    Only the latest values (get_latest_indicators) are served from these
+    states; full indicator series are still computed from the cached
+    candles, not extended from the persisted state.
+    """
+    if specs is None:
+        specs = parse_indicator_specs(settings.TRACKED_INDICATORS)
+    rows = _ensure_states(db, symbol_id, specs)
+
+    for row in rows.values():
+        if row.as_of is not None and (first_new is None or first_new <= row.as_of):
+            _reset(row)
+
+    _catch_up(db, symbol_id, list(rows.values()))
+    db.commit()
+
+
+def get_latest_indicators(db: Session, symbol: str, specs: Sequence[Spec]) -> Optional[LatestIndicators]:
+    """
+    Latest values for the requested (kind, period) specs from persisted
+    state. States that don't exist yet are built once from the full history;
+    afterwards only candles newer than the state are read.
+    Returns None if the symbol has no candles.
+    """
+    ticker = symbol.strip().upper()
+    sym = db.execute(select(Symbol).where(Symbol.ticker == ticker)).scalar_one_or_none()
+    if sym is None:
+        return None
+
+    last = db.execute(
+        select(Candle.date, Candle.close)
+        .where(Candle.symbol_id == sym.id)
+        .order_by(Candle.date.desc())
+        .limit(1)
+    ).first()
+    if last is None:
+        return None
+
+    rows = _ensure_states(db, sym.id, specs)
+    for s in specs:
+        # Candles after as_of were removed; the state no longer applies
+        if rows[s].as_of is not None and rows[s].as_of > last.date:
+            _reset(rows[s])
+    behind = [rows[s] for s in specs if rows[s].as_of != last.date]
+    if behind:
+        _catch_up(db, sym.id, behind)
+        db.commit()
+
+    return LatestIndicators(
+        as_of=last.date,
+        close=last.close,
+        values={s: rows[s].value for s in specs},
+    )
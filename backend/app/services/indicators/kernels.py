@@ -0,0 +1,255 @@
+"""
+Array-native indicator kernels.
+
+Each kernel takes a 1-D float64 array of closes and returns float64 arrays of
+the same length, with NaN where the list-based functions in sma.py, ema.py,
+rsi.py and bollinger.py return None. Results match those functions to
+floating-point rounding.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rows per block when evaluating first-order recursions (EMA, Wilder smoothing)
+_BLOCK = 64
+
+# Minimum output rows between exact re-centerings in rolling_mean_std
+_CHUNK = 128
+
+
+def as_closes(values: Sequence[float]) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def nan_to_none(values: np.ndarray) -> List[Optional[float]]:
+    """
+    Convert a kernel output to the Optional[float] list used by the schemas.
+    """
+    return [None if v != v else v for v in values.tolist()]
+
+
+def _check_period(period: int) -> None:
+    if period <= 0:
+        raise ValueError("period must be > 0")
+
+
+def sma_array(closes: np.ndarray, period: int) -> np.ndarray:
+    """
+    Simple moving average. First (period - 1) values are NaN.
+    """
+    return sma_matrix(closes, [period])[0]
+
+
+def sma_matrix(closes: np.ndarray, periods: Sequence[int]) -> np.ndarray:
+    """
+    SMAs for several periods as a (len(periods), n) array, all taken as
+    differences of one shared cumulative sum. Row i matches
+    sma_array(closes, periods[i]).
+    """
+    for period in periods:
+        _check_period(period)
+    x = as_closes(closes)
+    n = len(x)
+    out = np.full((len(periods), n), np.nan)
+    if n == 0:
+        return out
+
+    # Offset by the first close so the running sum stays small
+    base = x[0]
+    csum = np.zeros(n + 1)
+    np.cumsum(x - base, out=csum[1:])
+    for row, period in zip(out, periods):
+        if n >= period:
+            row[period - 1 :] = (csum[period:] - csum[: n + 1 - period]) / period + base
+    return out
+
+
+@lru_cache(maxsize=64)
+def _decay_matrix(k: float, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For y[t] = k * x[t] + (1 - k) * y[t-1] over a block of `size` rows:
+    returns (M, p) with y_block = M @ x_block + p * y_before_block.
+    """
+    d = 1.0 - k
+    lags = np.arange(size)[:, None] - np.arange(size)[None, :]
+    m = np.where(lags >= 0, k * np.power(d, np.maximum(lags, 0)), 0.0)
+    p = np.power(d, np.arange(1, size + 1))
+    return m, p
+
+
+def _smooth(x: np.ndarray, k: float, y0: float) -> np.ndarray:
+    """
+    Evaluate y[t] = k * x[t] + (1 - k) * y[t-1] with y[-1] = y0.
+
+    Full blocks are solved together in one matrix product; only the carry
+    between blocks is propagated sequentially. All weights are powers of
+    (1 - k) <= 1, so this is as stable as the scalar loop.
+    """
+    n = len(x)
+    if n == 0:
+        return np.empty(0)
+
+    size = min(_BLOCK, n)
+    m, p = _decay_matrix(float(k), size)
+    full = n // size
+    out = np.empty(n)
+
+    carry = float(y0)
+    if full:
+        blocks = x[: full * size].reshape(full, size) @ m.T
+        decay = p[-1]
+        carries = np.empty(full)
+        for b, last in enumerate(blocks[:, -1].tolist()):
+            carries[b] = carry
+            carry = last + decay * carry
+        blocks += carries[:, None] * p
+        out[: full * size] = blocks.ravel()
+
+    rest = n - full * size
+    if rest:
+        out[full * size :] = m[:rest, :rest] @ x[full * size :] + p[:rest] * carry
+    return out
+
+
+def ema_array(closes: np.ndarray, period: int) -> np.ndarray:
+    """
+    Exponential moving average with k = 2 / (period + 1), seeded with the
+    SMA of the first `period` closes. First (period - 1) values are NaN.
+    """
+    _check_period(period)
+    x = as_closes(closes)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+
+    seed = x[:period].sum() / period
+    out[period - 1] = seed
+    out[period:] = _smooth(x[period:], 2.0 / (period + 1), seed)
+    return out
+
+
+def _gains_losses(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    delta = np.diff(x)
+    return np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+
+
+def _wilder_rsi(gains: np.ndarray, losses: np.ndarray, period: int) -> np.ndarray:
+    n = len(gains) + 1
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+
+    k = 1.0 / period
+    avg_gain = np.empty(n - period)
+    avg_loss = np.empty(n - period)
+    avg_gain[0] = gains[:period].sum() / period
+    avg_loss[0] = losses[:period].sum() / period
+    avg_gain[1:] = _smooth(gains[period:], k, avg_gain[0])
+    avg_loss[1:] = _smooth(losses[period:], k, avg_loss[0])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi[avg_loss == 0] = 100.0
+    rsi[(avg_loss == 0) & (avg_gain == 0)] = 50.0
+    out[period:] = rsi
+    return out
+
+
+def rsi_array(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Wilder's RSI in [0, 100]. First `period` values are NaN.
+    """
+    return rsi_matrix(closes, [period])[0]
+
+
+def rsi_matrix(closes: np.ndarray, periods: Sequence[int]) -> np.ndarray:
+    """
+    RSIs for several periods as a (len(periods), n) array, sharing one
+    pass of price changes split into gains and losses.
+    """
+    for period in periods:
+        _check_period(period)
+    x = as_closes(closes)
+    out = np.full((len(periods), len(x)), np.nan)
+    if len(x) == 0:
+        return out
+
+    gains, losses = _gains_losses(x)
+    for i, period in enumerate(periods):
+        out[i] = _wilder_rsi(gains, losses, period)
+    return out
+
+
+def rolling_mean_std(closes: np.ndarray, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and population standard deviation over `period` bars in
+    O(n), independent of the period. First (period - 1) values are NaN.
+
+    Uses the Welford add/remove update for a sliding window: when x_in
+    enters and x_out leaves,
+        mean' = mean + (x_in - x_out) / period
+        M2'   = M2 + (x_in - x_out) * (x_in - mean' + x_out - mean)
+    Both updates are prefix sums, so they run as cumsums. Every `_CHUNK`
+    (or `period`, if larger) windows the mean and M2 are re-centered by an
+    exact two-pass computation, so rounding never accumulates over more
+    than one chunk. The increments scale with the window's own spread, so
+    flat stretches come out with a standard deviation of exactly zero.
+    """
+    _check_period(period)
+    x = as_closes(closes)
+    n = len(x)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n < period:
+        return mean, std
+    if period == 1:
+        mean[:] = x
+        std[:] = 0.0
+        return mean, std
+
+    count = n - period + 1
+    chunk = max(_CHUNK, period)
+    chunks = -(-count // chunk)
+    starts = np.arange(chunks) * chunk
+
+    # Exact state at the first window of every chunk
+    first = np.lib.stride_tricks.sliding_window_view(x, period)[starts]
+    dev = first - first[:, :1]
+    mean_dev = dev.mean(axis=1)
+    mean0 = first[:, 0] + mean_dev
+    m2_0 = ((dev - mean_dev[:, None]) ** 2).sum(axis=1)
+
+    x_in = x[period:]
+    x_out = x[: n - period]
+    change = x_in - x_out
+
+    step = np.zeros(chunks * chunk)
+    step[1:count] = change / period
+    step[starts] = 0.0
+    rolling_mean = (np.cumsum(step.reshape(chunks, chunk), axis=1) + mean0[:, None]).ravel()[:count]
+
+    step[:] = 0.0
+    step[1:count] = change * (x_in - rolling_mean[1:] + x_out - rolling_mean[:-1])
+    step[starts] = 0.0
+    m2 = (np.cumsum(step.reshape(chunks, chunk), axis=1) + m2_0[:, None]).ravel()[:count]
+
+    mean[period - 1 :] = rolling_mean
+    std[period - 1 :] = np.sqrt(np.maximum(m2 / period, 0.0))
+    return mean, std
+
+
+def bollinger_arrays(
+    closes: np.ndarray, period: int = 20, num_std: float = 2.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bollinger Bands (middle, upper, lower) using the population standard
+    deviation over each window (see rolling_mean_std). First (period - 1)
+    values are NaN.
+    """
+    if num_std < 0:
+        raise ValueError("num_std must be >= 0")
+    middle, std = rolling_mean_std(closes, period)
+    return middle, middle + num_std * std, middle - num_std * std
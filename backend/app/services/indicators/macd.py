@@ -0,0 +1,46 @@
+from typing import List, Optional, Tuple
+
+from app.services.indicators.ema import ema_values
+from app.services.stocks.candle_series import Candles, close_prices
+
+
+def compute_macd(
+    candles: Candles,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+) -> Tuple[List[Optional[float]], List[Optional[float]], List[Optional[float]]]:
+    """
+    Compute MACD (line, signal, histogram) aligned with the candle list.
+
+    Formula:
+        MACD      = EMA(fast) - EMA(slow)
+        Signal    = EMA(signal) of the MACD line, seeded with the SMA of its
+                    first `signal` values
+        Histogram = MACD - Signal
+
+    The MACD line starts at index slow - 1; the signal line and histogram
+    start (signal - 1) bars later. Earlier values are None.
+    """
+    if fast <= 0 or slow <= 0 or signal <= 0:
+        raise ValueError("periods must be > 0")
+    if fast >= slow:
+        raise ValueError("fast period must be < slow period")
+
+    closes = close_prices(candles)
+    n = len(closes)
+    ema_fast = ema_values(closes, fast)
+    ema_slow = ema_values(closes, slow)
+
+    line: List[Optional[float]] = [None] * n
+    for i in range(slow - 1, n):
+        line[i] = ema_fast[i] - ema_slow[i]
+
+    sig: List[Optional[float]] = [None] * n
+    if n >= slow:
+        sig[slow - 1 :] = ema_values(line[slow - 1 :], signal)
+
+    hist: List[Optional[float]] = [
+        None if s is None else m - s for m, s in zip(line, sig)
+    ]
+    return line, sig, hist
@@ -1,8 +1,8 @@
 from typing import List, Optional
-from app.schemas.stock import CandleDTO
+from app.services.stocks.candle_series import Candles, close_prices
 
 
-def compute_rsi(candles: List[CandleDTO], period: int = 14) -> List[Optional[float]]:
+def compute_rsi(candles: Candles, period: int = 14) -> List[Optional[float]]:
     """
     Wilder's RSI, aligned with candles.
     First `period` values are None (not enough data).
@@ -14,7 +14,7 @@ def compute_rsi(candles: List[CandleDTO], period: int = 14) -> List[Optional[flo
     if n == 0:
         return []
 
-    closes = [c.close for c in candles]
+    closes = close_prices(candles)
     rsi: List[Optional[float]] = [None] * n
 
     # Price changes
@@ -1,9 +1,9 @@
 from typing import List, Optional
 
-from app.schemas.stock import CandleDTO
+from app.services.stocks.candle_series import Candles, close_prices
 
 
-def compute_sma(candles: List[CandleDTO], period: int) -> List[Optional[float]]:
+def compute_sma(candles: Candles, period: int) -> List[Optional[float]]:
     """
     Returns SMA aligned with candle list.
     First (period - 1) values will be None.
@@ -11,7 +11,7 @@ def compute_sma(candles: List[CandleDTO], period: int) -> List[Optional[float]]:
     if period <= 0:
         raise ValueError("period must be > 0")
 
-    closes = [float(c.close) for c in candles]
+    closes = close_prices(candles)
     sma: List[Optional[float]] = [None] * len(closes)
 
     window_sum = 0.0
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from datetime import date
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.schemas.stock import CandleDTO
+from app.services.market_data.candle_columns import CandleColumns
+from app.services.market_data.csv_stream import column_positions, iter_lines
+from app.services.market_data.response_cache import (
+    ResponseCache,
+    conditional_headers,
+    get_default_response_cache,
+    store_response,
+)
+from app.services.market_data.stooq_provider import StooqProvider, parse_stooq_columns, to_stooq_symbol
+
+
+class HostRateLimiter:
+    """
+    Spaces out request starts per host so that no host sees more than
+    `requests_per_second` requests. A rate <= 0 disables limiting.
+    """
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, host: str) -> None:
+        if self.interval <= 0.0:
+            return
+
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncStooqProvider:
+    """
+    Async variant of StooqProvider for batch ingestion.
+    Reuses one pooled httpx.AsyncClient, caps in-flight requests with a
+    semaphore and rate-limits per host. Shares the ResponseCache layout
+    with StooqProvider, so either one can serve the other's payloads.
+    """
+
+    BASE_URL = StooqProvider.BASE_URL
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+    ):
+        self.max_concurrency = max_concurrency or settings.INGEST_MAX_CONCURRENCY
+        rps = settings.STOOQ_REQUESTS_PER_SECOND if requests_per_second is None else requests_per_second
+
+        self.cache = cache or get_default_response_cache()
+        self.base_url = base_url or settings.STOOQ_BASE_URL
+        self._client = client
+        self._owns_client = client is None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._rate_limiter = HostRateLimiter(rps)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+        return self._client
+
+    async def _get(self, url: str, params: Dict[str, str], headers: Dict[str, str]) -> httpx.Response:
+        async with self._semaphore:
+            await self._rate_limiter.acquire(urlsplit(url).netloc)
+            return await self.client.get(url, params=params, headers=headers)
+
+    async def _fetch_csv(self, stooq_symbol: str) -> bytes:
+        key = f"stooq:{stooq_symbol}:d"
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None and self.cache.is_fresh(cached):
+            return await asyncio.to_thread(lambda: cached.body)
+
+        params = {
+            "s": stooq_symbol,
+            "i": "d"  # daily interval
+        }
+        response = await self._get(self.base_url, params, conditional_headers(cached))
+        if response.status_code == 304 and cached is not None:
+            await asyncio.to_thread(self.cache.touch, key)
+            return await asyncio.to_thread(lambda: cached.body)
+        response.raise_for_status()
+
+        # Raises PayloadError for "No data" / rate-limit bodies before they are cached
+        column_positions(next(iter_lines([response.content]), None))
+        await asyncio.to_thread(store_response, self.cache, key, response)
+        return response.content
+
+    async def get_candle_columns(self, symbol: str, start: date, end: date) -> CandleColumns:
+        body = await self._fetch_csv(to_stooq_symbol(symbol))
+        # Parsing is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(parse_stooq_columns, [body], start, end)
+
+    async def get_candles(self, symbol: str, start: date, end: date) -> List[CandleDTO]:
+        cols = await self.get_candle_columns(symbol, start, end)
+        candles = cols.to_dtos()
+        candles.sort(key=lambda c: c.date)
+        return candles
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+        self._client = None
+
+
+_shared_provider: Optional[AsyncStooqProvider] = None
+
+
+def get_async_stooq_provider() -> AsyncStooqProvider:
+    """
+    Process-wide provider so connections are pooled across requests.
+    """
+    global _shared_provider
+    if _shared_provider is None:
+        _shared_provider = AsyncStooqProvider()
+    return _shared_provider
+
+
+async def close_async_stooq_provider() -> None:
+    global _shared_provider
+    if _shared_provider is not None:
+        await _shared_provider.aclose()
+        _shared_provider = None
@@ -0,0 +1,113 @@
+from datetime import date
+from typing import Iterable, Iterator, List, Optional
+
+from app.services.market_data.candle_columns import CandleColumns
+
+DEFAULT_BATCH_SIZE = 5_000
+
+_COLUMNS = (b"Date", b"Open", b"High", b"Low", b"Close", b"Volume")
+
+
+class PayloadError(ValueError):
+    """
+    The payload is not a daily OHLCV CSV, e.g. Stooq's "No data" or its
+    rate-limit page (both served with HTTP 200).
+    """
+
+
+def column_positions(header: Optional[bytes]) -> List[int]:
+    """
+    Positions of Date, Open, High, Low, Close, Volume in a CSV header line.
+    Raises PayloadError if any is missing.
+    """
+    names = [h.strip() for h in (header or b"").split(b",")]
+    try:
+        return [names.index(c) for c in _COLUMNS]
+    except ValueError:
+        raise PayloadError(f"Not a daily OHLCV CSV: {(header or b'')[:80]!r}") from None
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Split a stream of byte chunks into lines (without line terminators).
+    """
+    carry = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        parts = (carry + chunk).split(b"\n")
+        carry = parts.pop()
+        for line in parts:
+            yield line.rstrip(b"\r")
+    if carry:
+        yield carry.rstrip(b"\r")
+
+
+def iter_ohlcv_batches(
+    lines: Iterable[bytes],
+    start: date,
+    end: date,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[CandleColumns]:
+    """
+    Incrementally parse a daily OHLCV CSV (Stooq layout) into CandleColumns
+    batches of at most `batch_size` rows within [start, end].
+
+    Columns are located once from the header and then read by position.
+    Rows outside the range are rejected by comparing the raw ISO date bytes
+    before any float parsing. The file is date-ordered, so parsing stops
+    once two consecutive rows lie past `end` (the second confirms the
+    ordering); if any row goes backwards in time the early stop is disabled
+    and every row is filtered instead.
+
+    A payload without the expected header (e.g. Stooq's "No data" or
+    rate-limit page) raises PayloadError before anything is yielded.
+    """
+    it = iter(lines)
+    idx = column_positions(next(it, None))
+    i_date, i_open, i_high, i_low, i_close, i_vol = idx
+    width = max(idx) + 1
+
+    lo = start.isoformat().encode("ascii")
+    hi = end.isoformat().encode("ascii")
+    ordered = True
+    past_end = False
+    prev = b""
+
+    batch = CandleColumns()
+    fromisoformat = date.fromisoformat
+
+    for line in it:
+        fields = line.split(b",")
+        if len(fields) < width:
+            continue
+
+        d = fields[i_date]
+        if d < prev:
+            ordered = False
+        prev = d
+
+        if d > hi:
+            if ordered and past_end:
+                break
+            past_end = True
+            continue
+        if d < lo:
+            continue
+
+        vol = fields[i_vol]
+        batch.append(
+            fromisoformat(d.decode("ascii")),
+            float(fields[i_open]),
+            float(fields[i_high]),
+            float(fields[i_low]),
+            float(fields[i_close]),
+            int(float(vol)) if vol else 0,
+        )
+        if len(batch) >= batch_size:
+            yield batch
+            batch = CandleColumns()
+
+    if len(batch):
+        yield batch
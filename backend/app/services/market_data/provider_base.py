@@ -1,9 +1,19 @@
 from abc import ABC, abstractmethod
 from datetime import date
-from typing import List
+from typing import Iterator, List
 from app.schemas.stock import CandleDTO
+from app.services.market_data.candle_columns import CandleColumns
 
 class MarketDataProvider(ABC):
     @abstractmethod
     def get_candles(self, symbol: str, start: date, end: date) -> List[CandleDTO]:
         raise NotImplementedError
+
+    def iter_candle_batches(self, symbol: str, start: date, end: date) -> Iterator[CandleColumns]:
+        """
+        Column batches for ingestion. Providers that can parse incrementally
+        override this; the default wraps get_candles() in a single batch.
+        """
+        candles = self.get_candles(symbol=symbol, start=start, end=end)
+        if candles:
+            yield CandleColumns.from_dtos(candles)
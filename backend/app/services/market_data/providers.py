@@ -0,0 +1,62 @@
+import asyncio
+from datetime import date
+from typing import List, Optional
+
+from app.core.config import settings
+from app.schemas.stock import CandleDTO
+from app.services.market_data.candle_columns import CandleColumns
+from app.services.market_data.provider_base import MarketDataProvider
+from app.services.market_data.stooq_provider import StooqProvider
+from app.services.market_data.synthetic_provider import SyntheticProvider
+
+PROVIDER_NAMES = ("stooq", "synthetic")
+
+
+class ThreadedAsyncProvider:
+    """
+    Exposes a synchronous MarketDataProvider through the async interface
+    used by batch ingestion, running each call in a worker thread.
+    """
+
+    def __init__(self, provider: MarketDataProvider):
+        self.provider = provider
+
+    def _collect(self, symbol: str, start: date, end: date) -> CandleColumns:
+        cols = CandleColumns()
+        for batch in self.provider.iter_candle_batches(symbol=symbol, start=start, end=end):
+            cols.extend(batch)
+        return cols
+
+    async def get_candle_columns(self, symbol: str, start: date, end: date) -> CandleColumns:
+        return await asyncio.to_thread(self._collect, symbol, start, end)
+
+    async def get_candles(self, symbol: str, start: date, end: date) -> List[CandleDTO]:
+        return (await self.get_candle_columns(symbol, start, end)).to_dtos()
+
+    async def aclose(self) -> None:
+        return None
+
+
+def get_market_data_provider(name: Optional[str] = None) -> MarketDataProvider:
+    """
+    Provider selected by MARKET_DATA_PROVIDER (or `name`).
+    """
+    name = (name or settings.MARKET_DATA_PROVIDER).strip().lower()
+    if name == "stooq":
+        return StooqProvider()
+    if name == "synthetic":
+        return SyntheticProvider(seed=settings.SYNTHETIC_SEED)
+    raise ValueError(f"Unknown market data provider {name!r}; expected one of {PROVIDER_NAMES}")
+
+
+def get_async_market_data_provider(name: Optional[str] = None):
+    """
+    Async provider for batch ingestion. Stooq uses the shared pooled client;
+    other providers run in worker threads.
+    """
+    name = (name or settings.MARKET_DATA_PROVIDER).strip().lower()
+    if name == "stooq":
+        from app.services.market_data.async_stooq_provider import get_async_stooq_provider
+
+        return get_async_stooq_provider()
+    return ThreadedAsyncProvider(get_market_data_provider(name))
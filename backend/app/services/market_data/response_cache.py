@@ -0,0 +1,334 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+
+@dataclass
+class CachedResponse:
+    """
+    A cached payload, either held in memory (`data`) or left on disk
+    (`path`) so it can be streamed without loading it whole.
+    """
+
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    data: Optional[bytes] = None
+    path: Optional[Path] = None
+
+    @property
+    def body(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        return self.path.read_bytes()
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8")
+
+    def iter_chunks(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        if self.data is not None:
+            yield self.data
+            return
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+
+class CacheWriter:
+    """
+    Accumulates a payload chunk by chunk; nothing is visible in the cache
+    until commit(). This default implementation buffers in memory.
+
+    `stores` is False for writers that discard everything, so callers can
+    skip reading a body only for the cache's sake.
+    """
+
+    stores = True
+
+    def __init__(self, cache: "ResponseCache", key: str, etag: Optional[str], last_modified: Optional[str]):
+        self.cache = cache
+        self.key = key
+        self.etag = etag
+        self.last_modified = last_modified
+        self._chunks: List[bytes] = []
+
+    def write(self, chunk: bytes) -> None:
+        self._chunks.append(chunk)
+
+    def commit(self) -> None:
+        self.cache.put(self.key, b"".join(self._chunks), etag=self.etag, last_modified=self.last_modified)
+        self._chunks = []
+
+    def abort(self) -> None:
+        self._chunks = []
+
+
+class ResponseCache(ABC):
+    """
+    Stores raw provider payloads by key (e.g. one Stooq CSV per symbol).
+
+    Entries older than `ttl_seconds` are stale: they are still returned by
+    get() so callers can revalidate them with conditional headers, but
+    is_fresh() reports False.
+    """
+
+    ttl_seconds: float = 0.0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, key: str, body: bytes, *, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def touch(self, key: str) -> None:
+        """Mark an entry as just revalidated (resets its TTL)."""
+        raise NotImplementedError
+
+    def writer(self, key: str, *, etag: Optional[str] = None, last_modified: Optional[str] = None) -> CacheWriter:
+        """Incremental alternative to put() for streamed payloads."""
+        return CacheWriter(self, key, etag, last_modified)
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return (time.time() - entry.fetched_at) < self.ttl_seconds
+
+
+class _NullWriter(CacheWriter):
+    stores = False
+
+    def write(self, chunk: bytes) -> None:
+        return None
+
+    def commit(self) -> None:
+        return None
+
+
+class NullResponseCache(ResponseCache):
+    """Cache that never stores anything."""
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return None
+
+    def put(self, key: str, body: bytes, *, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        return None
+
+    def touch(self, key: str) -> None:
+        return None
+
+    def writer(self, key: str, *, etag: Optional[str] = None, last_modified: Optional[str] = None) -> CacheWriter:
+        return _NullWriter(self, key, etag, last_modified)
+
+
+class DiskResponseCache(ResponseCache):
+    """
+    On-disk cache: one `<hash>.body` file with the raw payload and one
+    `<hash>.json` metadata file per key. Files are written atomically, so
+    several workers can share a directory.
+
+    Total body size is capped at `max_bytes`; when a put exceeds it, the
+    least recently used entries (by body mtime, bumped on every hit) are
+    evicted.
+    """
+
+    def __init__(self, directory: str | Path, *, ttl_seconds: float, max_bytes: int):
+        self.directory = Path(directory)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, key: str):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.body", self.directory / f"{digest}.json"
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def _read_meta(self, meta_path: Path) -> Optional[Dict]:
+        try:
+            return json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        body_path, meta_path = self._paths(key)
+        meta = self._read_meta(meta_path)
+        if meta is None or meta.get("key") != key:
+            return None
+        try:
+            os.utime(body_path)  # LRU bookkeeping
+        except OSError:
+            return None
+
+        return CachedResponse(
+            fetched_at=float(meta["fetched_at"]),
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            path=body_path,
+        )
+
+    def put(self, key: str, body: bytes, *, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        if len(body) > self.max_bytes:
+            return
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        self._commit_body(key, Path(tmp), etag, last_modified)
+
+    def writer(self, key: str, *, etag: Optional[str] = None, last_modified: Optional[str] = None) -> CacheWriter:
+        return _DiskWriter(self, key, etag, last_modified)
+
+    def _commit_body(self, key: str, tmp: Path, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Move a fully written temp file into place as the entry for `key`."""
+        body_path, meta_path = self._paths(key)
+        meta = {"key": key, "fetched_at": time.time(), "etag": etag, "last_modified": last_modified}
+
+        with self._lock:
+            os.replace(tmp, body_path)
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+            self._evict(keep=body_path)
+
+    def touch(self, key: str) -> None:
+        body_path, meta_path = self._paths(key)
+        meta = self._read_meta(meta_path)
+        if meta is None or meta.get("key") != key:
+            return
+        meta["fetched_at"] = time.time()
+        with self._lock:
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob("*.body"))
+
+    def _evict(self, keep: Path) -> None:
+        entries = []
+        total = 0
+        for p in self.directory.glob("*.body"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort(key=lambda e: e[0])
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            for victim in (p, p.with_suffix(".json")):
+                try:
+                    victim.unlink()
+                except OSError:
+                    pass
+            total -= size
+
+
+class _DiskWriter(CacheWriter):
+    """Streams straight into a temp file in the cache directory."""
+
+    def __init__(self, cache: DiskResponseCache, key: str, etag: Optional[str], last_modified: Optional[str]):
+        super().__init__(cache, key, etag, last_modified)
+        fd, tmp = tempfile.mkstemp(dir=cache.directory, suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+        self._tmp = Path(tmp)
+        self._size = 0
+
+    def write(self, chunk: bytes) -> None:
+        if self._file is None:
+            return
+        self._size += len(chunk)
+        if self._size > self.cache.max_bytes:
+            self.abort()
+            return
+        self._file.write(chunk)
+
+    def commit(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self.cache._commit_body(self.key, self._tmp, self.etag, self.last_modified)
+
+    def abort(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            self._tmp.unlink()
+        except OSError:
+            pass
+
+
+def conditional_headers(entry: Optional[CachedResponse]) -> Dict[str, str]:
+    """
+    Revalidation headers for a stale entry, when the upstream gave us validators.
+    """
+    headers: Dict[str, str] = {}
+    if entry is None:
+        return headers
+    if entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+def store_response(cache: ResponseCache, key: str, response: httpx.Response) -> None:
+    cache.put(
+        key,
+        response.content,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+
+
+_default_cache: Optional[ResponseCache] = None
+
+
+def get_default_response_cache() -> ResponseCache:
+    """
+    Cache configured from settings; MARKET_DATA_CACHE_DIR="" disables caching.
+    """
+    global _default_cache
+    if _default_cache is None:
+        if settings.MARKET_DATA_CACHE_DIR:
+            _default_cache = DiskResponseCache(
+                settings.MARKET_DATA_CACHE_DIR,
+                ttl_seconds=settings.MARKET_DATA_CACHE_TTL_SECONDS,
+                max_bytes=settings.MARKET_DATA_CACHE_MAX_BYTES,
+            )
+        else:
+            _default_cache = NullResponseCache()
+    return _default_cache
@@ -1,55 +1,114 @@
 from datetime import date
-from typing import List
+from typing import Iterable, Iterator, List
 import httpx
-import csv
-from io import StringIO
 
+from app.core.config import settings
 from app.schemas.stock import CandleDTO
+from app.services.market_data.candle_columns import CandleColumns
+from app.services.market_data.csv_stream import DEFAULT_BATCH_SIZE, iter_lines, iter_ohlcv_batches
+from app.services.market_data.provider_base import MarketDataProvider
+from app.services.market_data.response_cache import (
+    CacheWriter,
+    ResponseCache,
+    conditional_headers,
+    get_default_response_cache,
+)
 
 
-class StooqProvider:
+def to_stooq_symbol(symbol: str) -> str:
+    """
+    Stooq tickers are lowercase with a market suffix; default to US listings.
+    """
+    symbol = symbol.strip().lower()
+    if "." not in symbol:
+        symbol = f"{symbol}.us"
+    return symbol
+
+
+def parse_stooq_columns(chunks: Iterable[bytes], start: date, end: date) -> CandleColumns:
+    """
+    Parse a Stooq daily CSV payload into a single CandleColumns within [start, end].
+    """
+    cols = CandleColumns()
+    for batch in iter_ohlcv_batches(iter_lines(chunks), start, end):
+        cols.extend(batch)
+    return cols
+
+
+def _tee(chunks: Iterable[bytes], writer: CacheWriter) -> Iterator[bytes]:
+    for chunk in chunks:
+        writer.write(chunk)
+        yield chunk
+
+
+class StooqProvider(MarketDataProvider):
     """
     Fetches daily historical data from Stooq.
     Returns normalized CandleDTO objects.
+
+    Stooq always serves the full history per symbol, so raw payloads go
+    through a ResponseCache: fresh entries cost no network, stale ones are
+    revalidated with conditional headers when Stooq supplied validators.
+
+    The body is parsed as it streams in (see csv_stream), so peak memory
+    does not grow with the length of the history. Bodies that aren't a CSV
+    ("No data", rate-limit pages) raise PayloadError and are not cached.
     """
 
     BASE_URL = "https://stooq.com/q/d/l/"
 
-    def get_candles(self, symbol: str, start: date, end: date) -> List[CandleDTO]:
-        symbol = symbol.strip().lower()
-        if "." not in symbol:
-            symbol = f"{symbol}.us"
+    def __init__(self, cache: ResponseCache | None = None, base_url: str | None = None):
+        self.cache = cache or get_default_response_cache()
+        self.base_url = base_url or settings.STOOQ_BASE_URL
+
+    def iter_candle_batches(
+        self,
+        symbol: str,
+        start: date,
+        end: date,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Iterator[CandleColumns]:
+        stooq_symbol = to_stooq_symbol(symbol)
+        key = f"stooq:{stooq_symbol}:d"
 
+        cached = self.cache.get(key)
+        if cached is not None and self.cache.is_fresh(cached):
+            yield from iter_ohlcv_batches(iter_lines(cached.iter_chunks()), start, end, batch_size=batch_size)
+            return
 
         params = {
-            "s": symbol,
+            "s": stooq_symbol,
             "i": "d"  # daily interval
         }
+        with httpx.stream(
+            "GET", self.base_url, params=params, headers=conditional_headers(cached), timeout=10.0
+        ) as response:
+            if response.status_code == 304 and cached is not None:
+                self.cache.touch(key)
+                yield from iter_ohlcv_batches(iter_lines(cached.iter_chunks()), start, end, batch_size=batch_size)
+                return
+            response.raise_for_status()
 
-        response = httpx.get(self.BASE_URL, params=params, timeout=10.0)
-        response.raise_for_status()
-
-        candles: List[CandleDTO] = []
-
-        csv_data = StringIO(response.text)
-        reader = csv.DictReader(csv_data)
-
-        for row in reader:
-            row_date = date.fromisoformat(row["Date"])
-
-            if row_date < start or row_date > end:
-                continue
-
-            candles.append(
-                CandleDTO(
-                    date=row_date,
-                    open=float(row["Open"]),
-                    high=float(row["High"]),
-                    low=float(row["Low"]),
-                    close=float(row["Close"]),
-                    volume=int(float(row["Volume"])) if row["Volume"] else 0,
-                )
+            writer = self.cache.writer(
+                key,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
             )
+            chunks = _tee(response.iter_bytes(), writer)
+            try:
+                # Raises PayloadError on a non-CSV body, which is then never cached
+                yield from iter_ohlcv_batches(iter_lines(chunks), start, end, batch_size=batch_size)
+                if writer.stores:
+                    # Parsing stops at `end`; the cache still needs the full payload
+                    for _ in chunks:
+                        pass
+                    writer.commit()
+            finally:
+                writer.abort()
 
+    def get_candles(self, symbol: str, start: date, end: date) -> List[CandleDTO]:
+        candles: List[CandleDTO] = []
+        for batch in self.iter_candle_batches(symbol, start, end):
+            candles.extend(batch.to_dtos())
         candles.sort(key=lambda c: c.date)
         return candles
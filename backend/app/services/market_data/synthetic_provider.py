@@ -0,0 +1,152 @@
+import zlib
+from array import array
+from datetime import date
+from functools import lru_cache
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from app.schemas.stock import CandleDTO
+from app.services.market_data.candle_columns import CandleColumns
+from app.services.market_data.csv_stream import DEFAULT_BATCH_SIZE
+from app.services.market_data.provider_base import MarketDataProvider
+from app.services.market_data.trading_calendar import trading_days
+
+# Every synthetic history starts here, so a symbol's bars don't depend on the
+# requested range.
+ORIGIN = date(1980, 1, 2)
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Independent RNG streams per series component. Each stream is drawn in date
+# order, so the bars up to any date are identical however far out we generate.
+_RETURNS, _GAPS, _JUMP_MASK, _JUMP_SIZE, _HIGH, _LOW, _VOLUME, _HALTS, _PARAMS = range(9)
+
+
+@lru_cache(maxsize=8)
+def _trading_ordinals(through_year: int) -> np.ndarray:
+    days = trading_days(ORIGIN, date(through_year, 12, 31))
+    return np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=len(days))
+
+
+def _to_array(typecode: str, values: np.ndarray) -> array:
+    out = array(typecode)
+    out.frombytes(np.ascontiguousarray(values).tobytes())
+    return out
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Offline, deterministic OHLCV generator for load tests and benchmarks.
+
+    Each symbol gets its own seeded geometric Brownian motion on the NYSE
+    trading calendar starting at ORIGIN, with:
+      - per-symbol drift, volatility and starting price
+      - overnight gaps (open != previous close) and occasional jumps
+      - intraday high/low ranges scaled with volatility
+      - log-normal volume that rises on large moves
+      - rare missing sessions (trading halts)
+
+    The same (seed, symbol) always produces the same bars.
+    """
+
+    def __init__(self, seed: int = 0, halt_probability: float = 0.002):
+        self.seed = int(seed)
+        self.halt_probability = float(halt_probability)
+
+    def _rng(self, ticker: str, stream: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, zlib.crc32(ticker.encode("utf-8")), stream])
+
+    def generate(self, symbol: str, end: date) -> Tuple[np.ndarray, ...]:
+        """
+        Full history from ORIGIN through `end` as arrays:
+        (ordinals, open, high, low, close, volume).
+        """
+        ticker = symbol.strip().upper()
+        ordinals = _trading_ordinals(end.year)
+        n = int(np.searchsorted(ordinals, end.toordinal(), side="right"))
+        ordinals = ordinals[:n]
+
+        params = self._rng(ticker, _PARAMS)
+        sigma = params.uniform(0.15, 0.60)
+        mu = params.uniform(-0.02, 0.15)
+        p0 = float(np.exp(params.uniform(np.log(5.0), np.log(300.0))))
+        base_volume = float(np.exp(params.uniform(np.log(5e4), np.log(5e7))))
+
+        dt = 1.0 / TRADING_DAYS_PER_YEAR
+        daily_sigma = sigma * np.sqrt(dt)
+
+        # Split each day's log return into an overnight gap and an intraday move
+        overnight = 0.35 * daily_sigma * self._rng(ticker, _GAPS).standard_normal(n)
+        intraday = (mu - 0.5 * sigma * sigma) * dt + 0.94 * daily_sigma * self._rng(ticker, _RETURNS).standard_normal(n)
+
+        jump_mask = self._rng(ticker, _JUMP_MASK).random(n) < 0.004
+        overnight = overnight + jump_mask * self._rng(ticker, _JUMP_SIZE).normal(0.0, 6.0 * daily_sigma, n)
+
+        log_close = np.log(p0) + np.cumsum(overnight + intraday)
+        close = np.exp(log_close)
+        open_ = np.exp(log_close - intraday)
+
+        upper_wick = np.abs(self._rng(ticker, _HIGH).standard_normal(n)) * (0.5 * daily_sigma)
+        lower_wick = np.abs(self._rng(ticker, _LOW).standard_normal(n)) * (0.5 * daily_sigma)
+        high = np.maximum(open_, close) * np.exp(upper_wick)
+        low = np.minimum(open_, close) * np.exp(-lower_wick)
+
+        move = np.abs(overnight + intraday) / daily_sigma
+        volume = base_volume * np.exp(0.35 * self._rng(ticker, _VOLUME).standard_normal(n) + 0.25 * move)
+
+        keep = self._rng(ticker, _HALTS).random(n) >= self.halt_probability
+
+        # Round like a real feed so CSV round-trips are exact
+        return (
+            ordinals[keep],
+            np.round(open_[keep], 4),
+            np.round(high[keep], 4),
+            np.round(low[keep], 4),
+            np.round(close[keep], 4),
+            volume[keep].astype(np.int64),
+        )
+
+    def iter_candle_batches(
+        self,
+        symbol: str,
+        start: date,
+        end: date,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Iterator[CandleColumns]:
+        if start > end:
+            return
+        ordinals, open_, high, low, close, volume = self.generate(symbol, end)
+        first = int(np.searchsorted(ordinals, start.toordinal(), side="left"))
+
+        for i in range(first, len(ordinals), batch_size):
+            j = min(i + batch_size, len(ordinals))
+            yield CandleColumns(
+                ordinals=_to_array("q", ordinals[i:j]),
+                open=_to_array("d", open_[i:j]),
+                high=_to_array("d", high[i:j]),
+                low=_to_array("d", low[i:j]),
+                close=_to_array("d", close[i:j]),
+                volume=_to_array("q", volume[i:j]),
+            )
+
+    def get_candles(self, symbol: str, start: date, end: date) -> List[CandleDTO]:
+        candles: List[CandleDTO] = []
+        for batch in self.iter_candle_batches(symbol, start, end):
+            candles.extend(batch.to_dtos())
+        return candles
+
+    def to_stooq_csv(self, symbol: str, end: date) -> bytes:
+        """
+        Full history through `end` in Stooq's daily CSV layout.
+        """
+        ordinals, open_, high, low, close, volume = self.generate(symbol, end)
+        fromordinal = date.fromordinal
+        lines = ["Date,Open,High,Low,Close,Volume"]
+        lines.extend(
+            f"{fromordinal(d).isoformat()},{o:.4f},{h:.4f},{l:.4f},{c:.4f},{v}"
+            for d, o, h, l, c, v in zip(
+                ordinals.tolist(), open_.tolist(), high.tolist(), low.tolist(), close.tolist(), volume.tolist()
+            )
+        )
+        return ("\n".join(lines) + "\n").encode("ascii")
@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import FrozenSet, List, Tuple
+
+# Unscheduled full-day NYSE closures (weather, national days of mourning,
+# ...) since 1980, the start of the supported history.
+SPECIAL_CLOSURES: FrozenSet[date] = frozenset(
+    {
+        date(1985, 9, 27),
+        date(1994, 4, 27),
+        date(2001, 9, 11),
+        date(2001, 9, 12),
+        date(2001, 9, 13),
+        date(2001, 9, 14),
+        date(2004, 6, 11),
+        date(2007, 1, 2),
+        date(2012, 10, 29),
+        date(2012, 10, 30),
+        date(2018, 12, 5),
+        date(2025, 1, 9),
+    }
+)
+
+
+def _easter(year: int) -> date:
+    # Anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    nxt = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    last = nxt - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(d: date) -> date:
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=256)
+def nyse_holidays(year: int) -> FrozenSet[date]:
+    """
+    Regular NYSE full-day holidays for a year (observed dates).
+    """
+    days = set()
+
+    # New Year's Day: a Saturday holiday is not observed on the prior Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() == 6:
+        days.add(new_year + timedelta(days=1))
+    elif new_year.weekday() != 5:
+        days.add(new_year)
+
+    if year >= 1998:
+        days.add(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+    days.add(_nth_weekday(year, 2, 0, 3))  # Washington's Birthday
+    days.add(_easter(year) - timedelta(days=2))  # Good Friday
+    days.add(_last_weekday(year, 5, 0))  # Memorial Day
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    days.add(_observed(date(year, 7, 4)))  # Independence Day
+    days.add(_nth_weekday(year, 9, 0, 1))  # Labor Day
+    days.add(_nth_weekday(year, 11, 3, 4))  # Thanksgiving
+    days.add(_observed(date(year, 12, 25)))  # Christmas
+
+    return frozenset(days)
+
+
+def is_trading_day(d: date) -> bool:
+    if d.weekday() >= 5:
+        return False
+    if d in SPECIAL_CLOSURES:
+        return False
+    return d not in nyse_holidays(d.year)
+
+
+def trading_days(start: date, end: date) -> List[date]:
+    """
+    NYSE trading days in [start, end], ascending.
+    """
+    days: List[date] = []
+    d = start
+    one = timedelta(days=1)
+    while d <= end:
+        if is_trading_day(d):
+            days.append(d)
+        d += one
+    return days
+
+
+def missing_spans(expected: List[date], present: FrozenSet[date] | set) -> List[Tuple[date, date]]:
+    """
+    Collapse the expected trading days that are absent from `present` into
+    contiguous (start, end) spans, where contiguous means no present trading
+    day lies between them.
+    """
+    spans: List[Tuple[date, date]] = []
+    span_start: date | None = None
+    span_end: date | None = None
+
+    for d in expected:
+        if d in present:
+            if span_start is not None:
+                spans.append((span_start, span_end))
+                span_start = None
+            continue
+        if span_start is None:
+            span_start = d
+        span_end = d
+
+    if span_start is not None:
+        spans.append((span_start, span_end))
+
+    return spans
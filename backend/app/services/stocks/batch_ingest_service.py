@@ -0,0 +1,152 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models.stock import Symbol
+from app.services.market_data.candle_columns import CandleColumns
+from app.services.market_data.providers import get_async_market_data_provider
+from app.services.stocks.ingest_service import (
+    fetch_range,
+    plan_missing_spans,
+    record_complete_range,
+    write_candle_batch,
+)
+
+# Fetched candles are flushed to the DB once this many rows are pending.
+WRITE_BATCH_ROWS = 50_000
+
+Span = Tuple[date, date]
+
+
+@dataclass
+class SymbolIngestOutcome:
+    ticker: str
+    inserted: int = 0
+    skipped: int = 0
+    total_seen: int = 0
+    error: Optional[str] = None
+
+
+def _normalize_tickers(symbols: Sequence[str]) -> List[str]:
+    seen = set()
+    tickers: List[str] = []
+    for s in symbols:
+        t = s.strip().upper()
+        if t and t not in seen:
+            seen.add(t)
+            tickers.append(t)
+    return tickers
+
+
+def _plan_all(
+    db: Session, tickers: List[str], start: date, end: date, incremental: bool
+) -> Dict[str, List[Span]]:
+    if not incremental:
+        return {t: [(start, end)] for t in tickers}
+
+    existing = {
+        sym.ticker: sym.id
+        for sym in db.execute(select(Symbol).where(Symbol.ticker.in_(tickers))).scalars()
+    }
+    return {
+        t: plan_missing_spans(db, existing[t], start, end) if t in existing else [(start, end)]
+        for t in tickers
+    }
+
+
+async def _fetch_symbol(
+    provider, ticker: str, spans: List[Span]
+) -> Tuple[str, CandleColumns, Optional[str]]:
+    span_start, span_end = fetch_range(spans)
+    try:
+        candles = await provider.get_candle_columns(symbol=ticker, start=span_start, end=span_end)
+    except Exception as e:
+        return ticker, CandleColumns(), f"{type(e).__name__}: {e}"
+    return ticker, candles.within(spans) if len(spans) > 1 else candles, None
+
+
+def _record_complete(db: Session, tickers: List[str], start: date, end: date) -> None:
+    ids = db.execute(select(Symbol.id).where(Symbol.ticker.in_(tickers))).scalars().all()
+    for symbol_id in ids:
+        record_complete_range(db, symbol_id, start, end)
+    db.commit()
+
+
+async def ingest_many_symbols(
+    db: Session,
+    symbols: Sequence[str],
+    start: date,
+    end: date,
+    *,
+    provider=None,
+    incremental: bool = True,
+    write_batch_rows: int = WRITE_BATCH_ROWS,
+) -> List[SymbolIngestOutcome]:
+    """
+    Ingest candles for many symbols in one call.
+
+    Provider requests run concurrently (bounded by the provider's semaphore
+    and rate limiter), one per symbol over its missing spans. Completed symbols are buffered and written in
+    multi-symbol transactions while the remaining fetches are still in
+    flight. DB work runs in the threadpool so the event loop stays free.
+
+    A failure for one symbol is reported in its outcome and does not abort
+    the batch. Outcomes are returned in input order.
+    """
+    provider = provider or get_async_market_data_provider()
+    tickers = _normalize_tickers(symbols)
+    outcomes: Dict[str, SymbolIngestOutcome] = {t: SymbolIngestOutcome(ticker=t) for t in tickers}
+
+    plans = await run_in_threadpool(_plan_all, db, tickers, start, end, incremental)
+
+    async def flush(batch: Dict[str, CandleColumns]) -> None:
+        try:
+            counts = await run_in_threadpool(write_candle_batch, db, batch)
+        except Exception as e:
+            for t in batch:
+                outcomes[t].error = f"{type(e).__name__}: {e}"
+            return
+        for t, (inserted, skipped) in counts.items():
+            outcomes[t].inserted = inserted
+            outcomes[t].skipped = skipped
+
+    tasks = [
+        asyncio.ensure_future(_fetch_symbol(provider, t, spans))
+        for t, spans in plans.items()
+        if spans
+    ]
+
+    pending: Dict[str, CandleColumns] = {}
+    pending_rows = 0
+
+    for fut in asyncio.as_completed(tasks):
+        ticker, candles, error = await fut
+        outcome = outcomes[ticker]
+        outcome.total_seen = len(candles)
+        if error is not None:
+            outcome.error = error
+            continue
+        if not candles:
+            continue
+
+        pending[ticker] = candles
+        pending_rows += len(candles)
+        if pending_rows >= write_batch_rows:
+            await flush(pending)
+            pending = {}
+            pending_rows = 0
+
+    if pending:
+        await flush(pending)
+
+    # Gaps the provider left in the fetched ranges aren't requested again
+    succeeded = [t for t in tickers if outcomes[t].error is None]
+    if succeeded:
+        await run_in_threadpool(_record_complete, db, succeeded, start, end)
+
+    return [outcomes[t] for t in tickers]
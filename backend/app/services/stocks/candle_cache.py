@@ -0,0 +1,82 @@
+"""
+Process-wide cache of full per-symbol candle series.
+
+The candles, indicators and backtest routes often read the same symbol
+seconds apart. get_candles keeps each symbol's whole history (every
+column, ~48 bytes per candle) in a SizedLRUCache bounded by
+CANDLE_CACHE_MAX_BYTES, and serves any range, order or page as a slice of
+it. Keys are (ticker, data_version): ingestion bumps the version stored
+on the symbol, so the next request, in this worker or any other, reloads
+the series, and the stale one is never read again and is the first to be
+evicted.
+"""
+
+from dataclasses import replace
+from datetime import date, timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.stocks.candle_loader import load_candles
+from app.services.stocks.candle_series import CANDLE_COLUMNS, CandleSeries
+from app.services.stocks.data_version import get_data_version
+from app.utils.sized_cache import SizedLRUCache
+
+_cache: Optional[SizedLRUCache] = None
+
+
+def get_candle_cache() -> SizedLRUCache:
+    """
+    The candle series cache, bounded by CANDLE_CACHE_MAX_BYTES (0 disables
+    it).
+    """
+    global _cache
+    if _cache is None:
+        _cache = SizedLRUCache(settings.CANDLE_CACHE_MAX_BYTES)
+    return _cache
+
+
+def _full_series(db: Session, ticker: str) -> CandleSeries:
+    # Read the version before loading so a series loaded from rows that
+    # predate a concurrent ingest is filed under the old version.
+    key = (ticker, get_data_version(db, ticker))
+    return get_candle_cache().get_or_compute(key, lambda: load_candles(db, ticker, columns=CANDLE_COLUMNS))
+
+
+def get_candles(
+    db: Session,
+    ticker: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    columns: Sequence[str] = ("close",),
+    *,
+    descending: bool = False,
+    after: Optional[date] = None,
+    limit: Optional[int] = None,
+) -> CandleSeries:
+    """
+    load_candles, served from the cached full series of `ticker`. The
+    result shares (read-only) memory with the cache, except for
+    descending pages, which are copied. With the cache disabled this is
+    load_candles.
+    """
+    if get_candle_cache().max_bytes <= 0:
+        return load_candles(
+            db, ticker, start, end, columns, descending=descending, after=after, limit=limit
+        )
+
+    unknown = set(columns) - set(CANDLE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown candle columns: {sorted(unknown)}")
+
+    series = _full_series(db, ticker).between(start, end)
+    if after is not None:
+        one_day = timedelta(days=1)
+        series = series.between(end=after - one_day) if descending else series.between(start=after + one_day)
+    if descending:
+        first = 0 if limit is None else max(len(series) - limit, 0)
+        series = series.select(slice(first, None)).select(slice(None, None, -1))
+    elif limit is not None:
+        series = series.select(slice(limit))
+    return replace(series, **{name: None for name in CANDLE_COLUMNS if name not in columns})
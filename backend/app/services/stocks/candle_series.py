@@ -0,0 +1,112 @@
+"""
+Array-backed candle series.
+
+CandleSeries is the one in-memory shape of a symbol's candle history:
+dates as datetime64[D] and OHLCV as contiguous float64/int64 arrays,
+48 bytes per candle with every column loaded. Slicing (by position or by
+date range) returns views, not copies. Indicator functions, the SMA
+threshold strategy and the backtest engine accept it directly; they also
+still take sequences of CandleDTO-like objects.
+"""
+
+from dataclasses import dataclass, fields, replace
+from datetime import date
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Value columns, in CandleDTO field order after the date
+CANDLE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+_DTYPES = {"open": np.float64, "high": np.float64, "low": np.float64, "close": np.float64, "volume": np.int64}
+
+
+def _column(values: Any, dtype: Any) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=dtype)
+
+
+@dataclass(frozen=True)
+class CandleSeries:
+    """
+    One symbol's candles as parallel arrays aligned with `dates` (oldest
+    first unless loaded descending). Columns that weren't loaded are None.
+    """
+
+    ticker: str
+    dates: np.ndarray
+    open: Optional[np.ndarray] = None
+    high: Optional[np.ndarray] = None
+    low: Optional[np.ndarray] = None
+    close: Optional[np.ndarray] = None
+    volume: Optional[np.ndarray] = None
+
+    def __post_init__(self) -> None:
+        # Coerce once here so every consumer can rely on the dtypes
+        object.__setattr__(self, "dates", _column(self.dates, "datetime64[D]"))
+        for name in CANDLE_COLUMNS:
+            values = getattr(self, name)
+            if values is not None:
+                object.__setattr__(self, name, _column(values, _DTYPES[name]))
+
+    @classmethod
+    def from_candles(cls, ticker: str, candles: Sequence[Any]) -> "CandleSeries":
+        """
+        Build from CandleDTO-like objects (missing volumes become 0).
+        """
+        return cls(
+            ticker,
+            dates=[c.date for c in candles],
+            open=[c.open for c in candles],
+            high=[c.high for c in candles],
+            low=[c.low for c in candles],
+            close=[c.close for c in candles],
+            volume=[c.volume or 0 for c in candles],
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """
+        Names of the loaded columns, "dates" first.
+        """
+        return tuple(f.name for f in fields(self)[1:] if getattr(self, f.name) is not None)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.columns)
+
+    def select(self, index: Union[slice, np.ndarray]) -> "CandleSeries":
+        """
+        The same columns restricted to some rows. Slices are views.
+        """
+        return replace(self, **{name: getattr(self, name)[index] for name in self.columns})
+
+    def between(self, start: Optional[date] = None, end: Optional[date] = None) -> "CandleSeries":
+        """
+        Zero-copy view of the candles dated within [start, end] (either
+        bound optional). The series must be in ascending date order.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, "D"), side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, "D"), side="right"))
+        return self.select(slice(lo, max(lo, hi)))
+
+    def rows(self) -> Iterator[tuple]:
+        """
+        One tuple of Python values per candle holding the loaded columns in
+        `columns` order.
+        """
+        return zip(*(getattr(self, name).tolist() for name in self.columns))
+
+
+Candles = Union[CandleSeries, Sequence[Any]]
+
+
+def close_prices(candles: Candles) -> List[float]:
+    """
+    Closes as Python floats, from a CandleSeries or CandleDTO-like objects.
+    """
+    if isinstance(candles, CandleSeries):
+        return candles.close.tolist()
+    return [float(c.close) for c in candles]
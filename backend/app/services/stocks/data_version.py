@@ -0,0 +1,32 @@
+"""
+Per-symbol data versions.
+
+Ingestion bumps a symbol's version (Symbol.data_version) in the same
+transaction that inserts its rows, and caches of derived data include the
+version in their keys, so anything computed from older candles is simply
+never looked up again. The version lives in the database rather than in
+process memory, so caches in every worker see writes made by any other
+worker or process, at the cost of one indexed lookup per request.
+"""
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db.models.stock import Symbol
+
+
+def get_data_version(db: Session, ticker: str) -> int:
+    """
+    The committed version of `ticker` (0 for unknown symbols).
+    """
+    ticker = ticker.strip().upper()
+    version = db.execute(select(Symbol.data_version).where(Symbol.ticker == ticker)).scalar_one_or_none()
+    return version or 0
+
+
+def bump_data_version(db: Session, symbol_id: int) -> None:
+    """
+    Increments the symbol's version within the caller's transaction. Does
+    not commit.
+    """
+    db.execute(update(Symbol).where(Symbol.id == symbol_id).values(data_version=Symbol.data_version + 1))
@@ -1,13 +1,25 @@
-from datetime import date
-from typing import Tuple, List
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, Optional, Tuple, List
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import func, or_, select
 from sqlalchemy.exc import IntegrityError
 
 from app.db.models.stock import Symbol, Candle
 from app.schemas.stock import CandleDTO
-from app.services.market_data.stooq_provider import StooqProvider
+from app.services.indicators.indicator_state_service import advance_indicator_states, discard_indicator_states
+from app.services.market_data.candle_columns import CandleColumns
+from app.services.market_data.provider_base import MarketDataProvider
+from app.services.market_data.providers import get_market_data_provider
+from app.services.market_data.trading_calendar import missing_spans, trading_days
+from app.services.stocks.data_version import bump_data_version
+
+# Rows per executemany() call in bulk mode. SQLAlchemy packs each call into
+# multi-row INSERT ... RETURNING batches, so this only bounds memory per call.
+BULK_CHUNK_SIZE = 500
+
+logger = logging.getLogger(__name__)
 
 
 def _get_or_create_symbol(db: Session, ticker: str) -> Symbol:
@@ -20,33 +32,102 @@ def _get_or_create_symbol(db: Session, ticker: str) -> Symbol:
     return sym
 
 
-def ingest_symbol_candles(
-    db: Session,
-    symbol: str,
-    start: date,
-    end: date,
-    provider: StooqProvider | None = None,
-) -> Tuple[int, int, int]:
+def plan_missing_spans(db: Session, symbol_id: int, start: date, end: date) -> List[Tuple[date, date]]:
     """
-    Fetch candles from provider and insert into DB.
-    Returns: (inserted, skipped, total_seen)
-    Skipped = duplicates blocked by UNIQUE(symbol_id, date)
+    Date spans within [start, end] that still need to be fetched for a symbol.
+
+    Compares the dates of the symbol's stored candles against the
+    trading-day calendar. Days inside the symbol's recorded complete range
+    (see record_complete_range) count as present, so gaps the provider
+    could not fill are not asked for again, and only the stored dates
+    outside that range are loaded. Days after today are never requested.
     """
-    provider = provider or StooqProvider()
-    candles: List[CandleDTO] = provider.get_candles(symbol=symbol, start=start, end=end)
+    end = min(end, date.today())
+    if start > end:
+        return []
 
-    if not candles:
-        return (0, 0, 0)
+    complete_from, complete_through = db.execute(
+        select(Symbol.complete_from, Symbol.complete_through).where(Symbol.id == symbol_id)
+    ).one()
 
-    canonical_ticker = symbol.strip().upper()
-    sym = _get_or_create_symbol(db, canonical_ticker)
+    query = select(Candle.date).where(Candle.symbol_id == symbol_id, Candle.date >= start, Candle.date <= end)
+    if complete_from is not None:
+        query = query.where(or_(Candle.date < complete_from, Candle.date > complete_through))
+    present = set(db.execute(query).scalars())
+
+    expected = trading_days(start, end)
+    if complete_from is not None:
+        present.update(d for d in expected if complete_from <= d <= complete_through)
+    return missing_spans(expected, present)
+
+
+def record_complete_range(db: Session, symbol_id: int, start: date, end: date) -> None:
+    """
+    After a successful ingest over [start, end], mark it as complete
+    between the symbol's first and last stored candles: later days may
+    still be published, and an empty answer for earlier days may be a soft
+    provider error rather than the symbol's listing date, so those stay
+    missing. Merged with the recorded range when no trading day separates
+    them, otherwise it replaces it. Does not commit.
+    """
+    first, last = db.execute(
+        select(func.min(Candle.date), func.max(Candle.date)).where(Candle.symbol_id == symbol_id)
+    ).one()
+    if last is None:
+        return
+    start = max(start, first)
+    through = min(end, date.today(), last)
+    if through < start:
+        return
+
+    sym = db.get(Symbol, symbol_id)
+    if sym.complete_from is not None:
+        lo, hi = sorted([(start, through), (sym.complete_from, sym.complete_through)])
+        if not trading_days(lo[1] + timedelta(days=1), hi[0] - timedelta(days=1)):
+            start, through = lo[0], max(lo[1], hi[1])
+    sym.complete_from = start
+    sym.complete_through = through
+
+
+def fetch_range(spans: List[Tuple[date, date]]) -> Tuple[date, date]:
+    """
+    The one range fetched for a symbol's missing spans: from the first
+    span's start to the last one's end. Rows outside the spans are dropped
+    before writing (CandleColumns.within).
+    """
+    return spans[0][0], spans[-1][1]
 
+
+def _insert_on_conflict_do_nothing(db: Session):
+    """
+    Returns a dialect-native INSERT ... ON CONFLICT DO NOTHING for candles,
+    or None when the bound dialect doesn't support it.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+
+    return (
+        insert(Candle)
+        .on_conflict_do_nothing(index_elements=["symbol_id", "date"])
+        .returning(Candle.date)
+    )
+
+
+def _insert_rows_per_row(db: Session, symbol_id: int, candles: List[CandleDTO]) -> Tuple[int, int]:
+    """
+    Legacy path: one transaction per candle, duplicates detected via IntegrityError.
+    """
     inserted = 0
     skipped = 0
 
     for c in candles:
         row = Candle(
-            symbol_id=sym.id,
+            symbol_id=symbol_id,
             date=c.date,
             open=c.open,
             high=c.high,
@@ -62,4 +143,218 @@ def ingest_symbol_candles(
             db.rollback()
             skipped += 1
 
-    return (inserted, skipped, len(candles))
+    return inserted, skipped
+
+
+def _bulk_insert(db: Session, stmt, symbol_id: int, candles: CandleColumns) -> Tuple[int, Optional[date]]:
+    """
+    Executes the ON CONFLICT DO NOTHING insert for one symbol without
+    committing. Returns the number of rows actually inserted (via RETURNING),
+    which stays exact even when the batch itself contains repeated dates,
+    and the earliest inserted date.
+    """
+    fromordinal = date.fromordinal
+    inserted = 0
+    first_new: Optional[date] = None
+    for i in range(0, len(candles), BULK_CHUNK_SIZE):
+        j = min(i + BULK_CHUNK_SIZE, len(candles))
+        rows: List[Dict[str, Any]] = [
+            {
+                "symbol_id": symbol_id,
+                "date": fromordinal(candles.ordinals[k]),
+                "open": candles.open[k],
+                "high": candles.high[k],
+                "low": candles.low[k],
+                "close": candles.close[k],
+                "volume": candles.volume[k],
+            }
+            for k in range(i, j)
+        ]
+        result = db.execute(stmt, rows)
+        new_dates = result.scalars().all()
+        if new_dates:
+            inserted += len(new_dates)
+            earliest = min(new_dates)
+            if first_new is None or earliest < first_new:
+                first_new = earliest
+    return inserted, first_new
+
+
+def _iter_provider_batches(provider, symbol: str, start: date, end: date) -> Iterator[CandleColumns]:
+    """
+    Streams column batches from providers that support it; otherwise wraps
+    the provider's get_candles() result in a single batch.
+    """
+    if hasattr(provider, "iter_candle_batches"):
+        yield from provider.iter_candle_batches(symbol=symbol, start=start, end=end)
+        return
+    candles = provider.get_candles(symbol=symbol, start=start, end=end)
+    if candles:
+        yield CandleColumns.from_dtos(candles)
+
+
+def _get_or_create_symbols(db: Session, tickers: List[str]) -> Dict[str, int]:
+    ids = {
+        sym.ticker: sym.id
+        for sym in db.execute(select(Symbol).where(Symbol.ticker.in_(tickers))).scalars()
+    }
+    missing = [t for t in tickers if t not in ids]
+    if missing:
+        new_symbols = [Symbol(ticker=t, name=None) for t in missing]
+        db.add_all(new_symbols)
+        db.commit()
+        for sym in new_symbols:
+            ids[sym.ticker] = sym.id
+    return ids
+
+
+def _earliest(a: Optional[date], b: Optional[date]) -> Optional[date]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+def _insert_per_row_columns(db: Session, symbol_id: int, candles: CandleColumns) -> Tuple[int, Optional[date]]:
+    """
+    Per-row path for a column batch. The earliest inserted date isn't
+    tracked row by row, so the batch's earliest date stands in for it.
+    """
+    inserted, _ = _insert_rows_per_row(db, symbol_id, candles.to_dtos())
+    first_new = date.fromordinal(min(candles.ordinals)) if inserted else None
+    return inserted, first_new
+
+
+def _after_insert(db: Session, symbol_id: int, first_new: Optional[date]) -> None:
+    """
+    Bookkeeping once new candles (and the symbol's version bump) are
+    committed: advance the persisted indicator states. The candles are
+    already stored, so a failure here doesn't fail the write; the states
+    are discarded instead and rebuilt on their next lookup.
+    """
+    try:
+        advance_indicator_states(db, symbol_id, first_new)
+    except Exception:
+        db.rollback()
+        logger.exception("Advancing indicator states failed for symbol %s; discarding them", symbol_id)
+        try:
+            discard_indicator_states(db, symbol_id)
+        except Exception:
+            db.rollback()
+            logger.exception("Discarding indicator states failed for symbol %s", symbol_id)
+
+
+def write_candle_batch(db: Session, batch: Dict[str, CandleColumns]) -> Dict[str, Tuple[int, int]]:
+    """
+    Writes candles for several symbols in a single transaction, bumping
+    the data version of each symbol that got rows in the same transaction.
+    Returns {ticker: (inserted, skipped)}.
+    """
+    ids = _get_or_create_symbols(db, list(batch))
+
+    stmt = _insert_on_conflict_do_nothing(db)
+    results: Dict[str, Tuple[int, Optional[date]]] = {}
+    try:
+        for ticker, candles in batch.items():
+            if stmt is None:
+                results[ticker] = _insert_per_row_columns(db, ids[ticker], candles)
+            else:
+                results[ticker] = _bulk_insert(db, stmt, ids[ticker], candles)
+            if results[ticker][0]:
+                bump_data_version(db, ids[ticker])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    counts: Dict[str, Tuple[int, int]] = {}
+    for ticker, (inserted, first_new) in results.items():
+        counts[ticker] = (inserted, len(batch[ticker]) - inserted)
+        if inserted:
+            _after_insert(db, ids[ticker], first_new)
+    return counts
+
+
+def ingest_symbol_candles(
+    db: Session,
+    symbol: str,
+    start: date,
+    end: date,
+    provider: MarketDataProvider | None = None,
+    bulk: bool = True,
+    incremental: bool = True,
+) -> Tuple[int, int, int]:
+    """
+    Fetch candles from provider and insert into DB.
+    Returns: (inserted, skipped, total_seen)
+    Skipped = duplicates blocked by UNIQUE(symbol_id, date)
+
+    incremental=True only asks the provider for the spans that are missing
+    from the DB (see plan_missing_spans), in one call from the first span to
+    the last, keeping only the rows inside them; incremental=False refetches
+    the whole range. Either way the range between the first and last stored
+    candles is then recorded as complete (see record_complete_range), so
+    gaps the provider didn't fill there aren't requested again.
+
+    Provider data is consumed as CandleColumns batches and written as it
+    arrives, so memory stays flat for long histories. bulk=True writes
+    everything in one transaction using INSERT ... ON CONFLICT DO NOTHING
+    (SQLite/Postgres); bulk=False, or any other dialect, uses the per-row
+    commit path.
+
+    Inserting any rows bumps the symbol's data version (in the insert
+    transaction on the bulk path), which invalidates cached candles and
+    indicator results for it in every worker, and advances its persisted indicator
+    states (see advance_indicator_states).
+    """
+    provider = provider or get_market_data_provider()
+    canonical_ticker = symbol.strip().upper()
+
+    sym = db.execute(select(Symbol).where(Symbol.ticker == canonical_ticker)).scalar_one_or_none()
+    spans: List[Tuple[date, date]] = [(start, end)]
+    if incremental and sym is not None:
+        spans = plan_missing_spans(db, sym.id, start, end)
+
+    stmt = _insert_on_conflict_do_nothing(db) if bulk else None
+    inserted = 0
+    total_seen = 0
+    first_new: Optional[date] = None
+
+    try:
+        if spans:
+            span_start, span_end = fetch_range(spans)
+            for batch in _iter_provider_batches(provider, symbol, span_start, span_end):
+                if len(spans) > 1:
+                    batch = batch.within(spans)
+                if not len(batch):
+                    continue
+                if sym is None:
+                    sym = _get_or_create_symbol(db, canonical_ticker)
+
+                total_seen += len(batch)
+                if stmt is not None:
+                    batch_inserted, batch_first = _bulk_insert(db, stmt, sym.id, batch)
+                else:
+                    batch_inserted, batch_first = _insert_per_row_columns(db, sym.id, batch)
+                inserted += batch_inserted
+                first_new = _earliest(first_new, batch_first)
+
+        if inserted:
+            bump_data_version(db, sym.id)
+        if sym is not None:
+            record_complete_range(db, sym.id, start, end)
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Per-row inserts are committed as they go, so they still need the
+        # bump; a bulk rollback leaves nothing behind.
+        if inserted and stmt is None:
+            bump_data_version(db, sym.id)
+            db.commit()
+        raise
+
+    if inserted:
+        _after_insert(db, sym.id, first_new)
+
+    return (inserted, total_seen - inserted, total_seen)
@@ -0,0 +1,129 @@
+"""
+Aligned close prices of a basket of symbols.
+
+PriceMatrix holds one row per date on which any of the symbols has a
+candle and one column per symbol, NaN where that symbol has no candle
+(before it lists, after it delists, or a missing bar). load_price_matrix
+builds it from the Candle table in one query. Rows are read straight off
+the DBAPI cursor in chunks and scattered into the matrix: at 500 symbols
+x 20 years, building a SQLAlchemy Row per candle would cost more than the
+query itself, and holding every row at once would take several times the
+matrix's memory.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import String, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.db.models.stock import Candle, Symbol
+from app.services.stocks.candle_series import CandleSeries
+
+# Rows fetched from the cursor per chunk
+_FETCH_ROWS = 100_000
+
+
+@dataclass(frozen=True)
+class PriceMatrix:
+    """
+    `close` is (len(dates), len(tickers)) float64, dates ascending.
+    Every column has at least one candle.
+    """
+
+    dates: np.ndarray
+    tickers: Tuple[str, ...]
+    close: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def valid(self) -> np.ndarray:
+        """
+        True where a symbol has a candle.
+        """
+        return ~np.isnan(self.close)
+
+    def filled(self) -> np.ndarray:
+        """
+        Closes carried forward over missing bars; NaN before a symbol's
+        first candle.
+        """
+        rows = np.where(self.valid, np.arange(len(self))[:, None], 0)
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        return np.take_along_axis(self.close, rows, axis=0)
+
+    def series(self, ticker: str) -> CandleSeries:
+        """
+        One symbol's own candles (missing bars dropped).
+        """
+        column = self.close[:, self.tickers.index(ticker)]
+        at = ~np.isnan(column)
+        return CandleSeries(ticker, self.dates[at], close=column[at])
+
+
+def load_price_matrix(
+    db: Session,
+    tickers: Sequence[str],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> PriceMatrix:
+    """
+    Closes of `tickers` within [start, end] (either bound optional), columns
+    in the order given. Unknown tickers and those without candles in range
+    get no column.
+    """
+    wanted = list(dict.fromkeys(tickers))
+    ids: Dict[int, str] = dict(db.execute(select(Symbol.id, Symbol.ticker).where(Symbol.ticker.in_(wanted))).all())
+
+    query = select(type_coerce(Candle.date, String), Candle.symbol_id, Candle.close).where(
+        Candle.symbol_id.in_(list(ids))
+    )
+    if start is not None:
+        query = query.where(Candle.date >= start)
+    if end is not None:
+        query = query.where(Candle.date <= end)
+
+    # Dates as the driver returns them (ISO strings on SQLite), numbered in
+    # order of first appearance and sorted once at the end
+    day_number: Dict[Any, int] = {}
+    chunks: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+    with db.connection().execute(query) as result:
+        cursor = result.cursor
+        while True:
+            rows = cursor.fetchmany(_FETCH_ROWS)
+            if not rows:
+                break
+            n = len(rows)
+            chunks.append(
+                (
+                    np.fromiter((day_number.setdefault(r[0], len(day_number)) for r in rows), np.int64, n),
+                    np.fromiter((r[1] for r in rows), np.int64, n),
+                    np.fromiter((r[2] for r in rows), np.float64, n),
+                )
+            )
+
+    days = np.array(list(day_number), dtype="datetime64[D]")
+    order = np.argsort(days)
+    row_of = np.empty(len(days), dtype=np.int64)
+    row_of[order] = np.arange(len(days))
+
+    if chunks:
+        day_index, symbol_id, close = (np.concatenate(part) for part in zip(*chunks))
+    else:
+        day_index = symbol_id = np.zeros(0, dtype=np.int64)
+        close = np.zeros(0)
+
+    # Columns in request order, for the symbols that have candles
+    present = np.bincount(symbol_id, minlength=max(ids, default=0) + 1) > 0
+    position = {ticker: p for p, ticker in enumerate(wanted)}
+    columns = [i for i in sorted(ids, key=lambda i: position[ids[i]]) if present[i]]
+    column_of = np.full(len(present), -1, dtype=np.int64)
+    column_of[columns] = np.arange(len(columns))
+
+    matrix = np.full((len(days), len(columns)), np.nan)
+    matrix[row_of[day_index], column_of[symbol_id]] = close
+    return PriceMatrix(days[order], tuple(ids[i] for i in columns), matrix)
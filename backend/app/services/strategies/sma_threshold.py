@@ -1,21 +1,50 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import List, Optional, Sequence
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from app.schemas.strategy import SignalPoint
+from app.services.indicators.kernels import sma_array
+from app.services.stocks.candle_series import CandleSeries
+
+REASONS = {1: "close > sma", -1: "close <= sma"}
+
+
+def sma_threshold_signal_array(
+    closes: Union[Sequence[float], np.ndarray],
+    sma: Union[Sequence[Optional[float]], np.ndarray],
+) -> np.ndarray:
+    """
+    The state-change signals of generate_sma_threshold_signals as a dense
+    int8 array, one entry per candle (0 where there is no signal).
+    """
+    if len(closes) != len(sma):
+        raise ValueError("closes, sma must be same length")
+
+    # None converts to NaN under a float dtype
+    sma_values = np.asarray(sma, dtype=np.float64)
+    active = np.flatnonzero(~np.isnan(sma_values))
+    long = np.asarray(closes, dtype=np.float64)[active] > sma_values[active]
+
+    # Position changes, starting flat
+    changed = long != np.concatenate(([False], long[:-1]))
+    signals = np.zeros(len(sma_values), dtype=np.int8)
+    signals[active[changed]] = np.where(long[changed], 1, -1)
+    return signals
 
 
 def generate_sma_threshold_signals(
-    dates: Sequence[date],
-    closes: Sequence[float],
-    sma: Sequence[Optional[float]],
+    dates: Union[Sequence[date], np.ndarray],
+    closes: Union[Sequence[float], np.ndarray],
+    sma: Union[Sequence[Optional[float]], np.ndarray],
 ) -> List[SignalPoint]:
     """
     Long-only SMA threshold strategy.
 
     Rules:
-      - Ignore periods where SMA is None
+      - Ignore periods where SMA is None (or NaN in an array)
       - If close > sma  -> go long
       - Else            -> go flat
 
@@ -27,28 +56,58 @@ def generate_sma_threshold_signals(
     if len(closes) != n or len(sma) != n:
         raise ValueError("dates, closes, sma must be same length")
 
+    day = np.asarray(dates, dtype="datetime64[D]")
     # Ensure dates are sorted ascending (backtest assumes chronological order)
-    for i in range(n - 1):
-        if dates[i] > dates[i + 1]:
-            raise ValueError("dates must be sorted ascending")
+    if n > 1 and bool(np.any(day[1:] < day[:-1])):
+        raise ValueError("dates must be sorted ascending")
 
-    signals: List[SignalPoint] = []
-    position = 0  # 0=flat, 1=long
+    dense = sma_threshold_signal_array(closes, sma)
+    at = np.flatnonzero(dense)
+    return [
+        SignalPoint(date=d, signal=sig, reason=REASONS[sig])
+        for d, sig in zip(day[at].tolist(), dense[at].tolist())
+    ]
 
-    for i in range(n):
-        s = sma[i]
-        if s is None:
-            continue
 
-        new_position = 1 if closes[i] > s else 0
-        if new_position == position:
-            continue
+def sma_threshold_signals(candles: CandleSeries, sma_period: int) -> List[SignalPoint]:
+    """
+    Signals for a CandleSeries with the SMA computed from its closes.
+    """
+    return generate_sma_threshold_signals(candles.dates, candles.close, sma_array(candles.close, sma_period))
 
-        if new_position == 1:
-            signals.append(SignalPoint(date=dates[i], signal=1, reason="close > sma"))
-        else:
-            signals.append(SignalPoint(date=dates[i], signal=-1, reason="close <= sma"))
 
-        position = new_position
+def sma_threshold_signal_arrays(candles: CandleSeries, sma_period: int) -> Tuple[np.ndarray, Dict[int, str]]:
+    """
+    Dense signals for a CandleSeries and each signal's reason keyed by
+    candle index, as run_long_only_vectorized takes them.
+    """
+    dense = sma_threshold_signal_array(candles.close, sma_array(candles.close, sma_period))
+    return dense, sma_threshold_reasons(dense)
 
-    return signals
+
+def sma_threshold_reasons(signals: np.ndarray) -> Dict[int, str]:
+    """
+    The reason of each signal in a dense array, keyed by candle index.
+    """
+    at = np.flatnonzero(signals)
+    return {i: REASONS[sig] for i, sig in zip(at.tolist(), signals[at].tolist())}
+
+
+def sma_threshold_signal_matrix(close: np.ndarray, sma_period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dense int8 signals and signal strength (close / sma - 1) for a (dates x
+    symbols) close matrix with NaN where a symbol has no candle. Each
+    column's SMA runs over that symbol's own candles, so a missing bar
+    neither breaks nor pads its window; missing bars get no signal and NaN
+    strength.
+    """
+    signals = np.zeros(close.shape, dtype=np.int8)
+    strength = np.full(close.shape, np.nan)
+    # Contiguous per-symbol columns
+    for column, signal_column, strength_column in zip(close.T.copy(), signals.T, strength.T):
+        at = np.flatnonzero(~np.isnan(column))
+        closes = column[at]
+        sma = sma_array(closes, sma_period)
+        signal_column[at] = sma_threshold_signal_array(closes, sma)
+        strength_column[at] = closes / sma - 1.0
+    return signals, strength
@@ -0,0 +1,104 @@
+"""
+Shape-preserving downsampling for chart responses.
+
+A chart a thousand pixels wide can't show more points than that, so routes
+that take `max_points` thin their series here after all computation has
+run at full resolution:
+
+- lttb_indices picks which rows of a line series to keep
+  (Largest-Triangle-Three-Buckets), keeping peaks and troughs that
+  every-nth sampling would drop.
+- ohlc_buckets merges consecutive candles into at most `max_points`
+  candles, so each bucket still spans its rows' full high-low range.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Smallest max_points LTTB can honour: the first point, the last point and
+# at least one bucket between them
+MIN_POINTS = 3
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Sorted indices of at most `max_points` rows that keep the visual shape
+    of y over x. The first and last rows are always kept. y must be finite.
+
+    Rows 1..n-2 are split into max_points - 2 equal buckets; from each
+    bucket the row forming the largest triangle with the row kept from the
+    previous bucket and the mean of the next bucket is kept.
+    """
+    n = len(y)
+    if max_points < MIN_POINTS:
+        raise ValueError(f"max_points must be >= {MIN_POINTS}")
+    if n <= max_points:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = max_points - 2
+    # edges[i]:edges[i + 1] is bucket i; edges[-1] == n - 1, the last row
+    edges = (np.arange(buckets + 1) * ((n - 2) / buckets)).astype(np.int64) + 1
+
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(buckets):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 <= buckets else n
+        cx = x[next_lo:next_hi].mean()
+        cy = y[next_lo:next_hi].mean()
+        ax, ay = x[a], y[a]
+        # Twice the triangle area; the constant factor doesn't change argmax
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def bucket_starts(n: int, max_points: int) -> np.ndarray:
+    """
+    First row of each of min(n, max_points) consecutive, near-equal buckets.
+    """
+    if max_points < 1:
+        raise ValueError("max_points must be >= 1")
+    if n <= max_points:
+        return np.arange(n)
+    return (np.arange(max_points) * (n / max_points)).astype(np.int64)
+
+
+def ohlc_buckets(
+    opens: Sequence[float],
+    highs: Sequence[float],
+    lows: Sequence[float],
+    closes: Sequence[float],
+    volumes: Sequence[Optional[int]],
+    max_points: int,
+) -> Tuple[np.ndarray, List[float], List[float], List[float], List[float], List[Optional[int]]]:
+    """
+    Merge chronological candles into at most `max_points` candles.
+
+    Returns (starts, opens, highs, lows, closes, volumes): `starts` are
+    the indices of each bucket's first candle (its date), open is that
+    candle's open, close the last candle's close, high/low the extremes
+    over the bucket and volume the sum of known volumes (None if the
+    bucket has none).
+    """
+    starts = bucket_starts(len(closes), max_points)
+    if len(starts) == len(closes):
+        return starts, list(opens), list(highs), list(lows), list(closes), list(volumes)
+
+    ends = np.append(starts[1:], len(closes)) - 1
+    known = np.fromiter((v is not None for v in volumes), dtype=np.int64, count=len(volumes))
+    volume_sums = np.add.reduceat(np.array([v or 0 for v in volumes], dtype=np.int64), starts)
+    volume_counts = np.add.reduceat(known, starts)
+    return (
+        starts,
+        np.asarray(opens, dtype=np.float64)[starts].tolist(),
+        np.maximum.reduceat(np.asarray(highs, dtype=np.float64), starts).tolist(),
+        np.minimum.reduceat(np.asarray(lows, dtype=np.float64), starts).tolist(),
+        np.asarray(closes, dtype=np.float64)[ends].tolist(),
+        [int(s) if c else None for s, c in zip(volume_sums.tolist(), volume_counts.tolist())],
+    )
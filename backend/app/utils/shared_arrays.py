@@ -0,0 +1,73 @@
+import traceback
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+import numpy as np
+
+# (block name, [(array name, dtype, shape, offset), ...]); picklable
+SharedSpec = Tuple[str, List[Tuple[str, str, Tuple[int, ...], int]]]
+
+
+class SharedArrays:
+    """
+    Named NumPy arrays copied into one SharedMemory block. The creating
+    process owns the block and unlinks it on close(); worker processes
+    reach the arrays through call_with_arrays(spec, ...).
+    """
+
+    def __init__(self, arrays: Mapping[str, np.ndarray]):
+        layout = []
+        offset = 0
+        for name, array in arrays.items():
+            layout.append((name, array.dtype.str, array.shape, offset))
+            # Keep every array 8-byte aligned
+            offset += -(-array.nbytes // 8) * 8
+        self._shm = SharedMemory(create=True, size=max(offset, 1))
+        self.spec: SharedSpec = (self._shm.name, layout)
+        for view, array in zip(_views(self._shm, layout).values(), arrays.values()):
+            view[...] = array
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _views(shm: SharedMemory, layout: List[Tuple[str, str, Tuple[int, ...], int]]) -> Dict[str, np.ndarray]:
+    return {
+        name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+        for name, dtype, shape, offset in layout
+    }
+
+
+def call_with_arrays(spec: SharedSpec, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    fn(arrays, *args) with the arrays of `spec` attached as views. The
+    block is detached when fn returns, so fn must not return the views.
+
+    If fn raises, the locals of its frames are cleared first: the traceback
+    would otherwise keep views alive and make detaching the block raise a
+    BufferError in place of fn's error.
+    """
+    name, layout = spec
+    shm = SharedMemory(name=name)
+    try:
+        arrays = _views(shm, layout)
+        try:
+            return fn(arrays, *args)
+        except BaseException as exc:
+            traceback.clear_frames(exc.__traceback__)
+            raise
+        finally:
+            del arrays
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # A view is still referenced; the mapping is released with it
+            pass
@@ -0,0 +1,82 @@
+"""
+Benchmark: per-row vs bulk candle ingestion.
+
+Ingests a 10k-candle synthetic series into a fresh on-disk SQLite database
+with each path and reports rows/sec. No network access needed.
+
+Usage:
+    cd backend
+    python -m scripts.bench_ingest [num_candles]
+"""
+
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.schemas.stock import CandleDTO
+from app.services.stocks.ingest_service import ingest_symbol_candles
+
+
+class SyntheticProvider:
+    def __init__(self, n: int):
+        first = date(1990, 1, 1)
+        self.candles = [
+            CandleDTO(
+                date=first + timedelta(days=i),
+                open=100.0 + (i % 50),
+                high=101.0 + (i % 50),
+                low=99.0 + (i % 50),
+                close=100.5 + (i % 50),
+                volume=1_000_000 + i,
+            )
+            for i in range(n)
+        ]
+
+    def get_candles(self, symbol, start, end):
+        return self.candles
+
+
+def _run(n: int, bulk: bool) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+        provider = SyntheticProvider(n)
+        try:
+            t0 = time.perf_counter()
+            inserted, skipped, total_seen = ingest_symbol_candles(
+                db, "BENCH", date(1900, 1, 1), date(2100, 1, 1), provider=provider, bulk=bulk, incremental=False
+            )
+            elapsed = time.perf_counter() - t0
+        finally:
+            db.close()
+            engine.dispose()
+
+    assert (inserted, skipped, total_seen) == (n, 0, n)
+    return elapsed
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    print(f"=== Ingest benchmark ({n} candles, on-disk SQLite) ===\n")
+
+    results = {}
+    for label, bulk in (("per-row", False), ("bulk", True)):
+        elapsed = _run(n, bulk)
+        results[label] = elapsed
+        print(f"{label:>8}: {elapsed:8.3f} s  {n / elapsed:12,.0f} rows/sec")
+
+    print(f"\nSpeedup: {results['per-row'] / results['bulk']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
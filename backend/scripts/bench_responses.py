@@ -0,0 +1,141 @@
+"""
+Benchmark: row-oriented vs columnar (format=columnar) JSON responses, and
+the Arrow IPC / MessagePack encodings of the columnar data.
+
+Ingests a synthetic daily series into an in-memory SQLite database and
+requests /stocks/{symbol}/candles, /indicators/{symbol} and
+/backtest/{symbol} in each format through the ASGI app, reporting payload
+size and request time relative to rows. Binary encodings whose library
+is not installed (406) are skipped. Authentication is bypassed with a
+dependency override. No network access needed.
+
+Usage:
+    cd backend
+    python -m scripts.bench_responses [years]   # 20 years ~ 5,000 candles
+"""
+
+import gc
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.deps import get_current_user, get_db
+from app.api.responses import ARROW_STREAM, MSGPACK
+from app.db.base import Base
+from app.main import app
+from app.services.indicators import indicator_cache
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks.ingest_service import ingest_symbol_candles
+from app.utils.sized_cache import SizedLRUCache
+
+REPEATS = 7
+
+# label -> (query suffix, request headers)
+VARIANTS = {
+    "rows": ("&format=rows", None),
+    "columnar": ("&format=columnar", None),
+    "arrow": ("", {"Accept": ARROW_STREAM}),
+    "msgpack": ("", {"Accept": MSGPACK}),
+}
+
+
+def make_client(years: int) -> TestClient:
+    """
+    TestClient over an in-memory DB holding `years` of BENCH candles
+    (~252 rows per year), with auth overridden.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    db = Session()
+    end = date(2024, 12, 31)
+    ingest_symbol_candles(
+        db, "BENCH", date(end.year - years + 1, 1, 1), end, provider=SyntheticProvider(seed=1)
+    )
+    db.close()
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: None
+    return TestClient(app)
+
+
+def timed_get(client: TestClient, url: str, headers=None):
+    """
+    (median seconds over REPEATS, response) for a GET. The collector is
+    paused while timing so a cycle collection doesn't land in one sample.
+    """
+    times = []
+    resp = None
+    for _ in range(REPEATS):
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            resp = client.get(url, headers=headers)
+            times.append(time.perf_counter() - t0)
+        finally:
+            gc.enable()
+        if resp.status_code == 406:
+            break
+        assert resp.status_code == 200, (url, resp.status_code, resp.text[:200])
+    return sorted(times)[len(times) // 2], resp
+
+
+def main() -> None:
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # Keep indicator results cached so every format times serialization,
+    # not kernel work
+    indicator_cache._cache = SizedLRUCache(max_bytes=64 * 1024 * 1024)
+    client = make_client(years)
+
+    start, end = f"{2024 - years + 1}-01-01", "2024-12-31"
+    routes = {
+        "candles": "/stocks/BENCH/candles?limit=5000",
+        "indicators": f"/indicators/BENCH?start={start}&end={end}&sma_period=20&ema_period=20&rsi_period=14",
+        "backtest": f"/backtest/BENCH?start={start}&end={end}&sma_period=20",
+    }
+
+    print(f"=== Response format benchmark ({years} years of daily candles) ===\n")
+    print(f"{'route':>11} {'format':>9} {'bytes':>10} {'ms':>8} {'smaller':>8} {'faster':>7}")
+    for name, url in routes.items():
+        baseline = None
+        for fmt, (suffix, headers) in VARIANTS.items():
+            elapsed, resp = timed_get(client, url + suffix, headers)
+            if resp.status_code == 406:
+                print(f"{name:>11} {fmt:>9} {'(not installed)':>19}")
+                continue
+            size = len(resp.content)
+            baseline = baseline or (size, elapsed)
+            print(
+                f"{name:>11} {fmt:>9} {size:>10,} {elapsed * 1000:>8.1f} "
+                f"{baseline[0] / size:>7.1f}x {baseline[1] / elapsed:>6.1f}x"
+            )
+        print()
+
+    app.dependency_overrides.clear()
+    indicator_cache._cache = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Local stand-in for Stooq's daily CSV endpoint, backed by SyntheticProvider.
+
+Serves GET /q/d/l/?s=<symbol>&i=d with the same CSV layout Stooq uses
+("No data" for unknown intervals, and for the ticker NODATA as for an
+unlisted symbol), plus ETag / If-None-Match
+so the provider cache revalidation path can be exercised offline.
+
+Point the app at it with:
+    STOOQ_BASE_URL=http://127.0.0.1:8765/q/d/l/
+
+Usage:
+    cd backend
+    python -m scripts.stooq_standin [port] [seed]
+"""
+
+import sys
+import threading
+import zlib
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.market_data.synthetic_provider import SyntheticProvider
+
+PATH = "/q/d/l/"
+NO_DATA = b"No data"
+# Ticker answered with NO_DATA, standing in for an unlisted symbol
+NO_DATA_TICKER = "nodata"
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients stop reading once they are past `end`; that's expected
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def make_handler(provider: SyntheticProvider, end: date):
+    class StooqStandinHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path.rstrip("/") != PATH.rstrip("/"):
+                self._send(404, b"Not found")
+                return
+
+            query = parse_qs(url.query)
+            symbol = (query.get("s") or [""])[0].strip()
+            interval = (query.get("i") or ["d"])[0]
+            if not symbol or interval != "d":
+                self._send(200, NO_DATA)
+                return
+
+            # Strip the market suffix the way Stooq keys its listings
+            ticker = symbol.split(".", 1)[0]
+            if ticker.lower() == NO_DATA_TICKER:
+                self._send(200, NO_DATA)
+                return
+            body = provider.to_stooq_csv(ticker, end)
+            etag = f'"{zlib.crc32(body):08x}-{len(body)}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", etag=etag)
+                return
+            self._send(200, body, etag=etag)
+
+        def _send(self, status: int, body: bytes, etag: str | None = None):
+            self.send_response(status)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StooqStandinHandler
+
+
+def start_standin(
+    port: int = 0, seed: int = 0, end: date | None = None, host: str = "127.0.0.1"
+) -> StandinServer:
+    """
+    Start the stand-in on a daemon thread. port=0 picks a free port; the
+    base URL is f"http://{host}:{server.server_port}{PATH}". Call
+    server.shutdown() when done.
+    """
+    provider = SyntheticProvider(seed=seed)
+    server = StandinServer((host, port), make_handler(provider, end or date.today()))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def base_url(server: StandinServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{PATH}"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    server = start_standin(port=port, seed=seed)
+    print(f"Stooq stand-in serving synthetic data at {base_url(server)} (seed={seed})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,181 @@
+"""
+Test script for parameter-sweep backtests.
+Checks that POST /backtest/{symbol}/sweep returns, for every combination,
+the metrics /backtest/{symbol} gives for it, ranked by the requested
+metric; that the worker pool (shared memory) gives identical results to
+an in-process sweep and leaks no shared memory; that a dead worker gets
+a 503 and the next request a fresh pool; that bad grids are rejected; and that a 500-point grid over 20 years finishes in seconds.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import os
+import time
+from datetime import date
+
+from app.api.deps import get_db
+from app.api.routes.backtest import MAX_SWEEP_COMBINATIONS, POOL_FAILED
+from app.core.config import settings
+from app.main import app
+from app.services.backtesting import sweep
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks.ingest_service import ingest_symbol_candles
+from scripts.test_columnar_responses import _make_client
+
+SWEEP = "/backtest/TSLA/sweep"
+GRID = {
+    "start": "2022-03-01",
+    "end": "2023-12-31",
+    "sma_period": {"start": 5, "stop": 60, "step": 5},
+    "initial_cash": [10_000.0, 2_500.0],
+}
+
+
+def _shm_blocks():
+    # SharedMemory blocks (the pool's own semaphores live there too)
+    if not os.path.isdir("/dev/shm"):
+        return set()
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+def test_backtest_sweep():
+    print("=== Testing parameter-sweep backtests ===\n")
+    client = _make_client()
+    workers = settings.BACKTEST_SWEEP_WORKERS
+
+    try:
+        print("1. Each combination matches a single backtest")
+        settings.BACKTEST_SWEEP_WORKERS = 1
+        r = client.post(SWEEP, json=GRID)
+        if r.status_code != 200:
+            print(f"   [FAIL] Status {r.status_code}: {r.text}")
+            return False
+        body = r.json()
+        results = body["results"]
+        if len(results) != 24 or body["symbol"] != "TSLA" or body["rank_by"] != "sharpe_ratio":
+            print(f"   [FAIL] Unexpected response: {len(results)} results, {body['symbol']}, {body['rank_by']}")
+            return False
+        for row in results:
+            single = client.get(
+                "/backtest/TSLA",
+                params={
+                    "start": GRID["start"],
+                    "end": GRID["end"],
+                    "sma_period": row["sma_period"],
+                    "initial_cash": row["initial_cash"],
+                },
+            ).json()
+            if single["metrics"] != row["metrics"]:
+                print(f"   [FAIL] sma_period={row['sma_period']} cash={row['initial_cash']}: {row['metrics']} != {single['metrics']}")
+                return False
+        print(f"   [OK] {len(results)} combinations identical to /backtest")
+
+        print("\n2. Ranking")
+        sharpe = [row["metrics"]["sharpe_ratio"] for row in results]
+        if sharpe != sorted(sharpe, reverse=True):
+            print("   [FAIL] Not ranked by Sharpe ratio, best first")
+            return False
+        drawdown = client.post(SWEEP, json={**GRID, "rank_by": "max_drawdown_pct"}).json()["results"]
+        values = [row["metrics"]["max_drawdown_pct"] for row in drawdown]
+        if values != sorted(values) or len(drawdown) != len(results):
+            print("   [FAIL] Not ranked by drawdown, lowest first")
+            return False
+        print(f"   [OK] Best Sharpe {sharpe[0]:.3f} (period {results[0]['sma_period']}), lowest drawdown {values[0]:.2f}%")
+
+        print("\n3. Worker pool with shared memory")
+        settings.BACKTEST_SWEEP_WORKERS = 2
+        before = _shm_blocks()
+        pooled = client.post(SWEEP, json=GRID)
+        if pooled.status_code != 200 or pooled.json() != body:
+            print(f"   [FAIL] Pooled sweep differs ({pooled.status_code})")
+            return False
+        if sweep._pool is None:
+            print("   [FAIL] Sweep did not use the pool")
+            return False
+        leaked = _shm_blocks() - before
+        if leaked:
+            print(f"   [FAIL] Shared memory left behind: {leaked}")
+            return False
+        if sweep.sweep_workers() != 2:
+            print("   [FAIL] BACKTEST_SWEEP_WORKERS not honoured")
+            return False
+        settings.BACKTEST_SWEEP_WORKERS = 0
+        if not 1 <= sweep.sweep_workers() <= sweep.DEFAULT_SWEEP_WORKERS:
+            print(f"   [FAIL] Default pool size {sweep.sweep_workers()} is unbounded")
+            return False
+        settings.BACKTEST_SWEEP_WORKERS = 2
+        print("   [OK] 2 workers give identical results, shared memory released")
+
+        print("\n4. A dead worker")
+        for process in list(sweep._pool._processes.values()):
+            process.kill()
+            process.join()
+        r = client.post(SWEEP, json=GRID)
+        if r.status_code != 503 or r.json()["detail"] != POOL_FAILED:
+            print(f"   [FAIL] Expected 503, got {r.status_code}: {r.text}")
+            return False
+        retried = client.post(SWEEP, json=GRID)
+        if retried.status_code != 200 or retried.json() != body:
+            print(f"   [FAIL] Retry after a dead worker failed ({retried.status_code})")
+            return False
+        print("   [OK] 503 with a message, then a fresh pool serves the retry")
+
+        print("\n5. Validation")
+        settings.BACKTEST_SWEEP_WORKERS = 1
+        bad = [
+            ({**GRID, "sma_period": {"start": 50, "stop": 10}}, "start must be <="),
+            ({**GRID, "sma_period": {"start": 1, "stop": MAX_SWEEP_COMBINATIONS}}, "At most"),
+            ({**GRID, "initial_cash": [100.0, -1.0]}, "initial_cash"),
+            ({**GRID, "start": "2030-01-01", "end": "2030-12-31"}, "No candles"),
+        ]
+        for payload, detail in bad:
+            r = client.post(SWEEP, json=payload)
+            if r.status_code != 400 or detail not in r.json()["detail"]:
+                print(f"   [FAIL] Expected 400 '{detail}', got {r.status_code}: {r.text}")
+                return False
+        r = client.post("/backtest/NOPE/sweep", json=GRID)
+        if r.status_code != 400 or "not found" not in r.json()["detail"]:
+            print(f"   [FAIL] Unknown symbol: {r.status_code} {r.text}")
+            return False
+        r = client.post(SWEEP, json={**GRID, "sma_period": {"start": 1, "stop": 10**12}})
+        if r.status_code != 422:
+            print(f"   [FAIL] Unbounded sma_period.stop accepted: {r.status_code}")
+            return False
+        print(f"   [OK] {len(bad) + 1} bad requests rejected with 400; huge period ranges with 422")
+
+        print("\n6. 500-point grid over 20 years")
+        db = next(app.dependency_overrides[get_db]())
+        ingest_symbol_candles(db, "LONG", date(2005, 1, 1), date(2024, 12, 31), provider=SyntheticProvider(seed=9))
+        db.close()
+        grid = {"start": "2005-01-01", "end": "2024-12-31", "sma_period": {"start": 1, "stop": 500}}
+        t0 = time.perf_counter()
+        r = client.post("/backtest/LONG/sweep", json=grid)
+        elapsed = time.perf_counter() - t0
+        if r.status_code != 200 or len(r.json()["results"]) != 500 or elapsed > 5.0:
+            print(f"   [FAIL] {r.status_code}, {elapsed:.2f}s")
+            return False
+        print(f"   [OK] 500 backtests in {elapsed:.2f}s in process")
+    finally:
+        settings.BACKTEST_SWEEP_WORKERS = workers
+        sweep.shutdown_sweep_pool()
+        app.dependency_overrides.clear()
+
+    print("\n=== All parameter-sweep tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_backtest_sweep()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,160 @@
+"""
+Test script for concurrent multi-symbol batch ingestion.
+Serves Stooq-format CSV through an in-process mock transport (no network)
+and checks bounded concurrency, per-symbol results and failure isolation,
+including rate-limit bodies served with HTTP 200, which must not be cached.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+import tempfile
+from datetime import date
+
+import httpx
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.models import Candle, Symbol
+from app.services.market_data.async_stooq_provider import AsyncStooqProvider
+from app.services.market_data.response_cache import DiskResponseCache, NullResponseCache
+from app.services.market_data.trading_calendar import trading_days
+from app.services.stocks.batch_ingest_service import ingest_many_symbols
+
+
+def _stooq_csv(days):
+    lines = ["Date,Open,High,Low,Close,Volume"]
+    for i, d in enumerate(days):
+        lines.append(f"{d.isoformat()},{100 + i},{101 + i},{99 + i},{100.5 + i},{1000 + i}")
+    return "\n".join(lines) + "\n"
+
+
+class MockStooq:
+    def __init__(self, days, delay=0.01):
+        self.body = _stooq_csv(days)
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if request.url.params["s"].startswith("bad"):
+                return httpx.Response(500, text="boom")
+            if request.url.params["s"].startswith("limited"):
+                return httpx.Response(200, text="Exceeded the daily hits limit")
+            return httpx.Response(200, text=self.body)
+        finally:
+            self.in_flight -= 1
+
+
+def _make_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+
+
+async def _run(db, mock, symbols, start, end, write_batch_rows, cache=None):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(mock.handler))
+    provider = AsyncStooqProvider(
+        max_concurrency=4, requests_per_second=0, client=client, cache=cache or NullResponseCache()
+    )
+    try:
+        return await ingest_many_symbols(
+            db, symbols, start, end, provider=provider, write_batch_rows=write_batch_rows
+        )
+    finally:
+        await client.aclose()
+
+
+def test_batch_ingest():
+    print("=== Testing Batch Ingest ===\n")
+
+    start, end = date(2023, 1, 1), date(2023, 6, 30)
+    days = trading_days(start, end)
+    mock = MockStooq(days)
+    symbols = [f"sym{i}" for i in range(20)] + ["bad1", "SYM0"]
+
+    db = _make_session()
+    try:
+        # 1. First batch ingest
+        print("1. Ingesting 20 good symbols + 1 failing symbol:")
+        outcomes = asyncio.run(_run(db, mock, symbols, start, end, write_batch_rows=len(days) * 3))
+        print(f"   Outcomes: {len(outcomes)}, requests: {mock.requests}, max in flight: {mock.max_in_flight}")
+
+        if len(outcomes) != 21:
+            print("   [FAIL] Expected duplicate tickers to be collapsed into 21 outcomes")
+            return False
+        if mock.max_in_flight > 4:
+            print("   [FAIL] Concurrency limit exceeded")
+            return False
+
+        good = [o for o in outcomes if o.error is None]
+        bad = [o for o in outcomes if o.error is not None]
+        if len(good) != 20 or [o.ticker for o in bad] != ["BAD1"]:
+            print(f"   [FAIL] Unexpected failures: {[(o.ticker, o.error) for o in bad]}")
+            return False
+        if any((o.inserted, o.skipped, o.total_seen) != (len(days), 0, len(days)) for o in good):
+            print("   [FAIL] Unexpected per-symbol counts")
+            return False
+
+        rows = db.execute(select(func.count()).select_from(Candle)).scalar_one()
+        syms = db.execute(select(func.count()).select_from(Symbol)).scalar_one()
+        if rows != 20 * len(days) or syms != 20:
+            print(f"   [FAIL] Expected {20 * len(days)} rows / 20 symbols, got {rows} / {syms}")
+            return False
+        print("   [OK] All good symbols stored, failure isolated, concurrency bounded")
+
+        # 2. Re-run: incremental planning skips every stored symbol
+        print("\n2. Re-running the same batch:")
+        mock.requests = 0
+        outcomes = asyncio.run(_run(db, mock, symbols, start, end, write_batch_rows=10_000))
+        print(f"   Requests: {mock.requests}")
+        if mock.requests != 1 or any(o.inserted for o in outcomes):
+            print("   [FAIL] Expected only the failing symbol to be requested again")
+            return False
+        print("   [OK] Already-complete symbols not refetched")
+
+        # 3. A rate-limit page is a failure, not an empty history, and isn't cached
+        print("\n3. Rate-limited symbol:")
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DiskResponseCache(tmp, ttl_seconds=3600, max_bytes=10_000_000)
+            outcomes = asyncio.run(_run(db, mock, ["limited1"], start, end, write_batch_rows=10_000, cache=cache))
+            print(f"   Outcome: {outcomes[0]}")
+            if outcomes[0].error is None or "PayloadError" not in outcomes[0].error:
+                print("   [FAIL] Rate-limit body was reported as success")
+                return False
+            if cache.get("stooq:limited1.us:d") is not None:
+                print("   [FAIL] Rate-limit body was cached")
+                return False
+        print("   [OK] Reported under failed, nothing cached")
+    finally:
+        db.close()
+
+    print("\n=== All batch ingest tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_batch_ingest()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,152 @@
+"""
+Test script for Arrow IPC / MessagePack responses.
+Checks Accept-header negotiation, that both binary encodings decode to
+exactly the format=columnar JSON data for candles, indicators and
+backtests, and that JSON stays the default.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server). Skips an encoding whose
+library (pyarrow / msgpack) is not installed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import importlib
+import json
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.api.responses import ARROW_STREAM, JSON, MSGPACK, negotiate
+from app.main import app
+from scripts.test_columnar_responses import _make_client
+
+ROUTES = {
+    "candles": "/stocks/TSLA/candles?limit=5000",
+    "indicators": "/indicators/TSLA?start=2022-01-01&end=2023-12-31&sma_period=20&rsi_period=14&bb_period=20",
+    "backtest": "/backtest/TSLA?start=2022-01-01&end=2023-12-31&sma_period=20",
+}
+EPOCH = date(1970, 1, 1)
+
+
+def _decode_column(column):
+    """
+    MessagePack typed column -> list of Python values (None for nulls).
+    """
+    kind = column["type"]
+    if kind == "string":
+        return column["data"]
+    dtype = {"date32": "<i4", "float64": "<f8", "int64": "<i8"}[kind]
+    values = np.frombuffer(column["data"], dtype=dtype).tolist()
+    if kind == "date32":
+        values = [(EPOCH + timedelta(days=d)).isoformat() for d in values]
+    if "valid" in column:
+        valid = np.unpackbits(np.frombuffer(column["valid"], dtype=np.uint8), bitorder="little")
+        values = [v if ok else None for v, ok in zip(values, valid)]
+    return values
+
+
+def _decode_msgpack(obj):
+    out = {}
+    for key, value in obj.items():
+        if isinstance(value, dict) and "type" in value and "data" in value:
+            out[key] = _decode_column(value)
+        elif isinstance(value, dict):
+            out[key] = _decode_msgpack(value)
+        else:
+            out[key] = value
+    return out
+
+
+def _decode_arrow(pa, content, nested=None):
+    table = pa.ipc.open_stream(content).read_all()
+    columns = {
+        name: [v.isoformat() if isinstance(v, date) else v for v in table.column(name).to_pylist()]
+        for name in table.column_names
+    }
+    extra = {k.decode(): json.loads(v) for k, v in (table.schema.metadata or {}).items()}
+    if nested:
+        return {nested: columns, **extra}
+    return {**columns, **extra}
+
+
+def test_binary_responses():
+    print("=== Testing binary response encodings ===\n")
+
+    print("1. Accept negotiation")
+    cases = {
+        None: JSON,
+        "*/*": JSON,
+        "text/html": JSON,
+        ARROW_STREAM: ARROW_STREAM,
+        "application/x-msgpack": MSGPACK,
+        f"{JSON};q=0.5, {MSGPACK}": MSGPACK,
+        f"{ARROW_STREAM};q=0.2, */*;q=0.8": JSON,
+        f"{MSGPACK}, {ARROW_STREAM}": MSGPACK,
+    }
+    for accept, expected in cases.items():
+        if negotiate(accept) != expected:
+            print(f"   [FAIL] Accept {accept!r} -> {negotiate(accept)}, expected {expected}")
+            return False
+    print(f"   [OK] {len(cases)} Accept headers resolved")
+
+    client = _make_client()
+    try:
+        pa = msgpack = None
+        try:
+            pa = importlib.import_module("pyarrow")
+        except ImportError:
+            print("\n   [SKIP] pyarrow not installed")
+        try:
+            msgpack = importlib.import_module("msgpack")
+        except ImportError:
+            print("\n   [SKIP] msgpack not installed")
+
+        for step, (name, url) in enumerate(ROUTES.items(), start=2):
+            print(f"\n{step}. {name}")
+            expected = client.get(url + "&format=columnar").json()
+            rows = client.get(url)
+            if rows.headers["content-type"] != JSON or "Accept" not in rows.headers.get("vary", ""):
+                print(f"   [FAIL] Default response is not JSON with Vary: {rows.headers}")
+                return False
+
+            sizes = []
+            if pa is not None:
+                resp = client.get(url, headers={"Accept": ARROW_STREAM})
+                if resp.headers["content-type"] != ARROW_STREAM:
+                    print(f"   [FAIL] Arrow content-type {resp.headers['content-type']}")
+                    return False
+                decoded = _decode_arrow(pa, resp.content, "equity_curve" if name == "backtest" else None)
+                if decoded != expected:
+                    print("   [FAIL] Arrow stream does not decode to the columnar data")
+                    return False
+                sizes.append(f"arrow {len(resp.content):,} B")
+
+            if msgpack is not None:
+                resp = client.get(url, headers={"Accept": MSGPACK})
+                decoded = _decode_msgpack(msgpack.unpackb(resp.content))
+                if resp.headers["content-type"] != MSGPACK or decoded != expected:
+                    print("   [FAIL] MessagePack does not decode to the columnar data")
+                    return False
+                sizes.append(f"msgpack {len(resp.content):,} B")
+
+            print(f"   [OK] rows JSON {len(rows.content):,} B; " + ", ".join(sizes))
+    finally:
+        app.dependency_overrides.clear()
+
+    print("\n=== All binary response tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_binary_responses()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
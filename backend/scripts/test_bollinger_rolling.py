@@ -0,0 +1,151 @@
+"""
+Test script for the O(n) rolling-variance Bollinger Bands.
+Compares compute_bollinger_bands and bollinger_arrays against the original
+per-window implementation within a tolerance, including series that break
+naive sum-of-squares variance (large prices with tiny moves, flat stretches),
+and checks that the cost no longer grows with the period. No database needed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.schemas.stock import CandleDTO
+from app.services.indicators.bollinger import compute_bollinger_bands
+from app.services.indicators.kernels import bollinger_arrays
+
+# Band error allowed, relative to the series' price level
+TOLERANCE = 1e-8
+
+
+def _reference_bollinger(closes, period, num_std):
+    """
+    The original implementation: recompute mean and variance per window.
+    """
+    n = len(closes)
+    middle = [None] * n
+    upper = [None] * n
+    lower = [None] * n
+    for i in range(period - 1, n):
+        window = closes[i - period + 1 : i + 1]
+        sma = sum(window) / period
+        variance = sum((x - sma) ** 2 for x in window) / period
+        std_dev = variance ** 0.5
+        middle[i] = sma
+        upper[i] = sma + (num_std * std_dev)
+        lower[i] = sma - (num_std * std_dev)
+    return middle, upper, lower
+
+
+def _candles(closes):
+    first = date(2000, 1, 3)
+    return [
+        CandleDTO(date=first + timedelta(days=i), open=c, high=c, low=c, close=c, volume=1000)
+        for i, c in enumerate(closes)
+    ]
+
+
+def _max_error(actual, expected, scale):
+    a = np.array([np.nan if v is None else v for v in actual], dtype=np.float64)
+    e = np.array([np.nan if v is None else v for v in expected], dtype=np.float64)
+    if not np.array_equal(np.isnan(a), np.isnan(e)):
+        return float("inf")
+    valid = ~np.isnan(e)
+    if not valid.any():
+        return 0.0
+    return float(np.max(np.abs(a[valid] - e[valid]))) / scale
+
+
+def _series():
+    rng = np.random.default_rng(7)
+    walk = np.round(100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, 3_000))), 4)
+    stalled = np.concatenate([walk[:1000], np.full(400, walk[1000]), walk[1000:]])
+    large = np.round(1e6 + np.cumsum(rng.normal(0.0, 0.01, 3_000)), 4)
+    return {
+        "random walk": walk,
+        "with flat stretch": stalled,
+        "large price, tiny moves": large,
+        "short": np.array([10.0, 11.0, 9.5]),
+    }
+
+
+def test_bollinger_rolling():
+    print("=== Testing rolling-variance Bollinger Bands ===\n")
+
+    print(f"1. Equivalence with the per-window implementation (tolerance {TOLERANCE:g} of price)")
+    for name, closes in _series().items():
+        scale = float(np.max(np.abs(closes))) if len(closes) else 1.0
+        values = closes.tolist()
+        candles = _candles(values)
+        for period in (1, 2, 5, 20, 100, 500):
+            for num_std in (0.5, 2.0):
+                expected = _reference_bollinger(values, period, num_std)
+                from_list = compute_bollinger_bands(candles, period, num_std)
+                from_array = bollinger_arrays(closes, period, num_std)
+                worst = max(
+                    max(_max_error(a, e, scale) for a, e in zip(from_list, expected)),
+                    max(_max_error(a.tolist(), e, scale) for a, e in zip(from_array, expected)),
+                )
+                if worst > TOLERANCE:
+                    print(f"   [FAIL] {name}: period={period} num_std={num_std} error {worst:.2e}")
+                    return False
+        print(f"   [OK] {name}")
+
+    print("\n2. Flat windows have zero width")
+    closes = np.full(200, 123.4567)
+    middle, upper, lower = compute_bollinger_bands(_candles(closes.tolist()), 20, 2.0)
+    a_middle, a_upper, a_lower = bollinger_arrays(closes, 20, 2.0)
+    if any(u != m or l != m for u, m, l in zip(upper[19:], middle[19:], lower[19:])):
+        print("   [FAIL] List bands have non-zero width on a flat series")
+        return False
+    if not (np.array_equal(a_upper[19:], a_middle[19:]) and np.array_equal(a_lower[19:], a_middle[19:])):
+        print("   [FAIL] Array bands have non-zero width on a flat series")
+        return False
+    print("   [OK] upper == middle == lower")
+
+    print("\n3. Cost does not grow with the period")
+    closes = _series()["random walk"]
+    candles = _candles(closes.tolist())
+    timings = {}
+    for period in (20, 500):
+        list_runs = []
+        for _ in range(3):
+            t0 = time.perf_counter()
+            compute_bollinger_bands(candles, period, 2.0)
+            list_runs.append(time.perf_counter() - t0)
+        t1 = time.perf_counter()
+        for _ in range(20):
+            bollinger_arrays(closes, period, 2.0)
+        t2 = time.perf_counter()
+        _reference_bollinger(closes.tolist(), period, 2.0)
+        t3 = time.perf_counter()
+        timings[period] = (min(list_runs), (t2 - t1) / 20, t3 - t2)
+        print(
+            f"   period={period:<4} list: {min(list_runs) * 1000:6.2f} ms   numpy: {(t2 - t1) / 20 * 1000:6.3f} ms"
+            f"   per-window reference: {(t3 - t2) * 1000:8.2f} ms"
+        )
+    if timings[500][0] > 5 * timings[20][0]:
+        print("   [FAIL] List implementation scales with the period")
+        return False
+    print("   [OK] Rolling implementations are flat in the period")
+
+    print("\n=== All rolling Bollinger tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_bollinger_rolling()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,190 @@
+"""
+Test script for the candle series cache.
+Checks that get_candles returns exactly what load_candles does for any
+range/order/page/columns, that the candles, indicators and backtest
+routes share one load per symbol, that ingestion invalidates it (also
+when another process writes the candles), that the byte budget evicts LRU series, and that /stocks/cache/stats reports it.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server).
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import date
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_db
+from app.db.base import Base
+from app.main import app
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks import candle_cache
+from app.services.stocks.candle_cache import get_candles
+from app.services.stocks.candle_loader import load_candles
+from app.services.stocks.candle_series import CANDLE_COLUMNS
+from app.services.stocks.ingest_service import ingest_symbol_candles
+from app.utils.sized_cache import SizedLRUCache
+from scripts.test_columnar_responses import _make_client
+
+CASES = [
+    dict(),
+    dict(start=date(2023, 2, 1), end=date(2023, 2, 28)),
+    dict(start=date(2023, 1, 1), columns=CANDLE_COLUMNS, limit=10),
+    dict(columns=("close", "volume"), descending=True, limit=7),
+    dict(descending=True, after=date(2023, 6, 15), limit=20),
+    dict(after=date(2023, 6, 15), end=date(2023, 7, 31)),
+    dict(start=date(2030, 1, 1)),
+]
+
+
+def _same(a, b) -> bool:
+    return a.columns == b.columns and list(a.rows()) == list(b.rows())
+
+
+# Run by _other_process_write in a separate interpreter
+_INGEST = """
+import sys
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+sys.path.insert(0, sys.argv[2])
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks.ingest_service import ingest_symbol_candles
+db = sessionmaker(bind=create_engine(sys.argv[1]))()
+ingest_symbol_candles(db, "NVDA", date(2023, 1, 1), date.fromisoformat(sys.argv[3]), provider=SyntheticProvider(seed=7))
+"""
+
+
+def _other_process_write() -> bool:
+    """
+    Candles written to a SQLite file by another process must not be hidden
+    by this process's cached series.
+    """
+    root = str(Path(__file__).parent.parent)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{tmp}/candles.db"
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            subprocess.run([sys.executable, "-c", _INGEST, url, root, "2023-06-30"], check=True)
+            before = len(get_candles(db, "NVDA"))
+            db.commit()
+            subprocess.run([sys.executable, "-c", _INGEST, url, root, "2023-09-30"], check=True)
+            after = get_candles(db, "NVDA", columns=CANDLE_COLUMNS)
+            fresh = load_candles(db, "NVDA", columns=CANDLE_COLUMNS)
+            print(f"   {before} -> {len(after)} candles after the other process's ingest")
+            return len(after) > before and _same(after, fresh)
+        finally:
+            db.close()
+            engine.dispose()
+
+
+def test_candle_cache():
+    print("=== Testing candle series cache ===\n")
+    client = _make_client()
+    db = next(app.dependency_overrides[get_db]())
+    engine = db.get_bind()
+    loads = []
+
+    def count_loads(conn, cursor, statement, parameters, context, executemany):
+        # The loader's query (ingestion also selects candles.date)
+        if statement.startswith("SELECT candles.date") and "JOIN symbols" in statement:
+            loads.append(statement)
+
+    try:
+        print("1. Slices match load_candles")
+        candle_cache._cache = SizedLRUCache(max_bytes=16 * 1024 * 1024)
+        cache = candle_cache.get_candle_cache()
+        for case in CASES:
+            for ticker in ("TSLA", "NOPE"):
+                if not _same(get_candles(db, ticker, **case), load_candles(db, ticker, **case)):
+                    print(f"   [FAIL] {ticker} {case} differs")
+                    return False
+        try:
+            get_candles(db, "TSLA").close[0] = 1.0
+            print("   [FAIL] Cached arrays are writable")
+            return False
+        except ValueError:
+            pass
+        print(f"   [OK] {len(CASES)} argument sets agree; cached arrays read-only")
+
+        print("\n2. Routes share one load per symbol")
+        candle_cache._cache = SizedLRUCache(max_bytes=16 * 1024 * 1024)
+        cache = candle_cache.get_candle_cache()
+        event.listen(engine, "before_cursor_execute", count_loads)
+        for url in (
+            "/stocks/TSLA/candles?limit=100&order=desc",
+            "/indicators/TSLA?start=2023-01-01&end=2023-06-30&sma_period=20",
+            "/backtest/TSLA?start=2022-06-01&end=2023-12-31&sma_period=20",
+            "/stocks/TSLA/candles?start=2022-03-01&end=2022-03-31",
+        ):
+            if client.get(url).status_code != 200:
+                print(f"   [FAIL] {url} failed")
+                return False
+        stats = cache.stats()
+        if len(loads) != 1 or stats["misses"] != 1 or stats["hits"] != 3:
+            print(f"   [FAIL] Expected one load and 3 hits: {len(loads)} loads, {stats}")
+            return False
+        print(f"   [OK] 4 requests, 1 candle query, hit ratio {stats['hit_ratio']:.2f}")
+
+        print("\n3. Ingestion invalidates the symbol")
+        before = len(get_candles(db, "TSLA"))
+        ingest_symbol_candles(db, "TSLA", date(2024, 1, 1), date(2024, 3, 31), provider=SyntheticProvider(seed=5))
+        after = get_candles(db, "TSLA", columns=CANDLE_COLUMNS)
+        if len(after) <= before or len(loads) != 2 or not _same(after, load_candles(db, "TSLA", columns=CANDLE_COLUMNS)):
+            print(f"   [FAIL] Stale series after ingest: {before} -> {len(after)} candles, {len(loads)} loads")
+            return False
+        print(f"   [OK] {before} -> {len(after)} candles after ingest, reloaded once")
+
+        print("\n4. Writes from another process invalidate it")
+        if not _other_process_write():
+            print("   [FAIL] Stale series served after another engine's write")
+            return False
+        print("   [OK] The data version is shared through the database")
+
+        print("\n5. Byte budget and stats")
+        ingest_symbol_candles(db, "MSFT", date(2022, 1, 1), date(2024, 3, 31), provider=SyntheticProvider(seed=6))
+        candle_cache._cache = SizedLRUCache(max_bytes=16 * 1024 * 1024)
+        get_candles(db, "TSLA")
+        per_symbol = candle_cache.get_candle_cache().stats()["resident_bytes"]
+        candle_cache._cache = SizedLRUCache(max_bytes=int(per_symbol * 1.5))
+        cache = candle_cache.get_candle_cache()
+        get_candles(db, "TSLA")
+        get_candles(db, "MSFT")
+        stats = cache.stats()
+        if stats["resident_bytes"] > stats["max_bytes"] or stats["evictions"] != 1 or stats["entries"] != 1:
+            print(f"   [FAIL] Budget not enforced: {stats}")
+            return False
+        body = client.get("/stocks/cache/stats").json()
+        if body != cache.stats():
+            print(f"   [FAIL] Stats endpoint returned {body}")
+            return False
+        print(f"   [OK] ~{per_symbol:,} B per {len(after)}-candle symbol; {stats['evictions']} eviction(s) at 1.5x budget")
+    finally:
+        if event.contains(engine, "before_cursor_execute", count_loads):
+            event.remove(engine, "before_cursor_execute", count_loads)
+        candle_cache._cache = None
+        db.close()
+        app.dependency_overrides.clear()
+
+    print("\n=== All candle cache tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_candle_cache()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
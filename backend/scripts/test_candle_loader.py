@@ -0,0 +1,104 @@
+"""
+Test script for the column-projected candle loader.
+Checks that load_candles returns the same data as an ORM query, honours
+column selection, order, after and limit, loads in a single statement
+joined on the ticker, and reports unknown symbols as empty.
+Uses an in-memory SQLite database and SyntheticProvider (no network).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import date
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models.stock import Candle, Symbol
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks.candle_loader import CANDLE_COLUMNS, load_candles, symbol_exists
+from app.services.stocks.ingest_service import ingest_symbol_candles
+
+
+def test_candle_loader():
+    print("=== Testing column-projected candle loader ===\n")
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        for ticker in ("AAA", "BBB"):
+            ingest_symbol_candles(db, ticker, date(2022, 1, 1), date(2023, 12, 31), provider=SyntheticProvider(seed=7))
+
+        print("1. Matches the ORM rows")
+        entities = (
+            db.query(Candle).join(Symbol).filter(Symbol.ticker == "AAA").order_by(Candle.date.asc()).all()
+        )
+        series = load_candles(db, "AAA", columns=CANDLE_COLUMNS)
+        expected = [(c.date, c.open, c.high, c.low, c.close, c.volume) for c in entities]
+        if list(series.rows()) != expected or series.columns != ("dates",) + CANDLE_COLUMNS:
+            print("   [FAIL] Rows differ from ORM entities")
+            return False
+        print(f"   [OK] {len(series)} candles, all columns")
+
+        print("\n2. Column selection, range, order, after and limit")
+        closes = load_candles(db, "AAA", date(2023, 1, 1), date(2023, 6, 30))
+        in_range = [(c.date, c.close) for c in entities if date(2023, 1, 1) <= c.date <= date(2023, 6, 30)]
+        if list(closes.rows()) != in_range or closes.columns != ("dates", "close") or closes.open is not None:
+            print("   [FAIL] Close-only range load is wrong")
+            return False
+        page = load_candles(db, "AAA", columns=("close",), descending=True, after=in_range[-1][0], limit=5)
+        if list(page.rows()) != in_range[::-1][1:6]:
+            print("   [FAIL] Descending page after a date is wrong")
+            return False
+        if list(page.select(slice(None, None, -1)).rows()) != in_range[-6:-1]:
+            print("   [FAIL] select() did not reverse every column")
+            return False
+        print(f"   [OK] {len(closes)} closes in H1 2023; descending page of {len(page)}")
+
+        print("\n3. One projected statement")
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        load_candles(db, "AAA", columns=("close", "volume"))
+        event.remove(engine, "before_cursor_execute", listener)
+        sql = " ".join(statements[0].split())
+        if len(statements) != 1 or "JOIN symbols" not in sql or "candles.open" in sql or "candles.id" in sql:
+            print(f"   [FAIL] Unexpected SQL: {statements}")
+            return False
+        print(f"   [OK] {sql[:80]}...")
+
+        print("\n4. Unknown symbols and bad columns")
+        empty = load_candles(db, "NOPE", columns=CANDLE_COLUMNS)
+        if len(empty) != 0 or len(empty.close) != 0 or list(empty.rows()) != []:
+            print("   [FAIL] Unknown symbol did not load an empty series")
+            return False
+        if symbol_exists(db, "NOPE") or not symbol_exists(db, "BBB"):
+            print("   [FAIL] symbol_exists is wrong")
+            return False
+        try:
+            load_candles(db, "AAA", columns=("adj_close",))
+            print("   [FAIL] Unknown column accepted")
+            return False
+        except ValueError:
+            pass
+        print("   [OK] Empty series for NOPE; unknown column rejected")
+    finally:
+        db.close()
+
+    print("\n=== All candle loader tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_candle_loader()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
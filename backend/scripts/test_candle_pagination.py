@@ -0,0 +1,140 @@
+"""
+Test script for candle date filters and keyset pagination.
+Checks start/end/order filtering, that following X-Next-Cursor visits
+every candle exactly once in both orders, that cursors are validated, and
+that pages are slices of the cached series, or with the candle cache
+disabled, range scans of ix_candles_symbol_date rather than OFFSET.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event
+
+from app.api.deps import get_db
+from app.api.routes.stocks import NEXT_CURSOR_HEADER
+from app.main import app
+from app.services.stocks import candle_cache
+from app.utils.sized_cache import SizedLRUCache
+from scripts.test_columnar_responses import _make_client
+
+
+def _page_through(client, url):
+    pages, cursor = [], None
+    while True:
+        resp = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        if resp.status_code != 200:
+            raise AssertionError(f"{resp.status_code}: {resp.text}")
+        pages.append(resp.json())
+        cursor = resp.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_candle_pagination():
+    print("=== Testing candle pagination ===\n")
+    client = _make_client()
+    db = next(app.dependency_overrides[get_db]())
+    engine = db.get_bind()
+    try:
+        everything = client.get("/stocks/TSLA/candles?limit=5000").json()
+        all_dates = [c["date"] for c in everything]
+
+        print("1. Date filters and order")
+        window = client.get("/stocks/TSLA/candles?start=2023-03-01&end=2023-03-31").json()
+        expected = [c for c in everything if "2023-03-01" <= c["date"] <= "2023-03-31"]
+        if window != expected or not window:
+            print("   [FAIL] start/end window differs")
+            return False
+        latest = client.get("/stocks/TSLA/candles?limit=5&order=desc").json()
+        if latest != everything[::-1][:5]:
+            print("   [FAIL] order=desc does not return the newest candles first")
+            return False
+        if client.get("/stocks/TSLA/candles?start=2023-02-01&end=2023-01-01").status_code != 400:
+            print("   [FAIL] start > end accepted")
+            return False
+        print(f"   [OK] {len(window)} candles in March 2023; newest is {latest[0]['date']}")
+
+        print("\n2. Cursor pagination visits every candle once")
+        for order, reference in (("asc", everything), ("desc", everything[::-1])):
+            pages = _page_through(client, f"/stocks/TSLA/candles?limit=37&order={order}")
+            flat = [c for page in pages for c in page]
+            if flat != reference or any(len(p) != 37 for p in pages[:-1]):
+                print(f"   [FAIL] {order} pages do not reassemble the history")
+                return False
+        pages = _page_through(client, "/stocks/TSLA/candles?limit=10&order=desc&start=2023-01-01&end=2023-02-28")
+        flat = [c["date"] for page in pages for c in page]
+        if flat != [d for d in all_dates[::-1] if "2023-01-01" <= d <= "2023-02-28"]:
+            print("   [FAIL] Filtered pagination differs")
+            return False
+        exact = client.get(f"/stocks/TSLA/candles?limit={len(everything)}")
+        if NEXT_CURSOR_HEADER in exact.headers:
+            print("   [FAIL] Last page still carries a cursor")
+            return False
+        print(f"   [OK] {len(everything)} candles in pages of 37 both ways; no cursor on the last page")
+
+        print("\n3. Columnar pages and cursor validation")
+        first = client.get("/stocks/TSLA/candles?limit=50&format=columnar")
+        cursor = first.headers[NEXT_CURSOR_HEADER]
+        second = client.get(f"/stocks/TSLA/candles?limit=50&format=columnar&cursor={cursor}").json()
+        if second["dates"] != all_dates[50:100]:
+            print("   [FAIL] Columnar cursor page is wrong")
+            return False
+        for bad in ("not-a-cursor", cursor):
+            # The second case reuses an asc cursor with order=desc
+            if client.get(f"/stocks/TSLA/candles?order=desc&cursor={bad}").status_code != 400:
+                print(f"   [FAIL] Cursor {bad!r} accepted for order=desc")
+                return False
+        print("   [OK] Columnar pages follow the cursor; bad or mismatched cursors get 400")
+
+        print("\n4. Pages are cache slices or keyset range scans")
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT candles.date"):
+                statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        _page_through(client, "/stocks/TSLA/candles?limit=100&order=desc")
+        if statements:
+            print(f"   [FAIL] Cached pages queried candles {len(statements)} times")
+            return False
+        candle_cache._cache = SizedLRUCache(max_bytes=0)
+        try:
+            _page_through(client, "/stocks/TSLA/candles?limit=100&order=desc")
+        finally:
+            candle_cache._cache = None
+            event.remove(engine, "before_cursor_execute", capture)
+        # SQLite renders LIMIT ? OFFSET ? with the offset bound to 0
+        if any("OFFSET" in s.upper() and p[-1] != 0 for s, p in statements):
+            print("   [FAIL] Pagination skips rows with OFFSET")
+            return False
+        statement, parameters = statements[-1]
+        plan = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        detail = " ".join(row[-1] for row in plan)
+        if "candles_symbol_date" not in detail or "date<" not in detail.replace(" ", ""):
+            print(f"   [FAIL] Page query does not range-scan the (symbol_id, date) index: {detail}")
+            return False
+        print(f"   [OK] Cached pages run no queries; uncached: {len(statements)} page queries, offset always 0; plan: {detail}")
+    finally:
+        db.close()
+        app.dependency_overrides.clear()
+
+    print("\n=== All candle pagination tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_candle_pagination()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,120 @@
+"""
+Test script for the array-backed CandleSeries.
+Checks its memory footprint and zero-copy date slicing, and that the
+list indicators, the SMA threshold strategy, the backtest engine and the
+metrics give the same results for a CandleSeries as for the per-candle
+objects they took before.
+No database or network needed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.schemas.stock import CandleDTO
+from app.services.backtesting.engine import CandlePoint, run_long_only_all_in_out
+from app.services.backtesting.metrics import compute_metrics
+from app.services.indicators.bollinger import compute_bollinger_bands
+from app.services.indicators.ema import compute_ema
+from app.services.indicators.macd import compute_macd
+from app.services.indicators.rsi import compute_rsi
+from app.services.indicators.sma import compute_sma
+from app.services.stocks.candle_series import CandleSeries
+from app.services.strategies.sma_threshold import generate_sma_threshold_signals, sma_threshold_signals
+
+
+def _candles(n: int):
+    rng = np.random.default_rng(11)
+    closes = 100 * np.exp(rng.normal(0, 0.02, n).cumsum())
+    day = date(2000, 1, 3)
+    out = []
+    for close in closes.tolist():
+        out.append(CandleDTO(date=day, open=close, high=close * 1.01, low=close * 0.99, close=close, volume=1000))
+        day += timedelta(days=1 if day.weekday() < 4 else 3)
+    return out
+
+
+def test_candle_series():
+    print("=== Testing array-backed CandleSeries ===\n")
+    candles = _candles(3000)
+    series = CandleSeries.from_candles("TEST", candles)
+
+    print("1. Layout")
+    per_candle = series.nbytes / len(series)
+    if per_candle != 48 or series.dates.dtype != np.dtype("datetime64[D]") or series.volume.dtype != np.int64:
+        print(f"   [FAIL] {per_candle} bytes per candle, dtypes {series.dates.dtype}/{series.volume.dtype}")
+        return False
+    if list(series.rows()) != [tuple(c.model_dump().values()) for c in candles]:
+        print("   [FAIL] rows() does not round-trip the candles")
+        return False
+    print(f"   [OK] {per_candle:.0f} bytes per candle, rows round-trip")
+
+    print("\n2. Zero-copy date ranges")
+    window = series.between(date(2003, 1, 1), date(2003, 12, 31))
+    expected = [c.date for c in candles if date(2003, 1, 1) <= c.date <= date(2003, 12, 31)]
+    if window.dates.tolist() != expected:
+        print("   [FAIL] between() picked the wrong candles")
+        return False
+    if not all(np.shares_memory(getattr(window, n), getattr(series, n)) for n in series.columns):
+        print("   [FAIL] between() copied a column")
+        return False
+    if len(series.between(date(1990, 1, 1), date(1990, 12, 31))) != 0 or len(series.between()) != len(series):
+        print("   [FAIL] Out-of-range or open bounds are wrong")
+        return False
+    print(f"   [OK] {len(window)} candles in 2003 as views")
+
+    print("\n3. Indicators accept a CandleSeries")
+    for name, fn in (
+        ("sma", lambda c: compute_sma(c, 20)),
+        ("ema", lambda c: compute_ema(c, 20)),
+        ("rsi", lambda c: compute_rsi(c, 14)),
+        ("bollinger", lambda c: compute_bollinger_bands(c, 20, 2.0)),
+        ("macd", lambda c: compute_macd(c, 12, 26, 9)),
+    ):
+        if fn(series) != fn(candles):
+            print(f"   [FAIL] {name} differs")
+            return False
+    print("   [OK] sma, ema, rsi, bollinger, macd identical")
+
+    print("\n4. Strategy, engine and metrics")
+    sma = compute_sma(candles, 50)
+    from_lists = generate_sma_threshold_signals([c.date for c in candles], [c.close for c in candles], sma)
+    if sma_threshold_signals(series, 50) != from_lists:
+        print("   [FAIL] Signals differ")
+        return False
+    points = [CandlePoint(date=c.date, close=c.close) for c in candles]
+    curve, trades = run_long_only_all_in_out(series, from_lists)
+    if (curve, trades) != run_long_only_all_in_out(points, from_lists):
+        print("   [FAIL] Engine results differ")
+        return False
+    equity = np.array([p.equity for p in curve])
+    if compute_metrics(equity_curve=equity, trades=trades) != compute_metrics(equity_curve=curve, trades=trades):
+        print("   [FAIL] Metrics from an equity array differ")
+        return False
+    try:
+        run_long_only_all_in_out(series.select(slice(None, None, -1)), from_lists)
+        print("   [FAIL] Descending series accepted")
+        return False
+    except ValueError:
+        pass
+    print(f"   [OK] {len(from_lists)} signals, {len(trades)} trades identical")
+
+    print("\n=== All CandleSeries tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_candle_series()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
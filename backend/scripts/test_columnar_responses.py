@@ -0,0 +1,133 @@
+"""
+Test script for format=columnar responses.
+Requests candles, indicators and backtests in both formats through the
+ASGI app and checks that the columnar arrays carry exactly the row data,
+that unrequested indicators are omitted, and that rows stay the default.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.deps import get_current_user, get_db
+from app.db.base import Base
+from app.main import app
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks.ingest_service import ingest_symbol_candles
+
+
+def _make_client() -> TestClient:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    db = Session()
+    ingest_symbol_candles(db, "TSLA", date(2022, 1, 1), date(2023, 12, 31), provider=SyntheticProvider(seed=4))
+    db.close()
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: None
+    return TestClient(app)
+
+
+def _to_rows(columns, keys, renames=None):
+    renames = renames or {}
+    n = len(columns[keys[0]])
+    return [{renames.get(k, k): columns[k][i] for k in keys} for i in range(n)]
+
+
+def test_columnar_responses():
+    print("=== Testing columnar response format ===\n")
+    client = _make_client()
+    try:
+        print("1. Candles")
+        rows = client.get("/stocks/TSLA/candles?limit=5000").json()
+        cols = client.get("/stocks/TSLA/candles?limit=5000&format=columnar").json()
+        keys = ["dates", "open", "high", "low", "close", "volume"]
+        if cols["symbol"] != "TSLA" or _to_rows(cols, keys, {"dates": "date"}) != rows:
+            print("   [FAIL] Columnar candles differ from rows")
+            return False
+        empty = client.get("/stocks/NOPE/candles?format=columnar").json()
+        if empty["dates"] != [] or empty["volume"] != []:
+            print(f"   [FAIL] Unknown symbol: {empty}")
+            return False
+        print(f"   [OK] {len(rows)} candles identical in both formats")
+
+        print("\n2. Indicators")
+        url = "/indicators/TSLA?start=2022-01-01&end=2023-12-31&sma_period=20&rsi_period=14"
+        rows = client.get(url).json()["points"]
+        cols = client.get(url + "&format=columnar").json()
+        if set(cols) != {"symbol", "dates", "close", "sma", "rsi"}:
+            print(f"   [FAIL] Unexpected columnar fields: {sorted(cols)}")
+            return False
+        for i, point in enumerate(rows):
+            if (
+                point["date"] != cols["dates"][i]
+                or point["close"] != cols["close"][i]
+                or point["sma"] != cols["sma"][i]
+                or point["rsi"] != cols["rsi"][i]
+            ):
+                print(f"   [FAIL] Point {i} differs: {point}")
+                return False
+        if "sma" not in rows[0] or rows[0]["ema"] is not None:
+            print("   [FAIL] Row format changed")
+            return False
+        print(f"   [OK] {len(rows)} points; only requested indicators present")
+
+        print("\n3. Backtest")
+        url = "/backtest/TSLA?start=2022-01-01&end=2023-12-31&sma_period=20"
+        rows = client.get(url).json()
+        cols = client.get(url + "&format=columnar").json()
+        equity = _to_rows(cols["equity_curve"], ["dates", "equity"], {"dates": "date"})
+        trade_keys = ["entry_date", "exit_date", "entry_price", "exit_price", "pnl", "return_pct", "reason"]
+        if equity != rows["equity_curve"] or _to_rows(cols["trades"], trade_keys) != rows["trades"]:
+            print("   [FAIL] Columnar backtest differs from rows")
+            return False
+        if cols["metrics"] != rows["metrics"]:
+            print("   [FAIL] Metrics differ")
+            return False
+        print(f"   [OK] {len(equity)} equity points and {len(rows['trades'])} trades identical")
+
+        print("\n4. Unknown format is rejected")
+        if client.get("/stocks/TSLA/candles?format=csv").status_code != 422:
+            print("   [FAIL] format=csv was accepted")
+            return False
+        print("   [OK] 422 for format=csv")
+    finally:
+        app.dependency_overrides.clear()
+
+    print("\n=== All columnar response tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_columnar_responses()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
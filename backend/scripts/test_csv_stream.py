@@ -0,0 +1,167 @@
+"""
+Test script for the streaming OHLCV CSV parser.
+Compares against a csv.DictReader reference parse and checks chunk-boundary
+handling, early stop past `end`, unordered input and peak memory.
+No network needed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import csv
+import tempfile
+import tracemalloc
+from datetime import date, timedelta
+from io import StringIO
+
+from app.schemas.stock import CandleDTO
+from app.services.market_data.csv_stream import PayloadError, iter_lines, iter_ohlcv_batches
+from app.services.market_data.response_cache import DiskResponseCache
+from app.services.market_data.stooq_provider import StooqProvider
+
+
+def _make_csv(n, first=date(1990, 1, 1)):
+    lines = ["Date,Open,High,Low,Close,Volume"]
+    for i in range(n):
+        d = first + timedelta(days=i)
+        vol = "" if i % 97 == 0 else f"{1000 + i}.0"
+        lines.append(f"{d.isoformat()},{100 + i * 0.01:.4f},{101 + i * 0.01:.4f},{99 + i * 0.01:.4f},{100.5 + i * 0.01:.4f},{vol}")
+    return ("\r\n".join(lines) + "\r\n").encode("ascii")
+
+
+def _reference(body, start, end):
+    candles = []
+    for row in csv.DictReader(StringIO(body.decode("ascii"))):
+        d = date.fromisoformat(row["Date"])
+        if d < start or d > end:
+            continue
+        candles.append(
+            CandleDTO(
+                date=d,
+                open=float(row["Open"]),
+                high=float(row["High"]),
+                low=float(row["Low"]),
+                close=float(row["Close"]),
+                volume=int(float(row["Volume"])) if row["Volume"] else 0,
+            )
+        )
+    candles.sort(key=lambda c: c.date)
+    return candles
+
+
+def _chunked(body, size):
+    for i in range(0, len(body), size):
+        yield body[i : i + size]
+
+
+def _stream(body, start, end, chunk_size=7, batch_size=100):
+    out = []
+    for batch in iter_ohlcv_batches(iter_lines(_chunked(body, chunk_size)), start, end, batch_size=batch_size):
+        out.extend(batch.to_dtos())
+    return out
+
+
+def test_csv_stream():
+    print("=== Testing Streaming CSV Parser ===\n")
+
+    body = _make_csv(2000)
+    start, end = date(1991, 3, 1), date(1993, 6, 30)
+
+    # 1. Equivalence with the DictReader reference, with tiny chunks
+    print("1. Comparing with reference parser:")
+    expected = _reference(body, start, end)
+    got = _stream(body, start, end)
+    print(f"   Rows: {len(got)} (expected {len(expected)})")
+    if got != expected:
+        print("   [FAIL] Streaming parse differs from reference")
+        return False
+    print("   [OK] Identical results across arbitrary chunk boundaries")
+
+    # 2. Early stop: rows past `end` are not consumed beyond the confirming row
+    print("\n2. Testing early stop:")
+    consumed = []
+
+    def counting_lines():
+        for line in iter_lines([body]):
+            consumed.append(line)
+            yield line
+
+    list(iter_ohlcv_batches(counting_lines(), start, end))
+    stop_row = 1 + (end - date(1990, 1, 1)).days + 2  # header + rows through `end` + one more
+    total_lines = body.count(b"\n")
+    print(f"   Lines consumed: {len(consumed)} of {total_lines}")
+    if len(consumed) != stop_row + 1:
+        print(f"   [FAIL] Expected parsing to stop after {stop_row + 1} lines")
+        return False
+    print("   [OK] Parsing stopped just past end")
+
+    # 3. Unordered input still filters correctly
+    print("\n3. Testing unordered input:")
+    lines = body.split(b"\r\n")
+    shuffled = b"\n".join([lines[0]] + list(reversed(lines[1:-1]))) + b"\n"
+    got = sorted(_stream(shuffled, start, end), key=lambda c: c.date)
+    if got != expected:
+        print("   [FAIL] Unordered input lost rows")
+        return False
+    print("   [OK] Unordered input handled")
+
+    # 4. Payloads that aren't a CSV (Stooq "No data", rate-limit page, empty)
+    for payload in (b"No data", b"Exceeded the daily hits limit", b""):
+        try:
+            _stream(payload, start, end)
+            print(f"   [FAIL] {payload!r} should raise PayloadError")
+            return False
+        except PayloadError:
+            pass
+    print("   [OK] Non-CSV payloads raise PayloadError")
+
+    # 5. Provider served from a fresh cache entry (no network)
+    print("\n4. Testing StooqProvider with a cached payload:")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiskResponseCache(tmp, ttl_seconds=3600, max_bytes=10_000_000)
+        cache.put("stooq:aapl.us:d", body)
+        candles = StooqProvider(cache=cache).get_candles("AAPL", start, end)
+        if candles != expected:
+            print("   [FAIL] Provider result differs from reference")
+            return False
+        print(f"   [OK] {len(candles)} candles streamed from cache")
+
+    # 6. Peak memory: batches stay flat while a full DTO parse grows
+    print("\n5. Comparing peak memory on a 20k-row payload:")
+    big = _make_csv(20_000, first=date(1950, 1, 1))
+    lo, hi = date(1900, 1, 1), date(2100, 1, 1)
+
+    tracemalloc.start()
+    _reference(big, lo, hi)
+    _, ref_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    rows = 0
+    for batch in iter_ohlcv_batches(iter_lines(_chunked(big, 64 * 1024)), lo, hi, batch_size=1000):
+        rows += len(batch)
+    _, stream_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"   Reference peak: {ref_peak / 1024:.0f} KiB, streaming peak: {stream_peak / 1024:.0f} KiB ({rows} rows)")
+    if rows != 20_000 or stream_peak * 10 > ref_peak:
+        print("   [FAIL] Expected streaming peak to be at least 10x lower")
+        return False
+    print("   [OK] Streaming peak memory is flat")
+
+    print("\n=== All streaming CSV tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_csv_stream()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
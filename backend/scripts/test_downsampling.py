@@ -0,0 +1,130 @@
+"""
+Test script for max_points chart downsampling.
+Checks LTTB index selection and OHLC bucketing directly, then that
+/indicators keeps exact full-resolution values at the dates it returns and
+/stocks/{symbol}/candles returns correctly merged buckets.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from app.main import app
+from app.utils.downsample import lttb_indices, ohlc_buckets
+from scripts.test_columnar_responses import _make_client
+
+
+def test_downsampling():
+    print("=== Testing chart downsampling ===\n")
+
+    print("1. LTTB")
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 50.0)
+    y[437] = 5.0  # a one-row spike every-nth sampling would miss
+    kept = lttb_indices(x, y, 100)
+    if len(kept) != 100 or kept[0] != 0 or kept[-1] != 999 or np.any(np.diff(kept) <= 0):
+        print(f"   [FAIL] Bad index set: {kept[:5]}... ({len(kept)} rows)")
+        return False
+    if 437 not in kept:
+        print("   [FAIL] Spike was dropped")
+        return False
+    if lttb_indices(x[:50], y[:50], 100).tolist() != list(range(50)):
+        print("   [FAIL] Short series was not returned whole")
+        return False
+    print("   [OK] 1000 -> 100 rows, endpoints and spike kept")
+
+    print("\n2. OHLC buckets")
+    rng = np.random.default_rng(3)
+    closes = 100 + rng.standard_normal(1003).cumsum()
+    opens = closes + rng.standard_normal(1003)
+    highs = np.maximum(opens, closes) + 1
+    lows = np.minimum(opens, closes) - 1
+    volumes = [None if i % 7 == 0 else i for i in range(1003)]
+    starts, o, h, l, c, v = ohlc_buckets(opens, highs, lows, closes, volumes, 100)
+    ends = list(starts[1:]) + [1003]
+    for k, (a, b) in enumerate(zip(starts, ends)):
+        known = [vol for vol in volumes[a:b] if vol is not None]
+        expected = (opens[a], highs[a:b].max(), lows[a:b].min(), closes[b - 1], sum(known) if known else None)
+        if (o[k], h[k], l[k], c[k], v[k]) != expected:
+            print(f"   [FAIL] Bucket {k} rows {a}:{b} is {(o[k], h[k], l[k], c[k], v[k])}, expected {expected}")
+            return False
+    if len(starts) != 100 or starts[0] != 0:
+        print("   [FAIL] Wrong bucket count")
+        return False
+    print("   [OK] 1003 candles -> 100 buckets with exact aggregates")
+
+    client = _make_client()
+    try:
+        print("\n3. /indicators computes at full resolution")
+        url = "/indicators/TSLA?start=2022-01-01&end=2023-12-31&sma_period=50&rsi_period=14&bb_period=20&macd=true"
+        full = client.get(url + "&format=columnar").json()
+        thin = client.get(url + "&format=columnar&max_points=60").json()
+        if len(thin["dates"]) != 60 or thin["dates"][0] != full["dates"][0] or thin["dates"][-1] != full["dates"][-1]:
+            print(f"   [FAIL] Got {len(thin['dates'])} rows")
+            return False
+        position = {d: i for i, d in enumerate(full["dates"])}
+        for field in ("close", "sma", "rsi", "bb_upper", "macd_hist"):
+            if thin[field] != [full[field][position[d]] for d in thin["dates"]]:
+                print(f"   [FAIL] {field} values differ from the full-resolution series")
+                return False
+        rows = client.get(url + "&max_points=60").json()["points"]
+        if [p["date"] for p in rows] != thin["dates"]:
+            print("   [FAIL] Row and columnar downsampling disagree")
+            return False
+        if client.get(url + "&max_points=2").status_code != 422:
+            print("   [FAIL] max_points below 3 accepted")
+            return False
+        print(f"   [OK] {len(full['dates'])} -> 60 rows, values identical at kept dates")
+
+        print("\n4. /stocks/{symbol}/candles buckets")
+        raw = client.get("/stocks/TSLA/candles?limit=5000").json()
+        for order in ("asc", "desc"):
+            merged = client.get(f"/stocks/TSLA/candles?limit=5000&max_points=40&order={order}").json()
+            if order == "desc":
+                merged = merged[::-1]
+            if len(merged) != 40 or merged[0]["date"] != raw[0]["date"]:
+                print(f"   [FAIL] {order}: {len(merged)} buckets")
+                return False
+            bounds = [next(i for i, r in enumerate(raw) if r["date"] == m["date"]) for m in merged] + [len(raw)]
+            for m, a, b in zip(merged, bounds, bounds[1:]):
+                bucket = raw[a:b]
+                if (
+                    m["open"] != bucket[0]["open"]
+                    or m["close"] != bucket[-1]["close"]
+                    or m["high"] != max(r["high"] for r in bucket)
+                    or m["low"] != min(r["low"] for r in bucket)
+                    or m["volume"] != sum(r["volume"] for r in bucket)
+                ):
+                    print(f"   [FAIL] {order}: bucket starting {m['date']} is wrong")
+                    return False
+        columnar = client.get("/stocks/TSLA/candles?limit=5000&max_points=40&format=columnar").json()
+        if columnar["dates"] != [m["date"] for m in merged]:
+            print("   [FAIL] Columnar buckets differ")
+            return False
+        page = client.get("/stocks/TSLA/candles?limit=100&max_points=10")
+        if len(page.json()) != 10 or "X-Next-Cursor" not in page.headers:
+            print("   [FAIL] Downsampled page lost its cursor")
+            return False
+        print(f"   [OK] {len(raw)} candles -> 40 buckets in both orders; cursor kept")
+    finally:
+        app.dependency_overrides.clear()
+
+    print("\n=== All downsampling tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_downsampling()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
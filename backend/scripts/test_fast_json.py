@@ -0,0 +1,105 @@
+"""
+Test script for the fast JSON response path.
+Checks that the candle, indicator and backtest routes, which now build
+plain dicts and serialize them with orjson, return exactly what the
+validated Pydantic response models would, and that FastJSONResponse
+handles dates, NumPy values and NaN.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+
+from app.api.deps import get_db
+from app.api.responses import FastJSONResponse
+from app.db.models.stock import Candle, Symbol
+from app.main import app
+from app.schemas.indicators import IndicatorsResponse
+from app.schemas.stock import CandleDTO
+from app.services.backtesting.backtest_service import BacktestService
+from app.services.indicators.indicator_service import get_indicator_points
+from scripts.test_columnar_responses import _make_client
+
+
+def test_fast_json():
+    print("=== Testing fast JSON response path ===\n")
+
+    print("1. FastJSONResponse encoding")
+    body = FastJSONResponse(
+        {"d": date(2024, 1, 2), "x": np.float64(1.5), "a": np.array([1.0, np.nan]), "n": None}
+    ).body
+    if json.loads(body) != {"d": "2024-01-02", "x": 1.5, "a": [1.0, None], "n": None}:
+        print(f"   [FAIL] Unexpected encoding: {body!r}")
+        return False
+    print("   [OK] dates, NumPy scalars/arrays and NaN encoded")
+
+    client = _make_client()
+    db = next(app.dependency_overrides[get_db]())
+    try:
+        print("\n2. Candles match CandleDTO")
+        got = client.get("/stocks/TSLA/candles?limit=5000").json()
+        sym = db.execute(select(Symbol).where(Symbol.ticker == "TSLA")).scalar_one()
+        rows = db.execute(
+            select(Candle).where(Candle.symbol_id == sym.id).order_by(Candle.date.asc()).limit(5000)
+        ).scalars().all()
+        expected = [CandleDTO.model_validate(r, from_attributes=True).model_dump(mode="json") for r in rows]
+        if got != expected:
+            print("   [FAIL] Candle rows differ from CandleDTO output")
+            return False
+        if client.get("/stocks/NOPE/candles").json() != []:
+            print("   [FAIL] Unknown symbol did not return []")
+            return False
+        print(f"   [OK] {len(got)} candles")
+
+        print("\n3. Indicators match IndicatorsResponse")
+        url = "/indicators/tsla?start=2022-01-01&end=2023-12-31&sma_period=20&rsi_period=14&bb_period=20&macd=true"
+        got = client.get(url).json()
+        points = get_indicator_points(
+            db=db, symbol="tsla", start=date(2022, 1, 1), end=date(2023, 12, 31),
+            sma_period=20, ema_period=None, rsi_period=14, bb_period=20, bb_std=2.0, macd=(12, 26, 9),
+        )
+        expected = IndicatorsResponse(symbol="TSLA", points=points).model_dump(mode="json")
+        if got != expected:
+            print("   [FAIL] Indicator rows differ from IndicatorsResponse output")
+            return False
+        print(f"   [OK] {len(got['points'])} points with all fields")
+
+        print("\n4. Backtest matches BacktestResult")
+        got = client.get("/backtest/TSLA?start=2022-01-01&end=2023-12-31&sma_period=20").json()
+        result = BacktestService(db).run_sma_threshold_backtest(
+            symbol="TSLA", start=date(2022, 1, 1), end=date(2023, 12, 31), sma_period=20
+        )
+        if got != result.model_dump(mode="json"):
+            print("   [FAIL] Backtest body differs from BacktestResult output")
+            return False
+        if client.get("/backtest/NOPE?start=2022-01-01&end=2023-12-31").status_code != 400:
+            print("   [FAIL] Unknown symbol did not return 400")
+            return False
+        print(f"   [OK] {len(got['equity_curve'])} equity points, {len(got['trades'])} trades")
+    finally:
+        db.close()
+        app.dependency_overrides.clear()
+
+    print("\n=== All fast JSON tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_fast_json()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,230 @@
+"""
+Test script for persisted incremental indicator state.
+Checks that the O(1) SMA/EMA/RSI updates reproduce compute_sma / compute_ema /
+compute_rsi, that ingest advances the stored states by only the new bars,
+that backfills trigger a rebuild, that latest values are served from
+state, and that a failed state update or a concurrently created state
+doesn't fail ingestion. Uses an in-memory SQLite database and SyntheticProvider (no network).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json
+from datetime import date
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.models import Candle, IndicatorState, Symbol
+from app.services.indicators.ema import compute_ema
+from app.services.indicators.incremental import advance, new_state
+from app.services.indicators.indicator_state_service import (
+    _ensure_states,
+    _insert_missing_states,
+    get_latest_indicators,
+    parse_indicator_specs,
+)
+from app.services.indicators.rsi import compute_rsi
+from app.services.indicators.sma import compute_sma
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.market_data.candle_columns import CandleColumns
+from app.services.stocks import ingest_service
+from app.services.stocks.data_version import get_data_version
+from app.services.stocks.ingest_service import ingest_symbol_candles, write_candle_batch
+
+COMPUTE = {"sma": compute_sma, "ema": compute_ema, "rsi": compute_rsi}
+
+
+def _make_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+
+
+def _close_enough(a, b):
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) <= 1e-9 * max(1.0, abs(b))
+
+
+def _expected_latest(db, ticker, kind, period):
+    sym = db.execute(select(Symbol).where(Symbol.ticker == ticker)).scalar_one()
+    candles = db.execute(
+        select(Candle).where(Candle.symbol_id == sym.id).order_by(Candle.date.asc())
+    ).scalars().all()
+    return COMPUTE[kind](candles, period)[-1]
+
+
+def _states(db, ticker):
+    sym = db.execute(select(Symbol).where(Symbol.ticker == ticker)).scalar_one()
+    return {
+        (r.kind, r.period): r
+        for r in db.execute(select(IndicatorState).where(IndicatorState.symbol_id == sym.id)).scalars()
+    }
+
+
+def test_incremental_indicators():
+    print("=== Testing incremental indicator state ===\n")
+
+    provider = SyntheticProvider(seed=11)
+    candles = provider.get_candles("MSFT", date(2020, 1, 1), date(2023, 12, 31))
+    closes = [c.close for c in candles]
+
+    print("1. Bar-by-bar updates reproduce the full recomputation")
+    for kind in ("sma", "ema", "rsi"):
+        for period in (1, 2, 14, 50):
+            expected = COMPUTE[kind](candles, period)
+            state = new_state(kind, period)
+            for i, close in enumerate(closes):
+                # Round-trip through JSON like the persisted column does
+                state = json.loads(json.dumps(state))
+                value = advance(kind, period, state, [close])
+                if not _close_enough(value, expected[i]):
+                    print(f"   [FAIL] {kind}({period}) bar {i}: {value} != {expected[i]}")
+                    return False
+            chunked = new_state(kind, period)
+            for i in range(0, len(closes), 97):
+                value = advance(kind, period, chunked, closes[i : i + 97])
+            if not _close_enough(value, expected[-1]):
+                print(f"   [FAIL] {kind}({period}) chunked feed differs")
+                return False
+    print(f"   [OK] SMA, EMA and RSI match at every one of {len(closes)} bars")
+
+    print("\n2. Ingest creates and advances tracked states")
+    engine, db = _make_session()
+    ingest_symbol_candles(db, "MSFT", date(2020, 1, 1), date(2023, 6, 30), provider=provider)
+    states = _states(db, "MSFT")
+    if set(states) != set(parse_indicator_specs("sma:20,ema:20,rsi:14")):
+        print(f"   [FAIL] Unexpected tracked states: {sorted(states)}")
+        return False
+    for (kind, period), row in states.items():
+        if not _close_enough(row.value, _expected_latest(db, "MSFT", kind, period)):
+            print(f"   [FAIL] {kind}({period}) state value is wrong after first ingest")
+            return False
+    bars_before = {k: r.bars for k, r in states.items()}
+
+    loaded = []
+
+    def count_rows(conn, cursor, statement, parameters, context, executemany):
+        # Candle history reads (the latest-candle lookup uses LIMIT)
+        if statement.startswith("SELECT candles.date, candles.close") and "LIMIT" not in statement:
+            loaded.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_rows)
+    inserted, _, _ = ingest_symbol_candles(db, "MSFT", date(2020, 1, 1), date(2023, 7, 7), provider=provider)
+    event.remove(engine, "before_cursor_execute", count_rows)
+
+    states = _states(db, "MSFT")
+    for (kind, period), row in states.items():
+        if row.bars != bars_before[(kind, period)] + inserted:
+            print(f"   [FAIL] {kind}({period}) advanced {row.bars - bars_before[(kind, period)]} bars, expected {inserted}")
+            return False
+        if not _close_enough(row.value, _expected_latest(db, "MSFT", kind, period)):
+            print(f"   [FAIL] {kind}({period}) value is wrong after appending")
+            return False
+    if len(loaded) != 1:
+        print(f"   [FAIL] Expected one incremental candle read, saw {len(loaded)}")
+        return False
+    print(f"   [OK] Appending {inserted} bars advanced each state by exactly those bars")
+
+    print("\n3. Backfilling older bars rebuilds the state")
+    _, db2 = _make_session()
+    ingest_symbol_candles(db2, "MSFT", date(2022, 1, 1), date(2023, 6, 30), provider=provider)
+    ingest_symbol_candles(db2, "MSFT", date(2020, 1, 1), date(2023, 6, 30), provider=provider)
+    for (kind, period), row in _states(db2, "MSFT").items():
+        expected = _expected_latest(db2, "MSFT", kind, period)
+        if row.as_of != date(2023, 6, 30) or not _close_enough(row.value, expected):
+            print(f"   [FAIL] {kind}({period}) not rebuilt after backfill")
+            return False
+    print("   [OK] States match the full history after a backfill")
+
+    print("\n4. Latest values are served from state")
+    latest = get_latest_indicators(db, "msft", [("sma", 50), ("ema", 20), ("rsi", 14)])
+    if latest is None or latest.as_of != max(r.as_of for r in _states(db, "MSFT").values()):
+        print("   [FAIL] Latest values missing or stale")
+        return False
+    for (kind, period), value in latest.values.items():
+        if not _close_enough(value, _expected_latest(db, "MSFT", kind, period)):
+            print(f"   [FAIL] latest {kind}({period}) is wrong")
+            return False
+
+    loaded.clear()
+    event.listen(engine, "before_cursor_execute", count_rows)
+    get_latest_indicators(db, "MSFT", [("sma", 50), ("ema", 20), ("rsi", 14)])
+    event.remove(engine, "before_cursor_execute", count_rows)
+    if loaded:
+        print("   [FAIL] Up-to-date states re-read candles")
+        return False
+    if get_latest_indicators(db, "NOPE", [("ema", 20)]) is not None:
+        print("   [FAIL] Unknown symbol returned values")
+        return False
+    print(f"   [OK] as_of={latest.as_of}; repeat lookups read no candle history")
+
+    print("\n5. A failed state update doesn't fail the write")
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("state update failed")
+
+    advance_states = ingest_service.advance_indicator_states
+    ingest_service.advance_indicator_states = broken
+    ingest_service.logger.disabled = True
+    try:
+        version = get_data_version(db, "MSFT")
+        inserted, _, _ = ingest_symbol_candles(db, "MSFT", date(2020, 1, 1), date(2023, 9, 29), provider=provider)
+        batch = {
+            t: CandleColumns.from_dtos(provider.get_candles(t, date(2023, 1, 1), date(2023, 3, 31)))
+            for t in ("AAA", "BBB")
+        }
+        counts = write_candle_batch(db, batch)
+    finally:
+        ingest_service.advance_indicator_states = advance_states
+        ingest_service.logger.disabled = False
+    if inserted == 0 or get_data_version(db, "MSFT") != version + 1 or _states(db, "MSFT"):
+        print("   [FAIL] Ingest should succeed, bump the version and discard the states")
+        return False
+    if any(counts[t][0] == 0 or get_data_version(db, t) != 1 for t in batch):
+        print(f"   [FAIL] Batch write lost a ticker's version bump: {counts}")
+        return False
+    latest = get_latest_indicators(db, "MSFT", [("ema", 20), ("rsi", 14)])
+    for (kind, period), value in latest.values.items():
+        if not _close_enough(value, _expected_latest(db, "MSFT", kind, period)):
+            print(f"   [FAIL] {kind}({period}) not rebuilt after a failed update")
+            return False
+    print(f"   [OK] {inserted} bars stored and versions bumped; states rebuilt on lookup")
+
+    print("\n6. Creating states tolerates ones created concurrently")
+    sym_id = db.execute(select(Symbol.id).where(Symbol.ticker == "MSFT")).scalar_one()
+    before = _states(db, "MSFT")
+    # Another session created ema:20 between this session's read and insert
+    _insert_missing_states(db, sym_id, [("ema", 20), ("sma", 5)])
+    db.commit()
+    after = _ensure_states(db, sym_id, [("ema", 20), ("sma", 5)])
+    kept = after[("ema", 20)]
+    if kept.id != before[("ema", 20)].id or kept.bars != before[("ema", 20)].bars or after[("sma", 5)].bars != 0:
+        print("   [FAIL] Existing state was replaced or the new one is missing")
+        return False
+    print("   [OK] Existing state kept, missing one created")
+
+    print("\n=== All incremental indicator tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_incremental_indicators()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,256 @@
+"""
+Test script for gap-aware incremental ingestion.
+Checks the trading-day calendar and that ingest only asks the provider for
+date spans missing from the DB, in one call, and doesn't ask again for
+gaps it couldn't fill.
+Uses an in-memory SQLite database and a fake provider (no network).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.models.stock import Symbol
+from app.schemas.stock import CandleDTO
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.market_data.trading_calendar import is_trading_day, trading_days
+from app.services.stocks.ingest_service import ingest_symbol_candles
+
+
+class RecordingProvider:
+    """Serves one candle per trading day and records requested spans."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_candles(self, symbol, start, end):
+        self.calls.append((start, end))
+        return [
+            CandleDTO(date=d, open=100.0, high=101.0, low=99.0, close=100.5, volume=1000)
+            for d in trading_days(start, end)
+        ]
+
+
+class HoleyProvider(RecordingProvider):
+    """Like RecordingProvider, but drops the given dates."""
+
+    def __init__(self, missing):
+        super().__init__()
+        self.missing = set(missing)
+
+    def get_candles(self, symbol, start, end):
+        return [c for c in super().get_candles(symbol, start, end) if c.date not in self.missing]
+
+
+class EmptyProvider(RecordingProvider):
+    """Answers every request with no rows, like a rate-limited source."""
+
+    def get_candles(self, symbol, start, end):
+        self.calls.append((start, end))
+        return []
+
+
+class WeekdayProvider(RecordingProvider):
+    """Serves every weekday (NYSE holidays included) except the given dates."""
+
+    def __init__(self, missing):
+        super().__init__()
+        self.missing = set(missing)
+
+    def get_candles(self, symbol, start, end):
+        self.calls.append((start, end))
+        days = (start + timedelta(days=i) for i in range((end - start).days + 1))
+        return [
+            CandleDTO(date=d, open=100.0, high=101.0, low=99.0, close=100.5, volume=1000)
+            for d in days
+            if d.weekday() < 5 and d not in self.missing
+        ]
+
+
+class CountingProvider(SyntheticProvider):
+    """SyntheticProvider (with its rare trading halts) counting requests."""
+
+    def __init__(self):
+        super().__init__(seed=3, halt_probability=0.002)
+        self.calls = 0
+
+    def iter_candle_batches(self, symbol, start, end):
+        self.calls += 1
+        return super().iter_candle_batches(symbol=symbol, start=start, end=end)
+
+
+def _forget_complete_ranges(db):
+    """
+    Clear the recorded complete ranges, as for rows stored before they
+    were tracked.
+    """
+    db.execute(update(Symbol).values(complete_from=None, complete_through=None))
+    db.commit()
+
+
+def _make_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+
+
+def test_incremental_ingest():
+    print("=== Testing Incremental Ingest ===\n")
+
+    # 1. Calendar sanity: NYSE had 250 sessions in 2023 and 252 in 2024
+    print("1. Testing trading calendar:")
+    n2023 = len(trading_days(date(2023, 1, 1), date(2023, 12, 31)))
+    n2024 = len(trading_days(date(2024, 1, 1), date(2024, 12, 31)))
+    print(f"   2023: {n2023} trading days (expected 250)")
+    print(f"   2024: {n2024} trading days (expected 252)")
+    if n2023 != 250 or n2024 != 252:
+        print("   [FAIL] Unexpected trading day counts")
+        return False
+    for holiday in (
+        date(2024, 3, 29), date(2024, 7, 4), date(2022, 12, 26), date(2012, 10, 29), date(1985, 9, 27), date(1994, 4, 27)
+    ):
+        if is_trading_day(holiday):
+            print(f"   [FAIL] {holiday} should be a market holiday")
+            return False
+    print("   [OK] Calendar matches NYSE schedule")
+
+    db = _make_session()
+    try:
+        start, end = date(2023, 1, 1), date(2023, 12, 31)
+
+        # 2. Initial ingest with two internal holes
+        print("\n2. Initial ingest with internal gaps:")
+        holes = [date(2023, 3, 15), date(2023, 3, 16), date(2023, 8, 1)]
+        provider = HoleyProvider(holes)
+        result = ingest_symbol_candles(db, "gap", start, end, provider=provider)
+        print(f"   Result: {result}, calls: {provider.calls}")
+        if result != (247, 0, 247) or provider.calls != [(start, end)]:
+            print("   [FAIL] Expected one full-range call inserting 247 rows")
+            return False
+        print("   [OK] Unknown symbol fetched over the full range")
+
+        # 3. The provider still lacks the holes: they aren't asked for again
+        print("\n3. Gaps the provider couldn't fill:")
+        provider = HoleyProvider(holes)
+        result = ingest_symbol_candles(db, "gap", start, end, provider=provider)
+        print(f"   Result: {result}, calls: {provider.calls}")
+        if result != (0, 0, 0) or provider.calls:
+            print("   [FAIL] Expected no provider calls for recorded gaps")
+            return False
+        print("   [OK] Range recorded as complete; holes not requested again")
+
+        # 4. Rows stored before the range was recorded: holes are fetched in
+        # one call over the missing spans
+        print("\n4. Re-ingest fills only the holes:")
+        _forget_complete_ranges(db)
+        provider = RecordingProvider()
+        result = ingest_symbol_candles(db, "GAP", start, end, provider=provider)
+        print(f"   Result: {result}, calls: {provider.calls}")
+        if result != (3, 0, 3) or provider.calls != [(date(2023, 3, 15), date(2023, 8, 1))]:
+            print("   [FAIL] Expected one call from the first hole to the last, inserting 3 rows")
+            return False
+        print("   [OK] Internal gaps detected and filled")
+
+        # Fully covered range: no provider calls at all
+        provider = RecordingProvider()
+        result = ingest_symbol_candles(db, "gap", start, end, provider=provider)
+        print(f"   Fully covered: {result}, calls: {provider.calls}")
+        if result != (0, 0, 0) or provider.calls:
+            print("   [FAIL] Expected no provider calls")
+            return False
+        print("   [OK] Nothing fetched")
+
+        # 5. Extending the range only fetches the new tail (first session is Jan 2)
+        print("\n5. Extending the range by a few days:")
+        provider = RecordingProvider()
+        result = ingest_symbol_candles(db, "gap", start, date(2024, 1, 5), provider=provider)
+        print(f"   Result: {result}, calls: {provider.calls}")
+        if result != (4, 0, 4) or provider.calls != [(date(2024, 1, 2), date(2024, 1, 5))]:
+            print("   [FAIL] Expected a single tail call")
+            return False
+        print("   [OK] Only the missing tail fetched")
+
+        # 6. incremental=False still refetches everything
+        print("\n6. Full refresh:")
+        provider = RecordingProvider()
+        result = ingest_symbol_candles(db, "gap", start, end, provider=provider, incremental=False)
+        print(f"   Result: {result}, calls: {provider.calls}")
+        if result != (0, 250, 250) or provider.calls != [(start, end)]:
+            print("   [FAIL] Expected a full-range call with every row skipped")
+            return False
+        print("   [OK] Full refresh unaffected")
+
+        # 7. Rows on non-NYSE weekdays (foreign listings) don't hide gaps
+        print("\n7. Weekday listing with NYSE holidays stored:")
+        lost = [date(2023, 5, 10), date(2023, 10, 2)]
+        provider = WeekdayProvider(lost)
+        ingest_symbol_candles(db, "VOD.UK", start, end, provider=provider)
+        _forget_complete_ranges(db)
+        provider = WeekdayProvider([])
+        result = ingest_symbol_candles(db, "VOD.UK", start, end, provider=provider)
+        print(f"   Result: {result}, calls: {provider.calls}")
+        if result != (2, 0, 2) or provider.calls != [(lost[0], lost[1])]:
+            print("   [FAIL] Expected the two lost NYSE days to be fetched")
+            return False
+        print("   [OK] Gaps found by date, not by row count")
+
+        # 8. A second ingest of a stored 21-year history with halts makes at
+        # most one provider call
+        print("\n8. Re-ingesting 2000-2020 from SyntheticProvider:")
+        provider = CountingProvider()
+        first = ingest_symbol_candles(db, "SYN", date(2000, 1, 1), date(2020, 12, 31), provider=provider)
+        calls = provider.calls
+        second = ingest_symbol_candles(db, "SYN", date(2000, 1, 1), date(2020, 12, 31), provider=provider)
+        print(f"   First: {first}, second: {second}, provider calls on re-ingest: {provider.calls - calls}")
+        if first[0] < 5000 or second != (0, 0, 0) or provider.calls - calls > 1:
+            print("   [FAIL] Halted days were requested again")
+            return False
+        print("   [OK] Halts are not re-requested")
+
+        # 9. An empty answer before the first stored candle isn't recorded
+        # as complete, so those days can still be backfilled
+        print("\n9. Empty answer for older days, then a real one:")
+        ingest_symbol_candles(db, "LIM", date(2022, 1, 1), date(2022, 12, 31), provider=RecordingProvider())
+        result = ingest_symbol_candles(db, "LIM", date(2000, 1, 1), date(2022, 12, 31), provider=EmptyProvider())
+        complete_from = db.execute(select(Symbol.complete_from).where(Symbol.ticker == "LIM")).scalar_one()
+        print(f"   Empty answer: {result}, complete_from: {complete_from}")
+        if result != (0, 0, 0) or complete_from != date(2022, 1, 3):
+            print("   [FAIL] Days before the first stored candle were recorded as complete")
+            return False
+        provider = RecordingProvider()
+        result = ingest_symbol_candles(db, "LIM", date(2000, 1, 1), date(2022, 12, 31), provider=provider)
+        expected = len(trading_days(date(2000, 1, 1), date(2021, 12, 31)))
+        print(f"   Real answer: {result}, calls: {provider.calls}")
+        if result != (expected, 0, expected) or provider.calls != [(date(2000, 1, 3), date(2021, 12, 31))]:
+            print("   [FAIL] Older days were not backfilled")
+            return False
+        print(f"   [OK] {expected} older days backfilled once the provider answered")
+    finally:
+        db.close()
+
+    print("\n=== All incremental ingest tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_incremental_ingest()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,169 @@
+"""
+Test script for the versioned indicator cache.
+Checks LRU eviction under a byte budget, that repeated indicator requests
+are served from the cache without touching the DB, and that ingesting new
+rows bumps the symbol's data version so stale results are never returned.
+Uses an in-memory SQLite database and SyntheticProvider (no network).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import date
+
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.services.indicators import indicator_cache
+from app.services.indicators.indicator_service import get_indicator_points
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks.data_version import get_data_version
+from app.services.stocks.ingest_service import ingest_symbol_candles
+from app.utils.sized_cache import ENTRY_OVERHEAD_BYTES, SizedLRUCache
+
+
+def _make_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+
+
+def _same_point(a, b):
+    # Dates compare exactly; indicator floats to rounding
+    for key, x in a.items():
+        y = b[key]
+        if isinstance(x, float) and isinstance(y, float):
+            if abs(x - y) > 1e-9 * max(1.0, abs(x)):
+                return False
+        elif x != y:
+            return False
+    return True
+
+
+def _points(db):
+    return get_indicator_points(
+        db=db,
+        symbol="aapl",
+        start=date(2023, 1, 1),
+        end=date(2023, 12, 31),
+        sma_period=20,
+        ema_period=20,
+        rsi_period=14,
+        bb_period=20,
+        bb_std=2.0,
+    )
+
+
+def test_indicator_cache():
+    print("=== Testing versioned indicator cache ===\n")
+
+    print("1. LRU eviction under a byte budget")
+    entry = ENTRY_OVERHEAD_BYTES + 800  # 100 float64s
+    lru = SizedLRUCache(max_bytes=3 * entry)
+    for key in ("a", "b", "c"):
+        lru.put(key, np.zeros(100))
+    lru.get("a")  # "b" is now least recently used
+    lru.put("d", np.zeros(100))
+    if lru.get("b") is not None or lru.get("a") is None or lru.stats()["evictions"] != 1:
+        print(f"   [FAIL] Unexpected eviction: {lru.stats()}")
+        return False
+    if lru.resident_bytes > lru.max_bytes:
+        print("   [FAIL] Cache exceeds its byte budget")
+        return False
+    lru.put("huge", np.zeros(10_000))
+    if lru.get("huge") is not None:
+        print("   [FAIL] Value larger than the budget was stored")
+        return False
+    try:
+        lru.get("a")[0] = 1.0
+        print("   [FAIL] Cached arrays are writable")
+        return False
+    except ValueError:
+        pass
+    print("   [OK] LRU entry evicted, budget respected, cached arrays read-only")
+
+    print("\n2. Repeated requests are served from the cache")
+    indicator_cache._cache = SizedLRUCache(max_bytes=16 * 1024 * 1024)
+    cache = indicator_cache.get_indicator_cache()
+    engine, db = _make_session()
+    provider = SyntheticProvider(seed=3)
+    ingest_symbol_candles(db, "AAPL", date(2023, 1, 1), date(2023, 6, 30), provider=provider)
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+    first = _points(db)
+    queries_first = len(queries)
+    second = _points(db)
+    stats = cache.stats()
+    if [p.model_dump() for p in first] != [p.model_dump() for p in second]:
+        print("   [FAIL] Cached response differs")
+        return False
+    # Misses: sma, ema, rsi, rolling_std, bb_upper, bb_lower (the Bollinger
+    # middle band is the sma node). Hits: the five distinct requested
+    # series. Candles come from the candle series cache.
+    # The only queries left are the data-version lookups.
+    repeated = queries[queries_first:]
+    if any("data_version" not in q for q in repeated) or stats["hits"] != 5 or stats["misses"] != 6:
+        print(f"   [FAIL] Expected 5 hits / 6 misses and only version lookups: {stats}, {repeated}")
+        return False
+    print(f"   [OK] {len(first)} points; second request hit the cache with only version lookups")
+
+    print("\n3. Ingesting new rows invalidates the symbol")
+    version = get_data_version(db, "AAPL")
+    inserted, _, _ = ingest_symbol_candles(db, "AAPL", date(2023, 1, 1), date(2023, 12, 31), provider=provider)
+    if inserted == 0 or get_data_version(db, "AAPL") != version + 1:
+        print("   [FAIL] Data version was not bumped by ingest")
+        return False
+    third = _points(db)
+    if len(third) <= len(first) or third[-1].date <= first[-1].date:
+        print("   [FAIL] Stale cached points were served after ingest")
+        return False
+    for old, new in zip(first, third):
+        if not _same_point(old.model_dump(), new.model_dump()):
+            print(f"   [FAIL] Overlapping point changed after ingest: {old} vs {new}")
+            return False
+
+    version = get_data_version(db, "AAPL")
+    inserted, _, _ = ingest_symbol_candles(db, "AAPL", date(2023, 1, 1), date(2023, 12, 31), provider=provider)
+    if inserted != 0 or get_data_version(db, "AAPL") != version:
+        print("   [FAIL] A no-op ingest bumped the data version")
+        return False
+    hits = cache.stats()["hits"]
+    _points(db)
+    if cache.stats()["hits"] != hits + 5:
+        print("   [FAIL] No-op ingest invalidated cached results")
+        return False
+    print(f"   [OK] {len(third)} points after ingest; no-op ingest keeps the cache warm")
+
+    print("\n4. Disabled cache still serves correct results")
+    indicator_cache._cache = SizedLRUCache(max_bytes=0)
+    if [p.model_dump() for p in _points(db)] != [p.model_dump() for p in third]:
+        print("   [FAIL] Uncached results differ")
+        return False
+    indicator_cache._cache = None
+    print("   [OK] max_bytes=0 disables caching")
+
+    print("\n=== All indicator cache tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_indicator_cache()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
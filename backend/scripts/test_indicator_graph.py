@@ -0,0 +1,179 @@
+"""
+Test script for the indicator dependency graph and MACD.
+Checks that requests resolve into a deduplicated DAG with every node
+computed once, that MACD reuses EMAs and Bollinger reuses the SMA, that
+cached nodes short-circuit their subgraph, and that graph outputs match
+compute_macd / compute_bollinger_bands.
+Uses an in-memory SQLite database and SyntheticProvider (no network).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import date
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.schemas.stock import CandleDTO
+from app.services.indicators import graph, indicator_cache
+from app.services.indicators.bollinger import compute_bollinger_bands
+from app.services.indicators.graph import CLOSE, evaluate, node, register, resolve
+from app.services.indicators.indicator_service import get_indicator_points
+from app.services.indicators.kernels import ema_array, sma_array
+from app.services.indicators.macd import compute_macd
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks.ingest_service import ingest_symbol_candles
+from app.utils.sized_cache import SizedLRUCache
+
+
+def _make_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+
+
+def _close(a, b):
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) <= 1e-9 * max(1.0, abs(b))
+
+
+def test_indicator_graph():
+    print("=== Testing indicator dependency graph ===\n")
+
+    print("1. MACD reference values")
+    candles = [
+        CandleDTO(date=date(2023, 1, 1), open=1, high=1, low=1, close=c, volume=0)
+        for c in [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    ]
+    line, sig, hist = compute_macd(candles, fast=2, slow=3, signal=2)
+    # EMA2 = [-, 1.5, 2.5, 3.5, 4.5, 5.5], EMA3 = [-, -, 2, 3, 4, 5]
+    if line[:2] != [None, None] or line[2:] != [0.5, 0.5, 0.5, 0.5]:
+        print(f"   [FAIL] MACD line {line}")
+        return False
+    if sig[:3] != [None] * 3 or sig[3:] != [0.5, 0.5, 0.5] or hist[3:] != [0.0, 0.0, 0.0]:
+        print(f"   [FAIL] Signal/histogram {sig} {hist}")
+        return False
+    try:
+        compute_macd(candles, fast=26, slow=12)
+        print("   [FAIL] fast >= slow accepted")
+        return False
+    except ValueError:
+        pass
+    print("   [OK] Line, signal and histogram on a linear ramp")
+
+    print("\n2. Requests resolve into a deduplicated DAG")
+    targets = [
+        node("ema", 12),
+        node("macd_hist", 12, 26, 9),
+        node("macd", 12, 26),
+        node("sma", 20),
+        node("bb_upper", 20, 2.0),
+        node("bb_lower", 20, 2.0),
+    ]
+    order = resolve(targets)
+    if len(order) != len(set(order)):
+        print(f"   [FAIL] Duplicate nodes in plan: {order}")
+        return False
+    expected = {
+        CLOSE, ("ema", (12,)), ("ema", (26,)), ("macd", (12, 26)), ("macd_signal", (12, 26, 9)),
+        ("macd_hist", (12, 26, 9)), ("sma", (20,)), ("rolling_std", (20,)),
+        ("bb_upper", (20, 2.0)), ("bb_lower", (20, 2.0)),
+    }
+    if set(order) != expected:
+        print(f"   [FAIL] Unexpected plan: {order}")
+        return False
+    position = {n: i for i, n in enumerate(order)}
+    for n in order:
+        if any(position[d] > position[n] for d in graph._inputs(n)):
+            print(f"   [FAIL] {n} is scheduled before its inputs")
+            return False
+    print(f"   [OK] {len(targets)} targets -> {len(order)} nodes, dependencies first")
+
+    print("\n3. Each node is computed once per request")
+    calls = []
+    if "test_probe" not in graph._REGISTRY:
+        register("test_probe", inputs=lambda: [CLOSE], compute=lambda close: calls.append(1) or close * 2)
+        register(
+            "test_probe_plus",
+            inputs=lambda k: [("test_probe", ())],
+            compute=lambda probe, k: probe + k,
+        )
+    closes = 100.0 + np.cumsum(np.random.default_rng(2).normal(0, 1, 600))
+    out = evaluate(
+        [node("test_probe_plus", 1), node("test_probe_plus", 2), node("test_probe")],
+        {"close": closes},
+    )
+    if len(calls) != 1 or not np.array_equal(out[node("test_probe_plus", 2)], closes * 2 + 2):
+        print(f"   [FAIL] Shared node computed {len(calls)} times")
+        return False
+
+    cache = SizedLRUCache(max_bytes=16 * 1024 * 1024)
+    out = evaluate(targets, {"close": closes}, cache, ("T",))
+    if cache.stats()["misses"] != len(expected) - 1:
+        print(f"   [FAIL] Expected {len(expected) - 1} computed nodes, cache saw {cache.stats()}")
+        return False
+    if not np.array_equal(out[node("macd", 12, 26)], ema_array(closes, 12) - ema_array(closes, 26), equal_nan=True):
+        print("   [FAIL] MACD line is not EMA(12) - EMA(26)")
+        return False
+
+    cache = SizedLRUCache(max_bytes=16 * 1024 * 1024)
+    evaluate([node("macd_hist", 12, 26, 9)], {"close": closes}, cache, ("T",))
+    before = cache.stats()["misses"]
+    evaluate([node("macd_hist", 12, 26, 9)], {"close": closes}, cache, ("T",))
+    if cache.stats()["misses"] != before or cache.stats()["hits"] != 1:
+        print(f"   [FAIL] Cached target did not short-circuit its inputs: {cache.stats()}")
+        return False
+
+    smas = evaluate([node("sma", p) for p in (5, 10, 50)], {"close": closes})
+    for p in (5, 10, 50):
+        if not np.array_equal(smas[node("sma", p)], sma_array(closes, p), equal_nan=True):
+            print(f"   [FAIL] Batched SMA({p}) differs from sma_array")
+            return False
+    print("   [OK] Shared nodes computed once; cached targets skip their subgraph")
+
+    print("\n4. Service output matches the list-based indicators")
+    indicator_cache._cache = SizedLRUCache(max_bytes=16 * 1024 * 1024)
+    db = _make_session()
+    provider = SyntheticProvider(seed=21)
+    ingest_symbol_candles(db, "AMZN", date(2022, 1, 1), date(2023, 12, 31), provider=provider)
+    points = get_indicator_points(
+        db=db, symbol="AMZN", start=date(2022, 1, 1), end=date(2023, 12, 31),
+        sma_period=12, ema_period=12, rsi_period=None, bb_period=20, bb_std=2.0, macd=(12, 26, 9),
+    )
+    candles = provider.get_candles("AMZN", date(2022, 1, 1), date(2023, 12, 31))
+    expected_macd = compute_macd(candles, 12, 26, 9)
+    expected_bb = compute_bollinger_bands(candles, 20, 2.0)
+    indicator_cache._cache = None
+    for i, p in enumerate(points):
+        got = (p.macd, p.macd_signal, p.macd_hist, p.bb_middle, p.bb_upper, p.bb_lower)
+        want = tuple(series[i] for series in expected_macd + expected_bb)
+        if not all(_close(g, w) for g, w in zip(got, want)):
+            print(f"   [FAIL] {p.date}: {got} != {want}")
+            return False
+    print(f"   [OK] MACD and Bollinger match over {len(points)} points")
+
+    print("\n=== All indicator graph tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_indicator_graph()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
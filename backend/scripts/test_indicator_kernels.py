@@ -0,0 +1,142 @@
+"""
+Test script for the NumPy indicator kernels.
+Checks that sma_array, ema_array, rsi_array and bollinger_arrays match the
+list-based compute_* functions (NaN where they return None) and reports
+the speedup on a 10k-bar series. No database needed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.schemas.stock import CandleDTO
+from app.services.indicators.bollinger import compute_bollinger_bands
+from app.services.indicators.ema import compute_ema
+from app.services.indicators.kernels import (
+    as_closes,
+    bollinger_arrays,
+    ema_array,
+    nan_to_none,
+    rsi_array,
+    sma_array,
+)
+from app.services.indicators.rsi import compute_rsi
+from app.services.indicators.sma import compute_sma
+
+RTOL = 1e-9
+
+
+def _candles(closes):
+    first = date(2000, 1, 3)
+    return [
+        CandleDTO(date=first + timedelta(days=i), open=c, high=c, low=c, close=c, volume=1000)
+        for i, c in enumerate(closes)
+    ]
+
+
+def _matches(actual, expected, atol=1e-9):
+    expected = np.array([np.nan if v is None else v for v in expected], dtype=np.float64)
+    if actual.shape != expected.shape:
+        return False
+    if not np.array_equal(np.isnan(actual), np.isnan(expected)):
+        return False
+    return np.allclose(actual, expected, rtol=RTOL, atol=atol, equal_nan=True)
+
+
+def _series():
+    rng = np.random.default_rng(42)
+    walk = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, 10_000)))
+    return {
+        "random walk": np.round(walk, 4),
+        "flat": np.full(300, 42.5),
+        "rising": np.arange(1.0, 301.0),
+        "falling": np.arange(300.0, 0.0, -1.0),
+        "short": np.array([10.0, 11.0, 9.5]),
+        "empty": np.array([], dtype=np.float64),
+    }
+
+
+def test_indicator_kernels():
+    print("=== Testing NumPy indicator kernels ===\n")
+
+    print("1. Kernels match the list-based indicators")
+    for name, closes in _series().items():
+        candles = _candles(closes.tolist())
+        for period in (1, 2, 3, 14, 20, 50, 200):
+            checks = [
+                ("sma", sma_array(closes, period), compute_sma(candles, period), 1e-9),
+                ("ema", ema_array(closes, period), compute_ema(candles, period), 1e-9),
+                ("rsi", rsi_array(closes, period), compute_rsi(candles, period), 1e-9),
+            ]
+            # Both Bollinger implementations use rolling variance; allow for
+            # rounding in the band width relative to the price level
+            bands = bollinger_arrays(closes, period, 2.0)
+            expected = compute_bollinger_bands(candles, period, 2.0)
+            scale = float(np.max(closes)) if len(closes) else 1.0
+            checks += [("bb", a, e, 1e-8 * scale) for a, e in zip(bands, expected)]
+            for label, actual, exp, atol in checks:
+                if not _matches(actual, exp, atol):
+                    print(f"   [FAIL] {label} period={period} differs on {name} series")
+                    return False
+    print("   [OK] SMA, EMA, RSI and Bollinger match for all series and periods")
+
+    print("\n2. Validation and conversion")
+    for fn in (sma_array, ema_array, rsi_array, bollinger_arrays):
+        try:
+            fn(as_closes([1.0, 2.0]), 0)
+            print(f"   [FAIL] {fn.__name__} accepted period=0")
+            return False
+        except ValueError:
+            pass
+    try:
+        bollinger_arrays(as_closes([1.0, 2.0]), 2, -1.0)
+        print("   [FAIL] bollinger_arrays accepted num_std < 0")
+        return False
+    except ValueError:
+        pass
+    if nan_to_none(np.array([np.nan, 1.5])) != [None, 1.5]:
+        print("   [FAIL] nan_to_none conversion is wrong")
+        return False
+    print("   [OK] Bad periods rejected, NaN converts to None")
+
+    print("\n3. Speed on a 10k-bar series")
+    closes = _series()["random walk"]
+    candles = _candles(closes.tolist())
+    pairs = [
+        ("sma", lambda: compute_sma(candles, 20), lambda: sma_array(closes, 20)),
+        ("ema", lambda: compute_ema(candles, 20), lambda: ema_array(closes, 20)),
+        ("rsi", lambda: compute_rsi(candles, 14), lambda: rsi_array(closes, 14)),
+        ("bollinger", lambda: compute_bollinger_bands(candles, 20), lambda: bollinger_arrays(closes, 20)),
+    ]
+    for label, slow, fast in pairs:
+        t0 = time.perf_counter()
+        for _ in range(3):
+            slow()
+        t1 = time.perf_counter()
+        for _ in range(30):
+            fast()
+        t2 = time.perf_counter()
+        slow_ms = (t1 - t0) / 3 * 1000
+        fast_ms = (t2 - t1) / 30 * 1000
+        print(f"   {label:<10} list: {slow_ms:7.2f} ms   numpy: {fast_ms:6.3f} ms   ({slow_ms / fast_ms:.0f}x)")
+
+    print("\n=== All indicator kernel tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_indicator_kernels()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
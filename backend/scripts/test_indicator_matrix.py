@@ -0,0 +1,158 @@
+"""
+Test script for the multi-period indicator matrix.
+Checks that the shared-work kernels (one cumulative sum for every SMA, one
+gains/losses pass for every RSI) match the single-period kernels, that the
+matrix columns match the per-point indicator output, and that a whole
+ribbon of periods is served from a single candle load.
+Uses an in-memory SQLite database and SyntheticProvider (no network).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import date
+
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.main import app
+from app.services.indicators import indicator_cache
+from app.services.indicators.indicator_service import get_indicator_matrix, get_indicator_points
+from app.services.indicators.kernels import rsi_array, rsi_matrix, sma_array, sma_matrix
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks import candle_cache
+from app.services.stocks.ingest_service import ingest_symbol_candles
+from app.utils.sized_cache import SizedLRUCache
+
+START = date(2022, 1, 1)
+END = date(2023, 12, 31)
+
+
+def _make_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+
+
+def test_indicator_matrix():
+    print("=== Testing multi-period indicator matrix ===\n")
+
+    print("1. Shared-work kernels match the single-period kernels")
+    closes = 100.0 + np.cumsum(np.random.default_rng(5).normal(0, 1, 800))
+    periods = [1, 2, 5, 10, 20, 50, 200, 800, 900]
+    sma = sma_matrix(closes, periods)
+    rsi = rsi_matrix(closes, periods)
+    for row, period in enumerate(periods):
+        if not np.array_equal(sma[row], sma_array(closes, period), equal_nan=True):
+            print(f"   [FAIL] sma_matrix row for period {period} differs")
+            return False
+        if not np.array_equal(rsi[row], rsi_array(closes, period), equal_nan=True):
+            print(f"   [FAIL] rsi_matrix row for period {period} differs")
+            return False
+    if sma_matrix(np.empty(0), [5]).shape != (1, 0):
+        print("   [FAIL] Empty input has the wrong shape")
+        return False
+    print(f"   [OK] {len(periods)} periods identical to sma_array / rsi_array")
+
+    print("\n2. Matrix columns match the per-point indicators")
+    indicator_cache._cache = SizedLRUCache(max_bytes=32 * 1024 * 1024)
+    engine, db = _make_session()
+    ingest_symbol_candles(db, "NVDA", START, END, provider=SyntheticProvider(seed=8))
+
+    matrix = get_indicator_matrix(
+        db, "nvda", START, END,
+        sma_periods=[10, 20, 50, 20],
+        ema_periods=[12, 26],
+        rsi_periods=[14],
+        bb_periods=[20],
+        bb_stds=[1.0, 2.0, 2.5],
+    )
+    expected_columns = {
+        "sma_10", "sma_20", "sma_50", "ema_12", "ema_26", "rsi_14", "bb_middle_20",
+        "bb_upper_20_1", "bb_lower_20_1", "bb_upper_20_2", "bb_lower_20_2",
+        "bb_upper_20_2.5", "bb_lower_20_2.5",
+    }
+    if set(matrix.columns) != expected_columns:
+        print(f"   [FAIL] Unexpected columns: {sorted(matrix.columns)}")
+        return False
+    if any(len(col) != len(matrix.dates) for col in matrix.columns.values()):
+        print("   [FAIL] Columns are not aligned with dates")
+        return False
+
+    for sma_p, ema_p, bb_std in ((20, 12, 2.0), (50, 26, 2.5)):
+        points = get_indicator_points(
+            db=db, symbol="NVDA", start=START, end=END,
+            sma_period=sma_p, ema_period=ema_p, rsi_period=14, bb_period=20, bb_std=bb_std,
+        )
+        label = f"20_{bb_std:g}"
+        if [p.date for p in points] != matrix.dates or [p.close for p in points] != matrix.close:
+            print("   [FAIL] Dates/closes differ from the per-point output")
+            return False
+        for field, column in (
+            ("sma", f"sma_{sma_p}"),
+            ("ema", f"ema_{ema_p}"),
+            ("rsi", "rsi_14"),
+            ("bb_middle", "bb_middle_20"),
+            ("bb_upper", f"bb_upper_{label}"),
+            ("bb_lower", f"bb_lower_{label}"),
+        ):
+            for p, value in zip(points, matrix.columns[column]):
+                got = getattr(p, field)
+                if (got is None) != (value is None) or (got is not None and abs(got - value) > 1e-9 * abs(got)):
+                    print(f"   [FAIL] {column} differs from {field} at {p.date}: {value} vs {got}")
+                    return False
+    print(f"   [OK] {len(matrix.columns)} columns x {len(matrix.dates)} dates agree")
+
+    print("\n3. A ribbon of periods reads candles once")
+    indicator_cache._cache = SizedLRUCache(max_bytes=32 * 1024 * 1024)
+    candle_cache._cache = SizedLRUCache(max_bytes=32 * 1024 * 1024)
+    loads = []
+
+    def count_loads(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT candles.date"):
+            loads.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_loads)
+    ribbon = get_indicator_matrix(db, "NVDA", START, END, sma_periods=list(range(10, 110, 10)))
+    get_indicator_matrix(db, "NVDA", START, END, sma_periods=list(range(10, 110, 10)))
+    event.remove(engine, "before_cursor_execute", count_loads)
+    if len(loads) != 1 or len(ribbon.columns) != 10:
+        print(f"   [FAIL] Expected 10 columns from one candle read, saw {len(ribbon.columns)} / {len(loads)}")
+        return False
+    if get_indicator_matrix(db, "NOPE", START, END, sma_periods=[5]).columns:
+        print("   [FAIL] Unknown symbol returned columns")
+        return False
+    indicator_cache._cache = None
+    candle_cache._cache = None
+    print("   [OK] 10 SMAs from one candle read; repeat served from cache")
+
+    print("\n4. Route is registered")
+    params = {p["name"] for p in app.openapi()["paths"]["/indicators/{symbol}/matrix"]["get"]["parameters"]}
+    if not {"sma", "ema", "rsi", "bb_period", "bb_std"} <= params:
+        print(f"   [FAIL] Missing query parameters: {sorted(params)}")
+        return False
+    print("   [OK] GET /indicators/{symbol}/matrix")
+
+    print("\n=== All indicator matrix tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_indicator_matrix()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,164 @@
+"""
+Test script for Monte Carlo resampling of backtests.
+Checks that resampled max drawdowns and total returns match paths built
+step by step, that degenerate resamples reproduce the backtest's own
+metrics, that seeds make runs reproducible, that /backtest returns the
+distributions only when asked (in every response format), and that
+10,000 resamples take well under a second.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+
+import numpy as np
+
+from app.main import app
+from app.schemas.backtest import MonteCarloMethod
+from app.services.backtesting.metrics import compute_metrics
+from app.services.backtesting.monte_carlo import _resample, run_monte_carlo
+from scripts.test_columnar_responses import _make_client
+
+URL = "/backtest/TSLA?start=2022-01-01&end=2023-12-31&sma_period=20"
+
+
+def _equity(n: int, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 10_000 * np.cumprod(1 + rng.normal(0.0004, 0.015, n))
+
+
+def _close(a: float, b: float) -> bool:
+    return abs(a - b) <= 1e-9 * max(1.0, abs(b))
+
+
+def test_monte_carlo():
+    print("=== Testing Monte Carlo resampling ===\n")
+
+    print("1. Block summaries give the step-by-step path metrics")
+    rng = np.random.default_rng(0)
+    for n, block in ((103, 10), (60, 1), (7, 7), (19, 5)):
+        steps = rng.normal(0.0005, 0.03, n)
+        growth, drawdown, total, squares = _resample(steps, block, 200, np.random.default_rng(5))
+        # Same draws as _resample makes for a single batch
+        draws = np.random.default_rng(5)
+        full, tail = divmod(n, block)
+        starts = draws.integers(0, n - block + 1, size=(200, full)) if full else np.zeros((200, 0), dtype=int)
+        tails = draws.integers(0, n - tail + 1, size=(200, 1)) if tail else None
+        for row in range(200):
+            parts = [steps[s:s + block] for s in starts[row]]
+            if tails is not None:
+                parts.append(steps[tails[row, 0]:tails[row, 0] + tail])
+            path = np.concatenate(parts)
+            level = np.concatenate(([0.0], np.cumsum(np.log1p(path))))
+            deepest = (np.maximum.accumulate(level) - level).max()
+            if not (
+                _close(growth[row], level[-1])
+                and _close(drawdown[row], deepest)
+                and _close(total[row], path.sum())
+                and _close(squares[row], (path * path).sum())
+            ):
+                print(f"   [FAIL] n={n} block={block} path {row} differs")
+                return False
+    print("   [OK] Growth, max drawdown and sums exact for 800 paths")
+
+    print("\n2. Degenerate resamples reproduce the backtest")
+    equity = _equity(500)
+    point = compute_metrics(equity_curve=equity, trades=np.zeros(0))
+    whole = run_monte_carlo(
+        MonteCarloMethod.returns, equity=equity, trade_returns=np.zeros(0), years=2.0, resamples=100, block_size=10_000
+    )
+    for name in ("total_return_pct", "max_drawdown_pct", "sharpe_ratio"):
+        dist = getattr(whole, name)
+        if not (_close(dist.p5, getattr(point, name)) and _close(dist.p95, getattr(point, name))):
+            print(f"   [FAIL] One whole-history block gives {name} {dist} vs {getattr(point, name)}")
+            return False
+    same = run_monte_carlo(
+        MonteCarloMethod.trades, equity=equity, trade_returns=np.full(8, 0.05), years=2.0, resamples=100
+    )
+    if not _close(same.total_return_pct.mean, (1.05 ** 8 - 1) * 100) or same.max_drawdown_pct.p95 != 0.0:
+        print(f"   [FAIL] Identical trades give {same.total_return_pct}")
+        return False
+    empty = run_monte_carlo(MonteCarloMethod.trades, equity=equity, trade_returns=np.zeros(0), years=2.0)
+    if empty.total_return_pct.p95 != 0.0 or empty.sharpe_ratio.mean != 0.0:
+        print("   [FAIL] No trades should give zero distributions")
+        return False
+    print(f"   [OK] Whole-history block = point metrics (Sharpe {point.sharpe_ratio:.3f}); fixed and empty trade lists")
+
+    print("\n3. Seeds")
+    kwargs = dict(equity=equity, trade_returns=np.zeros(0), years=2.0, resamples=500)
+    a = run_monte_carlo(MonteCarloMethod.returns, seed=7, **kwargs)
+    b = run_monte_carlo(MonteCarloMethod.returns, seed=7, **kwargs)
+    c = run_monte_carlo(MonteCarloMethod.returns, seed=8, **kwargs)
+    if a != b or a == c:
+        print("   [FAIL] Seeded runs are not reproducible (or seeds ignored)")
+        return False
+    print("   [OK] Same seed, same distributions; different seed differs")
+
+    print("\n4. /backtest monte_carlo parameter")
+    client = _make_client()
+    try:
+        plain = client.get(URL).json()
+        if plain["monte_carlo"] is not None:
+            print("   [FAIL] Distributions returned without monte_carlo")
+            return False
+        for method in ("trades", "returns"):
+            r = client.get(f"{URL}&monte_carlo={method}&mc_resamples=2000&mc_seed=1")
+            body = r.json()
+            summary = body.get("monte_carlo") or {}
+            if r.status_code != 200 or summary.get("method") != method or summary.get("resamples") != 2000:
+                print(f"   [FAIL] {method}: {r.status_code} {summary}")
+                return False
+            if body["metrics"] != plain["metrics"] or body["trades"] != plain["trades"]:
+                print(f"   [FAIL] {method}: Monte Carlo changed the backtest itself")
+                return False
+            dist = summary["max_drawdown_pct"]
+            if not 0.0 <= dist["p5"] <= dist["p50"] <= dist["p95"] <= 100.0:
+                print(f"   [FAIL] {method}: drawdown percentiles {dist}")
+                return False
+        columnar = client.get(f"{URL}&monte_carlo=returns&mc_resamples=2000&mc_seed=1&format=columnar").json()
+        if columnar["monte_carlo"] != body["monte_carlo"]:
+            print("   [FAIL] Columnar response lacks the same distributions")
+            return False
+        packed = client.get(f"{URL}&monte_carlo=returns", headers={"Accept": "application/msgpack"})
+        if packed.status_code != 200:
+            print(f"   [FAIL] msgpack response {packed.status_code}")
+            return False
+        for bad in ("&monte_carlo=returns&mc_resamples=10", "&monte_carlo=daily", "&monte_carlo=returns&mc_block_size=0"):
+            if client.get(URL + bad).status_code != 422:
+                print(f"   [FAIL] {bad} accepted")
+                return False
+        print("   [OK] trades/returns distributions, rows/columnar/msgpack, bad parameters rejected")
+    finally:
+        app.dependency_overrides.clear()
+
+    print("\n5. 10,000 resamples of 20 years")
+    equity = _equity(5040)
+    trade_returns = np.random.default_rng(4).normal(0.01, 0.08, 300)
+    for method in MonteCarloMethod:
+        t0 = time.perf_counter()
+        run_monte_carlo(method, equity=equity, trade_returns=trade_returns, years=20.0, resamples=10_000, seed=1)
+        elapsed = time.perf_counter() - t0
+        if elapsed > 1.0:
+            print(f"   [FAIL] {method.value}: {elapsed:.2f}s")
+            return False
+        print(f"   [OK] {method.value}: {elapsed * 1000:.0f} ms")
+
+    print("\n=== All Monte Carlo tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_monte_carlo()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,320 @@
+"""
+Test script for multi-symbol portfolio backtests.
+Checks that the price matrix lines symbols up by date with NaN on missing
+bars, that a one-symbol basket reproduces the single-symbol engine, that
+the engine matches a day-by-day reference for every allocation and
+rebalance schedule on a basket with missing bars, late listings and a
+delisting, that POST /backtest/portfolio reports missing symbols and
+per-symbol trades, and that 500 symbols x 20 years run in one request.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+from datetime import date
+
+import numpy as np
+
+from app.api.deps import get_db
+from app.main import app
+from app.schemas.backtest import AllocationMethod, RebalanceFrequency
+from app.services.backtesting.engine import run_long_only_vectorized
+from app.services.backtesting.portfolio import DATA_END_REASON, run_portfolio
+from app.services.indicators.kernels import sma_array
+from app.services.stocks.candle_loader import load_candles
+from app.services.stocks.price_matrix import load_price_matrix
+from app.services.strategies.sma_threshold import (
+    REASONS,
+    sma_threshold_signal_array,
+    sma_threshold_signal_arrays,
+    sma_threshold_signal_matrix,
+)
+from scripts.test_columnar_responses import _make_client
+
+URL = "/backtest/portfolio"
+
+
+def _business_days(start: str, end: str) -> np.ndarray:
+    days = np.arange(np.datetime64(start), np.datetime64(end))
+    return days[np.is_busday(days)]
+
+
+def _insert(db, first_id: int, closes: dict) -> None:
+    """
+    Insert {ticker: (dates, closes)} straight through the DBAPI cursor.
+    """
+    cursor = db.connection().connection.cursor()
+    for offset, (ticker, (dates, close)) in enumerate(closes.items()):
+        cursor.execute("INSERT INTO symbols (id, ticker) VALUES (?, ?)", (first_id + offset, ticker))
+        cursor.executemany(
+            "INSERT INTO candles (symbol_id, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, 0)",
+            [(first_id + offset, d, c, c, c, c) for d, c in zip(dates.astype(str).tolist(), close.tolist())],
+        )
+    db.commit()
+
+
+def _walk(rng, n: int) -> np.ndarray:
+    return 100.0 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, n)))
+
+
+def _basket(days: np.ndarray) -> dict:
+    """
+    Five symbols: full history, random missing bars, a late listing, a
+    delisting while long, and a late listing with missing bars.
+    """
+    rng = np.random.default_rng(11)
+    n = len(days)
+    full = np.arange(n)
+    gaps = full[rng.random(n) > 0.07]
+    walks = [_walk(rng, n) for _ in range(5)]
+
+    # Delist on a candle where the SMA strategy is already long
+    signals = sma_threshold_signal_array(walks[3], sma_array(walks[3], 15))
+    marked = np.flatnonzero(signals)
+    long = np.zeros(n, dtype=bool)
+    for a, b in zip(marked, np.append(marked[1:], n)):
+        long[a:b] = signals[a] == 1
+    cut = int(np.flatnonzero(long[n // 2:] & (signals[n // 2:] == 0))[0]) + n // 2
+    rows = [full, gaps, full[150:], full[:cut + 1], gaps[gaps >= 90]]
+    return {f"P{i}": (days[at], walk[at]) for i, (at, walk) in enumerate(zip(rows, walks))}
+
+
+def _reference(prices, signals, strength, allocation, rebalance, cash):
+    """
+    Day-by-day portfolio: equity per date and (ticker, entry, exit, pnl,
+    reason) per closed trade.
+    """
+    close = prices.close
+    n, width = close.shape
+    valid = ~np.isnan(close)
+    last = [max(np.flatnonzero(valid[:, s])) for s in range(width)]
+    days = prices.dates.tolist()
+    price = [0.0] * width
+    shares = [0.0] * width
+    long = [False] * width
+    entry = [0] * width
+    gain = [0.0] * width
+    trades, curve = [], []
+    period = None
+    for t in range(n):
+        changed = t == 0
+        for s in range(width):
+            if not valid[t, s]:
+                continue
+            gain[s] += shares[s] * (close[t, s] - price[s])
+            price[s] = close[t, s]
+            signal = -1 if t == last[s] < n - 1 else signals[t, s]
+            if signal == 1 and not long[s]:
+                long[s], entry[s], gain[s], changed = True, t, 0.0, True
+            elif signal == -1 and long[s]:
+                reason = REASONS[-1] if signals[t, s] == -1 else DATA_END_REASON
+                trades.append((prices.tickers[s], entry[s], t, gain[s], reason))
+                long[s], changed = False, True
+
+        key = {
+            RebalanceFrequency.on_change: period,
+            RebalanceFrequency.daily: t,
+            RebalanceFrequency.weekly: days[t].isocalendar()[:2],
+            RebalanceFrequency.monthly: (days[t].year, days[t].month),
+        }[rebalance]
+        if changed or key != period:
+            equity = cash + sum(h * p for h, p in zip(shares, price))
+            frozen = [s for s in range(width) if shares[s] > 0 and not valid[t, s]]
+            budget = equity - sum(shares[s] * price[s] for s in frozen)
+            buy = [s for s in range(width) if long[s] and valid[t, s]]
+            weights = [1.0] * len(buy)
+            if allocation == AllocationMethod.signal and sum(max(strength[t, s], 0.0) for s in buy) > 0:
+                weights = [max(strength[t, s], 0.0) for s in buy]
+            shares = [shares[s] if s in frozen else 0.0 for s in range(width)]
+            for s, w in zip(buy, weights):
+                shares[s] = budget * w / sum(weights) / price[s]
+            cash = 0.0 if buy else budget
+        period = key
+        curve.append(cash + sum(h * p for h, p in zip(shares, price)))
+    return np.array(curve), trades
+
+
+def test_portfolio_backtest():
+    print("=== Testing portfolio backtests ===\n")
+    client = _make_client()
+    db = next(app.dependency_overrides[get_db]())
+
+    try:
+        print("1. Price matrix")
+        days = _business_days("2021-01-04", "2023-06-01")
+        basket = _basket(days)
+        _insert(db, 100, basket)
+        tickers = ["P4", "P0", "NOPE", "P2", "P1", "P3"]
+        prices = load_price_matrix(db, tickers, date(2021, 1, 1), date(2023, 6, 1))
+        if prices.tickers != ("P4", "P0", "P2", "P1", "P3") or prices.dates.tolist() != days.tolist():
+            print(f"   [FAIL] Columns {prices.tickers}, {len(prices)} dates")
+            return False
+        for ticker in prices.tickers:
+            own = load_candles(db, ticker, date(2021, 1, 1), date(2023, 6, 1))
+            column = prices.close[:, prices.tickers.index(ticker)]
+            expected = np.full(len(days), np.nan)
+            expected[np.searchsorted(days, own.dates)] = own.close
+            if not np.array_equal(column, expected, equal_nan=True):
+                print(f"   [FAIL] {ticker} column differs from its candles")
+                return False
+        filled = prices.filled()[:, prices.tickers.index("P1")]
+        gap = int(np.flatnonzero(~prices.valid[:, prices.tickers.index("P1")])[0])
+        if gap and filled[gap] != filled[gap - 1]:
+            print("   [FAIL] Missing bar not filled with the last close")
+            return False
+        window = load_price_matrix(db, ["P3", "P0"], date(2023, 1, 1), date(2023, 6, 1))
+        if window.tickers != ("P0",):
+            print(f"   [FAIL] Symbol without candles in range got a column: {window.tickers}")
+            return False
+        print(f"   [OK] {len(prices)} dates x {len(prices.tickers)} symbols, {int((~prices.valid).sum())} missing bars")
+
+        print("\n2. A one-symbol basket is the single-symbol backtest")
+        series = load_candles(db, "TSLA", date(2022, 1, 1), date(2023, 12, 31))
+        single_signals, single_reasons = sma_threshold_signal_arrays(series, 20)
+        single = run_long_only_vectorized(series, single_signals, reasons=single_reasons)
+        alone = load_price_matrix(db, ["TSLA"], date(2022, 1, 1), date(2023, 12, 31))
+        signals, strength = sma_threshold_signal_matrix(alone.close, 20)
+        for allocation in AllocationMethod:
+            for rebalance in RebalanceFrequency:
+                run = run_portfolio(
+                    alone, signals, strength=strength, allocation=allocation, rebalance=rebalance, reasons=REASONS
+                )
+                if not np.allclose(run.equity, single.equity, rtol=1e-12, atol=0.0):
+                    print(f"   [FAIL] {allocation.value}/{rebalance.value}: equity differs")
+                    return False
+                got = [(t.entry_date, t.exit_date, t.reason) for t in run.trades()["TSLA"]]
+                expected = [(t.entry_date, t.exit_date, t.reason) for t in single.trades()]
+                if got != expected or not np.allclose(run.pnl, single.pnl, rtol=1e-9, atol=1e-9):
+                    print(f"   [FAIL] {allocation.value}/{rebalance.value}: trades differ")
+                    return False
+        print(f"   [OK] Same equity and {len(single.pnl)} trades for every allocation and schedule")
+
+        print("\n3. Engine vs day-by-day reference (missing bars, listing, delisting)")
+        signals, strength = sma_threshold_signal_matrix(prices.close, 15)
+        finals = {}
+        for allocation in AllocationMethod:
+            for rebalance in RebalanceFrequency:
+                run = run_portfolio(
+                    prices, signals, strength=strength, allocation=allocation, rebalance=rebalance, reasons=REASONS
+                )
+                curve, trades = _reference(prices, signals, strength, allocation, rebalance, 10_000.0)
+                if not np.allclose(run.equity, curve, rtol=1e-10, atol=0.0):
+                    worst = int(np.argmax(np.abs(run.equity - curve)))
+                    print(f"   [FAIL] {allocation.value}/{rebalance.value}: equity differs at {prices.dates[worst]}")
+                    return False
+                got = [
+                    (prices.tickers[s], e, x, r)
+                    for s, e, x, r in zip(run.symbol.tolist(), run.entry_index.tolist(), run.exit_index.tolist(), run.reason)
+                ]
+                if sorted(got) != sorted((t, e, x, r) for t, e, x, _, r in trades):
+                    print(f"   [FAIL] {allocation.value}/{rebalance.value}: trades differ")
+                    return False
+                pnl = {(t, e): p for t, e, _, p, _ in trades}
+                if not all(abs(pnl[(g[0], g[1])] - p) <= 1e-8 * max(1.0, abs(p)) for g, p in zip(got, run.pnl.tolist())):
+                    print(f"   [FAIL] {allocation.value}/{rebalance.value}: trade pnl differs")
+                    return False
+                valid = prices.valid
+                if not (valid[run.entry_index, run.symbol].all() and valid[run.exit_index, run.symbol].all()):
+                    print(f"   [FAIL] {allocation.value}/{rebalance.value}: a trade on a missing bar")
+                    return False
+                finals[(allocation, rebalance)] = run.equity[-1]
+        delisted = run.trades()["P3"]
+        if not delisted or delisted[-1].reason != DATA_END_REASON or delisted[-1].exit_date != basket["P3"][0][-1].item():
+            print("   [FAIL] Delisted symbol not sold on its last candle")
+            return False
+        if len(set(finals.values())) != len(finals):
+            print("   [FAIL] Allocations or schedules have no effect")
+            return False
+        print(f"   [OK] {len(finals)} allocation/schedule combinations match; delisted symbol sold at its last close")
+
+        print("\n4. POST /backtest/portfolio")
+        payload = {
+            "symbols": ["p0", "P1", "NOPE", "P2", "P3", "P4", "P1"],
+            "start": "2021-01-01",
+            "end": "2023-06-01",
+            "sma_period": 15,
+            "allocation": "signal",
+            "rebalance": "weekly",
+        }
+        r = client.post(URL, json=payload)
+        if r.status_code != 200:
+            print(f"   [FAIL] Status {r.status_code}: {r.text}")
+            return False
+        body = r.json()
+        ordered = load_price_matrix(db, ["P0", "P1", "P2", "P3", "P4"], date(2021, 1, 1), date(2023, 6, 1))
+        signals, strength = sma_threshold_signal_matrix(ordered.close, 15)
+        run = run_portfolio(
+            ordered, signals, strength=strength, allocation=AllocationMethod.signal, rebalance=RebalanceFrequency.weekly
+        )
+        if body["symbols"] != ["P0", "P1", "P2", "P3", "P4"] or body["missing"] != ["NOPE"]:
+            print(f"   [FAIL] symbols {body['symbols']}, missing {body['missing']}")
+            return False
+        if [p["equity"] for p in body["equity_curve"]] != run.equity.tolist():
+            print("   [FAIL] Equity curve differs from the engine")
+            return False
+        counts = {ticker: len(trades) for ticker, trades in body["trades"].items()}
+        if set(counts) != set(body["symbols"]) or sum(counts.values()) != body["metrics"]["num_trades"]:
+            print(f"   [FAIL] Trades by symbol {counts} vs {body['metrics']['num_trades']}")
+            return False
+        bad = [
+            ({**payload, "symbols": ["NOPE"]}, 400),
+            ({**payload, "symbols": [f"X{i}" for i in range(501)]}, 400),
+            ({**payload, "start": "2024-01-01"}, 400),
+            ({**payload, "allocation": "random"}, 422),
+            ({**payload, "symbols": []}, 422),
+        ]
+        for request, status in bad:
+            r = client.post(URL, json=request)
+            if r.status_code != status:
+                print(f"   [FAIL] Expected {status}, got {r.status_code}: {r.text[:200]}")
+                return False
+        print(f"   [OK] {sum(counts.values())} trades across {len(counts)} symbols; {len(bad)} bad requests rejected")
+
+        print("\n5. 500 symbols x 20 years in one request")
+        days = _business_days("2005-01-03", "2025-01-01")
+        rng = np.random.default_rng(5)
+        _insert(db, 1000, {f"B{i:03d}": (days, _walk(rng, len(days))) for i in range(500)})
+        payload = {
+            "symbols": [f"B{i:03d}" for i in range(500)],
+            "start": "2005-01-01",
+            "end": "2024-12-31",
+            "sma_period": 50,
+            "allocation": "signal",
+        }
+        t0 = time.perf_counter()
+        r = client.post(URL, json=payload)
+        elapsed = time.perf_counter() - t0
+        if r.status_code != 200:
+            print(f"   [FAIL] Status {r.status_code}: {r.text[:200]}")
+            return False
+        body = r.json()
+        if len(body["equity_curve"]) != len(days) or len(body["trades"]) != 500 or elapsed > 30.0:
+            print(f"   [FAIL] {len(body['equity_curve'])} dates, {len(body['trades'])} symbols in {elapsed:.1f}s")
+            return False
+        print(
+            f"   [OK] {len(days)} dates x 500 symbols, {body['metrics']['num_trades']} trades "
+            f"in {elapsed:.2f}s ({len(r.content) / 1e6:.0f} MB)"
+        )
+    finally:
+        db.close()
+        app.dependency_overrides.clear()
+
+    print("\n=== All portfolio backtest tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_portfolio_backtest()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
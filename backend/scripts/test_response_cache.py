@@ -0,0 +1,115 @@
+"""
+Test script for the on-disk provider response cache.
+Covers TTL freshness, ETag revalidation (304) and LRU eviction under a size cap.
+Uses a temporary directory and an in-process mock transport (no network).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date
+
+import httpx
+
+from app.services.market_data.async_stooq_provider import AsyncStooqProvider
+from app.services.market_data.response_cache import DiskResponseCache
+
+CSV = "Date,Open,High,Low,Close,Volume\n2023-01-03,1,2,0.5,1.5,100\n2023-01-04,1.5,2.5,1,2,200\n"
+
+
+class EtagServer:
+    def __init__(self):
+        self.full = 0
+        self.not_modified = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"v1"':
+            self.not_modified += 1
+            return httpx.Response(304)
+        self.full += 1
+        return httpx.Response(200, text=CSV, headers={"ETag": '"v1"'})
+
+
+async def _get(provider):
+    return await provider.get_candles("AAPL", date(2023, 1, 1), date(2023, 12, 31))
+
+
+def test_response_cache():
+    print("=== Testing Provider Response Cache ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = EtagServer()
+
+        async def run(cache, times):
+            client = httpx.AsyncClient(transport=httpx.MockTransport(server.handler))
+            provider = AsyncStooqProvider(requests_per_second=0, client=client, cache=cache)
+            try:
+                return [await _get(provider) for _ in range(times)]
+            finally:
+                await client.aclose()
+
+        # 1. Fresh entries cost zero network
+        print("1. Repeated fetches within TTL:")
+        cache = DiskResponseCache(Path(tmp) / "fresh", ttl_seconds=3600, max_bytes=1_000_000)
+        results = asyncio.run(run(cache, 3))
+        print(f"   Full downloads: {server.full}, 304s: {server.not_modified}")
+        if server.full != 1 or server.not_modified != 0 or any(len(r) != 2 for r in results):
+            print("   [FAIL] Expected a single download serving all three calls")
+            return False
+        print("   [OK] Served from cache")
+
+        # 2. Stale entries are revalidated with If-None-Match
+        print("\n2. Revalidation after TTL expiry:")
+        server.full = 0
+        cache = DiskResponseCache(Path(tmp) / "stale", ttl_seconds=0, max_bytes=1_000_000)
+        results = asyncio.run(run(cache, 3))
+        print(f"   Full downloads: {server.full}, 304s: {server.not_modified}")
+        if server.full != 1 or server.not_modified != 2 or any(len(r) != 2 for r in results):
+            print("   [FAIL] Expected one download followed by two 304 revalidations")
+            return False
+        print("   [OK] Conditional revalidation used")
+
+        # 3. LRU eviction under the size cap
+        print("\n3. LRU eviction:")
+        cache = DiskResponseCache(Path(tmp) / "lru", ttl_seconds=3600, max_bytes=250)
+        for key in ("a", "b"):
+            cache.put(key, b"x" * 100)
+        # Make "a" the most recently used, so "b" is the eviction victim
+        past = time.time() - 60
+        os.utime(cache._paths("b")[0], (past, past))
+        cache.get("a")
+        cache.put("c", b"y" * 100)
+        present = [k for k in ("a", "b", "c") if cache.get(k) is not None]
+        print(f"   Present after put(c): {present}, size={cache.size_bytes()}")
+        if present != ["a", "c"] or cache.size_bytes() > 250:
+            print("   [FAIL] Expected least recently used entry 'b' to be evicted")
+            return False
+        print("   [OK] Least recently used entry evicted")
+
+        # 4. Oversized payloads are not cached
+        cache.put("huge", b"z" * 1000)
+        if cache.get("huge") is not None:
+            print("   [FAIL] Payload larger than the cap should not be stored")
+            return False
+        print("   [OK] Oversized payload skipped")
+
+    print("\n=== All response cache tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_response_cache()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,144 @@
+"""
+Test script for the offline synthetic market data provider.
+Checks determinism, range independence, OHLC invariants, provider
+selection through settings, and a round trip through StooqProvider
+against the local Stooq stand-in, where a "No data" body raises and is
+not cached. No network needed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import tempfile
+from datetime import date
+
+from app.core.config import settings
+from app.services.market_data.csv_stream import PayloadError
+from app.services.market_data.providers import get_market_data_provider
+from app.services.market_data.response_cache import DiskResponseCache, NullResponseCache
+from app.services.market_data.stooq_provider import StooqProvider
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.market_data.trading_calendar import is_trading_day
+from scripts.stooq_standin import NO_DATA_TICKER, base_url, start_standin
+
+END = date(2024, 6, 28)
+
+
+def _key(c):
+    return (c.date, c.open, c.high, c.low, c.close, c.volume)
+
+
+def test_synthetic_provider():
+    print("=== Testing synthetic market data provider ===\n")
+
+    provider = SyntheticProvider(seed=7)
+
+    print("1. Same seed and symbol give the same bars")
+    a = provider.get_candles("AAPL", date(2020, 1, 1), END)
+    b = SyntheticProvider(seed=7).get_candles("aapl", date(2020, 1, 1), END)
+    other = SyntheticProvider(seed=8).get_candles("AAPL", date(2020, 1, 1), END)
+    if not a or [_key(c) for c in a] != [_key(c) for c in b]:
+        print("   [FAIL] Output is not deterministic")
+        return False
+    if [c.close for c in a] == [c.close for c in other]:
+        print("   [FAIL] Different seeds produced identical closes")
+        return False
+    print(f"   [OK] {len(a)} bars reproduced; other seeds differ")
+
+    print("\n2. Bars don't depend on the requested range")
+    wide = {c.date: _key(c) for c in provider.get_candles("AAPL", date(2015, 1, 1), date(2024, 12, 31))}
+    if any(wide.get(c.date) != _key(c) for c in a):
+        print("   [FAIL] Overlapping ranges disagree")
+        return False
+    print("   [OK] Overlapping ranges agree bar for bar")
+
+    print("\n3. OHLC invariants and calendar")
+    for c in a:
+        if not (c.low <= min(c.open, c.close) and c.high >= max(c.open, c.close) and c.low > 0):
+            print(f"   [FAIL] Bad OHLC on {c.date}: {c}")
+            return False
+        if c.volume <= 0 or not is_trading_day(c.date):
+            print(f"   [FAIL] Bad volume or non-trading day on {c.date}")
+            return False
+    if any(x.date >= y.date for x, y in zip(a, a[1:])):
+        print("   [FAIL] Dates are not strictly increasing")
+        return False
+    print("   [OK] low <= open/close <= high, positive volume, NYSE sessions only")
+
+    print("\n4. Provider is selectable through settings")
+    previous = settings.MARKET_DATA_PROVIDER
+    try:
+        settings.MARKET_DATA_PROVIDER = "synthetic"
+        if not isinstance(get_market_data_provider(), SyntheticProvider):
+            print("   [FAIL] MARKET_DATA_PROVIDER=synthetic not honoured")
+            return False
+        settings.MARKET_DATA_PROVIDER = "stooq"
+        if not isinstance(get_market_data_provider(), StooqProvider):
+            print("   [FAIL] MARKET_DATA_PROVIDER=stooq not honoured")
+            return False
+    finally:
+        settings.MARKET_DATA_PROVIDER = previous
+    try:
+        get_market_data_provider("nope")
+        print("   [FAIL] Unknown provider name accepted")
+        return False
+    except ValueError:
+        pass
+    print("   [OK] Factory follows settings and rejects unknown names")
+
+    print("\n5. StooqProvider round trip against the local stand-in")
+    server = start_standin(seed=7, end=END)
+    try:
+        stooq = StooqProvider(cache=NullResponseCache(), base_url=base_url(server))
+        via_http = stooq.get_candles("AAPL", date(2020, 1, 1), END)
+        if [_key(c) for c in via_http] != [_key(c) for c in a]:
+            print("   [FAIL] Stand-in CSV does not round-trip")
+            return False
+        if stooq.get_candles("AAPL.US", date(2020, 1, 1), date(2019, 1, 1)):
+            print("   [FAIL] Empty range returned bars")
+            return False
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DiskResponseCache(tmp, ttl_seconds=0, max_bytes=64 * 1024 * 1024)
+            cached = StooqProvider(cache=cache, base_url=base_url(server))
+            first = cached.get_candles("MSFT", date(2024, 1, 1), END)
+            entry = cache.get("stooq:msft.us:d")
+            if entry is None or not entry.etag:
+                print("   [FAIL] ETag was not cached")
+                return False
+            # ttl=0 forces a conditional request, answered with 304
+            second = cached.get_candles("MSFT", date(2024, 1, 1), END)
+            if not first or [_key(c) for c in first] != [_key(c) for c in second]:
+                print("   [FAIL] Revalidated payload differs")
+                return False
+
+            try:
+                cached.get_candles(NO_DATA_TICKER, date(2024, 1, 1), END)
+                print("   [FAIL] 'No data' body was taken as an empty history")
+                return False
+            except PayloadError:
+                pass
+            if cache.get(f"stooq:{NO_DATA_TICKER}.us:d") is not None:
+                print("   [FAIL] 'No data' body was cached")
+                return False
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"   [OK] {len(via_http)} bars identical over HTTP; ETag revalidation works; 'No data' raises, uncached")
+
+    print("\n=== All synthetic provider tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_synthetic_provider()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,133 @@
+"""
+Test script for the array-based backtest engine.
+Checks that run_long_only_vectorized gives results identical to the loop
+engine run_long_only_all_in_out for random signal streams (redundant
+BUY/SELLs, holds, an open trade at the end, signals off the candle dates)
+and for the SMA threshold strategy, that it validates its inputs the same
+way, and that a 10k-candle run stays well under a millisecond.
+No database or network needed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from app.schemas.strategy import SignalPoint
+from app.services.backtesting.engine import (
+    run_long_only_all_in_out,
+    run_long_only_vectorized,
+    signal_array,
+)
+from app.services.stocks.candle_series import CandleSeries
+from app.services.strategies.sma_threshold import sma_threshold_signal_arrays, sma_threshold_signals
+
+
+def _series(n: int, seed: int = 7) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(rng.normal(0, 0.02, n).cumsum())
+    dates = np.datetime64("1990-01-01") + np.arange(n) * 2
+    return CandleSeries("TEST", dates, close=closes)
+
+
+def _random_signals(series: CandleSeries, rng: np.random.Generator):
+    signals = []
+    for i in np.flatnonzero(rng.random(len(series)) < 0.1).tolist():
+        day = series.dates[i].item()
+        # Candles are two days apart, so the day after has no candle and
+        # its signal must be dropped
+        if rng.random() < 0.1:
+            day += timedelta(days=1)
+        value = int(rng.choice([1, 1, -1, -1, 0, 2]))
+        signals.append(SignalPoint(date=day, signal=value, reason=f"r{i}" if rng.random() < 0.8 else None))
+    return signals
+
+
+def _same(vectorized, loop) -> bool:
+    curve, trades = loop
+    return vectorized.equity_points() == curve and vectorized.trades() == trades
+
+
+def test_vectorized_engine():
+    print("=== Testing vectorized backtest engine ===\n")
+    rng = np.random.default_rng(1)
+
+    print("1. Random signal streams match the loop engine")
+    for trial in range(50):
+        series = _series(int(rng.integers(1, 400)), seed=trial)
+        signals = _random_signals(series, rng)
+        dense, reasons = signal_array(series.dates, signals)
+        cash = float(rng.choice([1.0, 10_000.0, 123_456.789]))
+        run = run_long_only_vectorized(series, dense, initial_cash=cash, reasons=reasons)
+        if not _same(run, run_long_only_all_in_out(series, signals, initial_cash=cash)):
+            print(f"   [FAIL] Trial {trial} differs from the loop engine")
+            return False
+    print("   [OK] 50 streams: equity curves and trades identical")
+
+    print("\n2. SMA threshold strategy")
+    series = _series(5000)
+    for period in (1, 5, 20, 200):
+        dense, reasons = sma_threshold_signal_arrays(series, period)
+        run = run_long_only_vectorized(series, dense, reasons=reasons)
+        if not _same(run, run_long_only_all_in_out(series, sma_threshold_signals(series, period))):
+            print(f"   [FAIL] sma_period={period} differs")
+            return False
+        if run.position.dtype != np.int8 or set(np.unique(run.position).tolist()) - {0, 1}:
+            print(f"   [FAIL] Position array is {run.position.dtype} {np.unique(run.position)}")
+            return False
+    print(f"   [OK] Periods 1, 5, 20, 200 identical ({len(run.exit_index)} trades at 200)")
+
+    print("\n3. Validation")
+    flat = np.zeros(3, dtype=np.int8)
+    bad = [
+        ("empty", lambda: run_long_only_vectorized(_series(0), np.zeros(0, dtype=np.int8))),
+        ("unsorted", lambda: run_long_only_vectorized(_series(3).select(slice(None, None, -1)), flat)),
+        ("close <= 0", lambda: run_long_only_vectorized(CandleSeries("X", _series(3).dates, close=[1.0, 0.0, 2.0]), flat)),
+        ("initial_cash", lambda: run_long_only_vectorized(_series(3), flat, initial_cash=0)),
+        ("length", lambda: run_long_only_vectorized(_series(3), flat[:2])),
+    ]
+    for name, call in bad:
+        try:
+            call()
+            print(f"   [FAIL] {name} accepted")
+            return False
+        except ValueError:
+            pass
+    print(f"   [OK] {len(bad)} invalid inputs rejected")
+
+    print("\n4. Engine time for 10k candles")
+    series = _series(10_000)
+    dense, reasons = sma_threshold_signal_arrays(series, 20)
+    timings = []
+    for _ in range(50):
+        t0 = time.perf_counter()
+        run = run_long_only_vectorized(series, dense, reasons=reasons)
+        timings.append(time.perf_counter() - t0)
+    median_ms = sorted(timings)[len(timings) // 2] * 1000
+    t0 = time.perf_counter()
+    run_long_only_all_in_out(series, sma_threshold_signals(series, 20))
+    loop_ms = (time.perf_counter() - t0) * 1000
+    if median_ms >= 1.0:
+        print(f"   [FAIL] Median {median_ms:.3f} ms for {len(run.exit_index)} trades")
+        return False
+    print(f"   [OK] Median {median_ms:.3f} ms ({len(run.exit_index)} trades) vs {loop_ms:.1f} ms for the loop engine")
+
+    print("\n=== All vectorized engine tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_vectorized_engine()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
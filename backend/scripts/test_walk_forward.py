@@ -0,0 +1,243 @@
+"""
+Test script for walk-forward analysis.
+Checks the rolling and anchored fold layouts, that each fold picks the
+period a brute-force loop-engine search picks on its train window, that
+SMAs are computed once per period rather than per fold, that the test
+windows stitch into one out-of-sample curve with no trade crossing a
+window end, that the worker pool gives identical results (and a failing
+task surfaces its own error), that bad
+requests are rejected, and that a 20-fold run costs about as much as a
+handful of plain backtests.
+Uses an in-memory SQLite database, SyntheticProvider and a dependency
+override for auth (no network, no server).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+from datetime import date
+
+import numpy as np
+
+from app.api.deps import get_db
+from app.api.routes.backtest import MAX_WALK_FORWARD_PERIODS
+from app.core.config import settings
+from app.main import app
+from app.services.backtesting import sweep, walk_forward
+from app.services.backtesting.engine import run_long_only_all_in_out
+from app.services.backtesting.metrics import compute_metrics
+from app.services.backtesting.walk_forward import Fold, make_folds
+from app.services.indicators.kernels import sma_array
+from app.services.market_data.synthetic_provider import SyntheticProvider
+from app.services.stocks.candle_loader import load_candles
+from app.services.stocks.candle_series import CandleSeries
+from app.services.stocks.ingest_service import ingest_symbol_candles
+from app.services.strategies.sma_threshold import generate_sma_threshold_signals
+from app.utils.shared_arrays import SharedArrays, call_with_arrays
+from scripts.test_columnar_responses import _make_client
+
+URL = "/backtest/TSLA/walk-forward"
+REQUEST = {
+    "start": "2022-01-01",
+    "end": "2023-12-31",
+    "sma_period": {"start": 5, "stop": 50, "step": 5},
+    "train_size": 120,
+    "test_size": 40,
+}
+
+
+def _best_period(series, periods, start, stop):
+    """
+    Highest train Sharpe (lowest period on ties), by the loop engine.
+    """
+    window = series.select(slice(start, stop))
+    best = None
+    for period in periods:
+        sma = sma_array(series.close, period)[start:stop]
+        signals = generate_sma_threshold_signals(window.dates, window.close, sma)
+        curve, trades = run_long_only_all_in_out(window, signals)
+        sharpe = compute_metrics(equity_curve=curve, trades=trades).sharpe_ratio
+        if best is None or sharpe > best[1]:
+            best = (period, sharpe)
+    return best[0]
+
+
+def _failing_task(arrays, *args):
+    # Fails while views of the shared block are local to this frame
+    close = arrays["close"]
+    raise ZeroDivisionError(f"bad window of {len(close)} closes")
+
+
+def test_walk_forward():
+    print("=== Testing walk-forward analysis ===\n")
+    client = _make_client()
+    workers = settings.BACKTEST_SWEEP_WORKERS
+
+    try:
+        print("1. Fold layout")
+        rolling = make_folds(10, 4, 3)
+        anchored = make_folds(10, 4, 3, anchored=True)
+        if rolling != [Fold(0, 4, 7), Fold(3, 7, 10)] or anchored != [Fold(0, 4, 7), Fold(0, 7, 10)]:
+            print(f"   [FAIL] rolling {rolling}, anchored {anchored}")
+            return False
+        if make_folds(11, 4, 3)[-1] != Fold(6, 10, 11):
+            print("   [FAIL] Last test window not cut at the end of the data")
+            return False
+        print("   [OK] Rolling and anchored windows, short final window")
+
+        print("\n2. Each fold picks the best train period")
+        settings.BACKTEST_SWEEP_WORKERS = 1
+        sma_calls = []
+        original_sma = walk_forward.sma_array
+        walk_forward.sma_array = lambda close, period: sma_calls.append(period) or original_sma(close, period)
+        try:
+            r = client.post(URL, json=REQUEST)
+        finally:
+            walk_forward.sma_array = original_sma
+        if r.status_code != 200:
+            print(f"   [FAIL] Status {r.status_code}: {r.text}")
+            return False
+        body = r.json()
+        db = next(app.dependency_overrides[get_db]())
+        series = load_candles(db, "TSLA", date(2022, 1, 1), date(2023, 12, 31))
+        db.close()
+        periods = list(range(5, 51, 5))
+        folds = make_folds(len(series), 120, 40)
+        if len(body["folds"]) != len(folds):
+            print(f"   [FAIL] {len(body['folds'])} folds, expected {len(folds)}")
+            return False
+        for got, fold in zip(body["folds"], folds):
+            expected = _best_period(series, periods, fold.train_start, fold.train_stop)
+            if got["sma_period"] != expected:
+                print(f"   [FAIL] Fold {got['test_start']} chose {got['sma_period']}, expected {expected}")
+                return False
+        if sorted(sma_calls) != periods:
+            print(f"   [FAIL] SMA computed {len(sma_calls)} times for {len(periods)} periods")
+            return False
+        print(f"   [OK] {len(folds)} folds agree with brute force; {len(sma_calls)} SMA computations for {len(periods)} periods")
+
+        print("\n3. Stitched out-of-sample curve")
+        curve = body["equity_curve"]
+        if [p["date"] for p in curve] != [d.isoformat() for d in series.dates[120:].tolist()]:
+            print("   [FAIL] Curve does not cover the test windows back to back")
+            return False
+        offset = 0
+        for fold in body["folds"]:
+            size = sum(1 for p in curve[offset:] if p["date"] <= fold["test_end"])
+            segment = np.array([p["equity"] for p in curve[offset:offset + size]])
+            inside = [t for t in body["trades"] if fold["test_start"] <= t["entry_date"] <= fold["test_end"]]
+            if any(t["exit_date"] > fold["test_end"] for t in inside):
+                print(f"   [FAIL] A trade crosses the end of window {fold['test_end']}")
+                return False
+            if len(inside) != fold["test_metrics"]["num_trades"]:
+                print(f"   [FAIL] Window {fold['test_start']} has {len(inside)} trades, metrics say {fold['test_metrics']['num_trades']}")
+                return False
+            total = ((segment[-1] / segment[0]) - 1.0) * 100.0
+            if abs(total - fold["test_metrics"]["total_return_pct"]) > 1e-9:
+                print(f"   [FAIL] Window {fold['test_start']} return does not match its segment")
+                return False
+            offset += size
+        if len(body["trades"]) != body["metrics"]["num_trades"]:
+            print("   [FAIL] Overall metrics do not cover all trades")
+            return False
+        print(f"   [OK] {len(curve)} out-of-sample candles, {len(body['trades'])} trades, return {body['metrics']['total_return_pct']:.2f}%")
+
+        print("\n4. Worker pool")
+        settings.BACKTEST_SWEEP_WORKERS = 2
+        anchored_body = client.post(URL, json={**REQUEST, "anchored": True}).json()
+        pooled = client.post(URL, json=REQUEST)
+        if pooled.status_code != 200 or pooled.json() != body or sweep._pool is None:
+            print(f"   [FAIL] Pooled walk-forward differs ({pooled.status_code})")
+            return False
+        if anchored_body["folds"][-1]["train_start"] != body["folds"][0]["train_start"]:
+            print("   [FAIL] Anchored train windows do not start at the first candle")
+            return False
+        with SharedArrays({"close": np.arange(10.0)}) as shared:
+            try:
+                call_with_arrays(shared.spec, _failing_task)
+                print("   [FAIL] Task error was swallowed")
+                return False
+            except ZeroDivisionError as e:
+                tb, task_locals = e.__traceback__, None
+                while tb is not None:
+                    if tb.tb_frame.f_code is _failing_task.__code__:
+                        task_locals = tb.tb_frame.f_locals
+                    tb = tb.tb_next
+                if task_locals:
+                    print(f"   [FAIL] The traceback keeps views alive: {sorted(task_locals)}")
+                    return False
+            except BufferError:
+                print("   [FAIL] Detaching the block hid the task's error")
+                return False
+        print("   [OK] 2 workers give identical results; anchored windows start at the first candle; task errors propagate")
+
+        print("\n5. Validation")
+        settings.BACKTEST_SWEEP_WORKERS = 1
+        bad = [
+            ({**REQUEST, "train_size": 5000}, "Need more than"),
+            ({**REQUEST, "sma_period": {"start": 1, "stop": 400}, "test_size": 1}, "exceeds"),
+            ({**REQUEST, "sma_period": {"start": 1, "stop": 5000}}, f"At most {MAX_WALK_FORWARD_PERIODS}"),
+            ({**REQUEST, "sma_period": {"start": 9, "stop": 3}}, "start must be <="),
+            ({**REQUEST, "start": "2024-01-01", "end": "2023-01-01"}, "start must be <="),
+        ]
+        for payload, detail in bad:
+            r = client.post(URL, json=payload)
+            if r.status_code != 400 or detail not in r.json()["detail"]:
+                print(f"   [FAIL] Expected 400 '{detail}', got {r.status_code}: {r.text}")
+                return False
+        series = CandleSeries("X", np.arange(10_000).astype("datetime64[D]"), close=np.full(10_000, 100.0))
+        try:
+            walk_forward.run_sma_threshold_walk_forward(series, range(1, 501), train_size=9_000, test_size=1_000)
+            print("   [FAIL] 500 periods x 10,000 candles of SMAs accepted")
+            return False
+        except ValueError as e:
+            if "SMA values" not in str(e):
+                raise
+        print(f"   [OK] {len(bad)} bad requests rejected with 400; SMA matrix size capped")
+
+        print("\n6. 20 folds over 20 years vs a plain backtest")
+        db = next(app.dependency_overrides[get_db]())
+        ingest_symbol_candles(db, "LONG", date(2005, 1, 1), date(2024, 12, 31), provider=SyntheticProvider(seed=9))
+        n = len(load_candles(db, "LONG"))
+        db.close()
+        plain_url = "/backtest/LONG?start=2005-01-01&end=2024-12-31&sma_period=20"
+        client.get(plain_url)
+        t0 = time.perf_counter()
+        client.get(plain_url)
+        plain = time.perf_counter() - t0
+        payload = {
+            "start": "2005-01-01",
+            "end": "2024-12-31",
+            "sma_period": {"start": 10, "stop": 100, "step": 10},
+            "train_size": 1000,
+            "test_size": -(-(n - 1000) // 20),
+        }
+        t0 = time.perf_counter()
+        r = client.post("/backtest/LONG/walk-forward", json=payload)
+        elapsed = time.perf_counter() - t0
+        if r.status_code != 200 or len(r.json()["folds"]) != 20 or elapsed > 10 * plain:
+            print(f"   [FAIL] {r.status_code}: {elapsed * 1000:.1f} ms vs {plain * 1000:.1f} ms plain")
+            return False
+        print(f"   [OK] 20 folds x 10 periods in {elapsed * 1000:.1f} ms ({elapsed / plain:.1f}x one plain backtest)")
+    finally:
+        settings.BACKTEST_SWEEP_WORKERS = workers
+        sweep.shutdown_sweep_pool()
+        app.dependency_overrides.clear()
+
+    print("\n=== All walk-forward tests passed! ===")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = test_walk_forward()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"\n[FAIL] Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
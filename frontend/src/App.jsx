@@ -7,6 +7,8 @@ import {
 
 // ─── CONFIG ──────────────────────────────────────────────────────────────────
 const API = "http://127.0.0.1:8000";
+// Charts are at most ~1000 px wide; the API downsamples longer series to this
+const CHART_POINTS = 1000;
 
 // ─── STYLES ──────────────────────────────────────────────────────────────────
 const STYLE = `
@@ -506,8 +508,9 @@ function CandlesPage({ token }) {
   const load = async () => {
     setErr(""); setLoading(true);
     try {
-      const d = await apiFetch(`/stocks/${symbol.toUpperCase()}/candles?limit=${limit}`, token);
-      setData(d);
+      // Newest `limit` candles, re-ordered oldest-first for the charts
+      const d = await apiFetch(`/stocks/${symbol.toUpperCase()}/candles?limit=${limit}&order=desc&max_points=${CHART_POINTS}`, token);
+      setData(d.reverse());
     } catch (e) { setErr(e.message); }
     finally { setLoading(false); }
   };
@@ -641,7 +644,7 @@ function IndicatorsPage({ token }) {
   const load = async () => {
     setErr(""); setLoading(true);
     try {
-      let url = `/indicators/${symbol.toUpperCase()}?start=${start}&end=${end}`;
+      let url = `/indicators/${symbol.toUpperCase()}?start=${start}&end=${end}&max_points=${CHART_POINTS}`;
       if (showSma) url += `&sma_period=${smaPeriod}`;
       if (showEma) url += `&ema_period=${emaPeriod}`;
       url += `&rsi_period=${rsiPeriod}`;